@@ -1,10 +1,12 @@
 # Core communication modules
 
 from .device_manager import DeviceManager
+from .multi_device_manager import MultiDeviceManager
 from .recording_manager import RecordingManager, RecordingSession
 
 __all__ = [
     "DeviceManager",
+    "MultiDeviceManager",
     "RecordingManager",
     "RecordingSession",
 ]
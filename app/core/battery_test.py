@@ -0,0 +1,182 @@
+"""电池放电测试引擎（无界面，运行在测量线程中）"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class BatteryTestConfig:
+    """电池放电测试参数
+
+    mode 为 CC/CR/CP，value 为对应的电流/电阻/功率设定值；截止条件为 None
+    表示不启用。device_cutoff 为 True 时截止电压写入设备 Voff，由设备自行卸载。
+    """
+
+    mode: str
+    value: float
+    cutoff_v: float | None = None
+    cutoff_time_s: float | None = None
+    cutoff_mah: float | None = None
+    device_cutoff: bool = False
+
+
+class BatteryTestEngine:
+    """电池放电测试：容量积分与截止判断
+
+    ``feed`` 由测量线程在每个采样后调用（时间戳为 time.monotonic），以梯形法
+    积分 mAh/Wh 并判断截止条件；满足时返回截止原因，由调用方立即在同一线程中
+    调用 ``stop`` 关断输入，不经过 GUI 线程。``feed`` 只做计算，可直接用模拟
+    数据驱动。``snapshot`` 可在任意线程读取当前状态。
+    """
+
+    UNLOADED_A = 0.001  # 电流低于此值视为设备已卸载
+    LOAD_TIMEOUT_S = 3.0  # 设备端截止模式下开始放电后仍未带载则结束测试
+
+    def __init__(self, config: BatteryTestConfig):
+        self._config = config
+        self._lock = threading.Lock()
+        self._prev_voff: float | None = None
+        self._t_start: float | None = None
+        self._last: tuple[float, float, float, float] | None = None  # t, v, i, p
+        self._mah = 0.0
+        self._wh = 0.0
+        self._peak_i = 0.0
+        self._samples = 0
+        self._reason: str | None = None
+        self._t_event: float | None = None
+        self._t_before: float | None = None
+        self._stopped_at: float | None = None
+
+    @property
+    def config(self) -> BatteryTestConfig:
+        return self._config
+
+    @property
+    def device_cutoff(self) -> bool:
+        """截止电压是否由设备执行"""
+        return self._config.device_cutoff and self._config.cutoff_v is not None
+
+    @property
+    def running(self) -> bool:
+        return self._t_start is not None and self._stopped_at is None
+
+    @property
+    def prev_voff(self) -> float | None:
+        return self._prev_voff
+
+    def start(self, device: Any, now: float | None = None) -> None:
+        """配置设备并打开输入，从此刻开始计时"""
+        cfg = self._config
+        self._prev_voff = device.start_battery_discharge(
+            cfg.mode, cfg.value, cfg.cutoff_v if self.device_cutoff else None
+        )
+        self.begin(time.monotonic() if now is None else now)
+
+    def begin(self, now: float) -> None:
+        """开始计时（设备已在放电）"""
+        with self._lock:
+            self._t_start = now
+
+    def feed(self, t: float, v: float, i: float, p: float) -> str | None:
+        """输入一个采样，返回首次满足的截止原因（否则 None）"""
+        with self._lock:
+            if not self.running or self._reason is not None:
+                return None
+            last = self._last
+            self._last = (t, v, i, p)
+            self._samples += 1
+            if last is not None:
+                dt = max(0.0, t - last[0])
+                self._mah += (last[2] + i) * 0.5 * dt / 3.6
+                self._wh += (last[3] + p) * 0.5 * dt / 3600.0
+            t_before = last[0] if last is not None else None
+
+            cfg = self._config
+            reason: str | None = None
+            if cfg.cutoff_v is not None:
+                if self.device_cutoff:
+                    # 设备在电压低于 Voff 时自行卸载：带载之后电流跌落即说明截止已发生
+                    if self._peak_i > self.UNLOADED_A and i <= max(self.UNLOADED_A, 0.05 * self._peak_i):
+                        reason = "设备端截止电压"
+                    self._peak_i = max(self._peak_i, i)
+                    if self._peak_i <= self.UNLOADED_A and t - self._t_start >= self.LOAD_TIMEOUT_S:
+                        reason = "设备未带载（电压可能已低于截止电压）"
+                        t_before = None
+                elif v <= cfg.cutoff_v:
+                    reason = "达到截止电压"
+            if reason is None and cfg.cutoff_time_s is not None and t - self._t_start >= cfg.cutoff_time_s:
+                reason, t_before = "达到截止时间", None
+            if reason is None and cfg.cutoff_mah is not None and self._mah >= cfg.cutoff_mah:
+                reason, t_before = "达到截止容量", None
+
+            if reason is not None:
+                self._reason = reason
+                self._t_event = t
+                self._t_before = t_before
+            return reason
+
+    def stop(self, device: Any, reason: str | None = None) -> bool:
+        """关闭输入并恢复 Voff；返回是否由本次调用结束测试（重复调用只关断不计时）"""
+        device.stop_battery_discharge(self._prev_voff)
+        now = time.monotonic()
+        with self._lock:
+            if self._stopped_at is not None:
+                return False
+            self._stopped_at = now
+            if self._reason is None:
+                self._reason = reason or "手动停止"
+            return True
+
+    def mark_stopped(self, reason: str) -> bool:
+        """输入已由其他途径关闭（如紧急停止）时结束测试"""
+        with self._lock:
+            if self._stopped_at is not None:
+                return False
+            self._stopped_at = time.monotonic()
+            if self._reason is None:
+                self._reason = reason
+            return True
+
+    def snapshot(self) -> dict:
+        """当前状态：mah、wh、elapsed_s、voltage、reason、running 及截止延迟（毫秒）"""
+        with self._lock:
+            end = self._stopped_at if self._stopped_at is not None else time.monotonic()
+            elapsed = end - self._t_start if self._t_start is not None else 0.0
+            snap = {
+                "mah": self._mah,
+                "wh": self._wh,
+                "elapsed_s": max(0.0, elapsed),
+                "voltage": self._last[1] if self._last else None,
+                "samples": self._samples,
+                "running": self.running,
+                "reason": self._reason,
+                "device_cutoff": self.device_cutoff,
+                "stop_latency_ms": None,
+                "stop_window_ms": None,
+            }
+            if self._t_event is not None and self._stopped_at is not None:
+                snap["stop_latency_ms"] = max(0.0, (self._stopped_at - self._t_event) * 1000.0)
+                if self._t_before is not None:
+                    # 截止实际发生在前一采样与触发采样之间
+                    snap["stop_window_ms"] = max(0.0, (self._t_event - self._t_before) * 1000.0)
+            return snap
+
+
+def stop_latency_text(snap: dict) -> str | None:
+    """截止延迟说明，无截止事件时返回 None
+
+    上位机截止：延迟为触发采样到 INPUT OFF 写出完成，实际越限可能再早一个采样区间。
+    设备端截止：设备在 Voff 处自行卸载，上位机只能确定卸载发生在该采样区间内。
+    """
+    latency = snap.get("stop_latency_ms")
+    if latency is None:
+        return None
+    window = snap.get("stop_window_ms")
+    if snap.get("device_cutoff") and window is not None and snap.get("reason") == "设备端截止电压":
+        return f"截止延迟：设备端卸载，发生在检测前 {window:.0f} ms 内（采样区间上限），不受上位机轮询影响"
+    if window is None:
+        return f"截止延迟：测量线程关断 {latency:.1f} ms"
+    return f"截止延迟：测量线程关断 {latency:.1f}~{latency + window:.1f} ms（含一个采样区间）"
@@ -0,0 +1,235 @@
+"""采集数据流式导出"""
+from __future__ import annotations
+
+import csv
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .samples import format_timestamps
+
+EXPORT_HEADERS = [
+    "时间",
+    "工作模式",
+    "最大电流(A)",
+    "最大功率(W)",
+    "电压(V)",
+    "电流(A)",
+    "功率(W)",
+    "内阻(Ω)",
+]
+
+XLSX_MAX_ROWS = 1_048_575  # 单个 Sheet 的数据行上限（不含表头）
+
+
+class ExportSource(ABC):
+    """导出数据源：按块产出 (时间字符串列表, (n, 4) 数值数组 或 字符串行)"""
+
+    @abstractmethod
+    def total(self) -> int:
+        """进度总量（行数或字节数）"""
+
+    @abstractmethod
+    def iter_chunks(self, chunk_rows: int) -> Iterator[tuple[list[str], list[list[Any]], int]]:
+        """产出 (时间列, 数值列 [v, i, p, r] 的行列表, 本块推进的进度量)"""
+
+
+class ArrayExportSource(ExportSource):
+    """从内存中的数值列导出（保留完整精度）"""
+
+    def __init__(self, columns: np.ndarray):
+        # 拷贝一份快照，导出过程中实时数据继续追加不受影响
+        self._cols = np.array(columns, dtype=np.float64, copy=True)
+
+    def total(self) -> int:
+        return int(self._cols.shape[1])
+
+    def iter_chunks(self, chunk_rows: int) -> Iterator[tuple[list[str], list[list[Any]], int]]:
+        n = self._cols.shape[1]
+        for a in range(0, n, chunk_rows):
+            b = min(n, a + chunk_rows)
+            ts = format_timestamps(self._cols[0, a:b])
+            values = self._cols[1:5, a:b].T.tolist()
+            yield ts, values, b - a
+
+
+class PagedExportSource(ExportSource):
+    """导入数据源（按页读取）及其后实时追加的数据；跳过含无效值的行"""
+
+    def __init__(self, source: Any, tail_columns: np.ndarray):
+        self._source = source
+        self._tail = ArrayExportSource(tail_columns)
+
+    def total(self) -> int:
+        return len(self._source) + self._tail.total()
+
+    def iter_chunks(self, chunk_rows: int) -> Iterator[tuple[list[str], list[list[Any]], int]]:
+        n = len(self._source)
+        for a in range(0, n, chunk_rows):
+            block = self._source.read_rows(a, min(n, a + chunk_rows), use_cache=False)
+            rows = block[np.isfinite(block).all(axis=1)]
+            yield format_timestamps(rows[:, 0]), rows[:, 1:5].tolist(), len(block)
+        yield from self._tail.iter_chunks(chunk_rows)
+
+
+class SessionCsvExportSource(ExportSource):
+    """从录制会话的 data.csv 流式导出，进度以字节计"""
+
+    def __init__(self, data_csv_path: Path):
+        self._path = Path(data_csv_path)
+
+    def total(self) -> int:
+        try:
+            return max(1, os.path.getsize(self._path))
+        except OSError:
+            return 1
+
+    def iter_chunks(self, chunk_rows: int) -> Iterator[tuple[list[str], list[list[Any]], int]]:
+        with open(self._path, "rb") as raw:
+            raw.readline()  # 表头
+            while True:
+                lines = raw.readlines(chunk_rows * 64)
+                if not lines:
+                    break
+                size = sum(len(x) for x in lines)
+                ts: list[str] = []
+                values: list[list[Any]] = []
+                for row in csv.reader(x.decode("utf-8") for x in lines):
+                    if len(row) < 5:
+                        continue
+                    ts.append(row[0])
+                    values.append(_to_numbers(row[1:5]))
+                yield ts, values, size
+
+
+class BinarySessionExportSource(ExportSource):
+    """从二进制会话文件（内存映射）分块导出"""
+
+    def __init__(self, data_path: Path):
+        from .recording_manager import open_binary_recording
+
+        self._records = open_binary_recording(Path(data_path))
+
+    def total(self) -> int:
+        return int(len(self._records))
+
+    def iter_chunks(self, chunk_rows: int) -> Iterator[tuple[list[str], list[list[Any]], int]]:
+        n = len(self._records)
+        for a in range(0, n, chunk_rows):
+            chunk = np.asarray(self._records[a : min(n, a + chunk_rows)])
+            ts = format_timestamps(chunk["t"])
+            values = np.column_stack([chunk["v"], chunk["i"], chunk["p"], chunk["r"]]).tolist()
+            yield ts, values, len(chunk)
+
+
+def _to_numbers(cells: list[str]) -> list[Any]:
+    out: list[Any] = []
+    for c in cells:
+        try:
+            out.append(float(c))
+        except ValueError:
+            out.append(c)
+    return out
+
+
+class ExportCanceled(Exception):
+    pass
+
+
+class ExportWorker(QThread):
+    """后台导出线程：分块写出 CSV / XLSX，支持进度与取消"""
+
+    progress = pyqtSignal(int, int)  # done, total
+    succeeded = pyqtSignal(str)  # 实际写出的文件路径
+    failed = pyqtSignal(str)
+    canceled = pyqtSignal()
+
+    CHUNK_ROWS = 20000
+
+    def __init__(self, file_path: str, fmt: str, meta: dict, source: ExportSource):
+        super().__init__()
+        self._file_path = file_path
+        self._fmt = fmt
+        self._meta = meta
+        self._source = source
+        self._cancel = False
+
+    def cancel(self) -> None:
+        self._cancel = True
+
+    def run(self) -> None:
+        try:
+            if self._fmt == "csv":
+                self._write_csv()
+            else:
+                self._write_xlsx()
+        except ExportCanceled:
+            try:
+                os.remove(self._file_path)
+            except OSError:
+                pass
+            self.canceled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.succeeded.emit(self._file_path)
+
+    def _meta_cells(self) -> tuple[str, Any, Any]:
+        return (
+            str(self._meta.get("mode", "")),
+            self._meta.get("max_current", ""),
+            self._meta.get("max_power", ""),
+        )
+
+    def _chunks(self) -> Iterator[tuple[list[str], list[list[Any]]]]:
+        total = self._source.total()
+        done = 0
+        self.progress.emit(0, total)
+        for ts, values, step in self._source.iter_chunks(self.CHUNK_ROWS):
+            if self._cancel:
+                raise ExportCanceled()
+            yield ts, values
+            done += step
+            self.progress.emit(done, total)
+
+    def _write_csv(self) -> None:
+        mode, max_i, max_p = self._meta_cells()
+        prefix = f"{mode},{max_i},{max_p}"
+        with open(self._file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_HEADERS)
+            for ts, values in self._chunks():
+                # repr(float) 为最短往返表示，不丢失精度
+                f.write(
+                    "".join(
+                        f"{t},{prefix},{v!r},{i!r},{p!r},{r!r}\r\n" for t, (v, i, p, r) in zip(ts, values)
+                    )
+                )
+
+    def _write_xlsx(self) -> None:
+        import openpyxl
+
+        # 只写模式：行数据直接流式写入临时 XML，不在内存中保留单元格对象
+        mode, max_i, max_p = self._meta_cells()
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(title="测量数据_1")
+        ws.append(EXPORT_HEADERS)
+        sheet_rows = 0
+        sheet_idx = 1
+        for ts, values in self._chunks():
+            for t, (v, i, p, r) in zip(ts, values):
+                if sheet_rows >= XLSX_MAX_ROWS:
+                    sheet_idx += 1
+                    ws = wb.create_sheet(title=f"测量数据_{sheet_idx}")
+                    ws.append(EXPORT_HEADERS)
+                    sheet_rows = 0
+                ws.append([t, mode, max_i, max_p, v, i, p, r])
+                sheet_rows += 1
+        if self._cancel:
+            raise ExportCanceled()
+        wb.save(self._file_path)
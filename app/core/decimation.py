@@ -0,0 +1,188 @@
+"""曲线显示用的最小/最大值多分辨率抽取（LOD）"""
+from __future__ import annotations
+
+import numpy as np
+
+from .samples import COL_T, SampleRingBuffer
+
+# 每级块数据的列：块绝对序号、块起始时间、各通道最小值、各通道最大值
+_L_IDX = 0
+_L_T = 1
+
+
+class _Level:
+    def __init__(self, block_size: int, raw_capacity: int, channels: int):
+        self.block_size = block_size
+        self.channels = channels
+        self.buf = SampleRingBuffer(raw_capacity // block_size + 2, columns=2 + 2 * channels)
+        self.next_block = 0  # 下一个待生成块的绝对序号
+
+    def reset(self, next_block: int = 0) -> None:
+        self.buf.clear()
+        self.next_block = next_block
+
+    def lo(self, ch: int) -> np.ndarray:
+        return self.buf.column(2 + ch)
+
+    def hi(self, ch: int) -> np.ndarray:
+        return self.buf.column(2 + self.channels + ch)
+
+
+class MinMaxPyramid:
+    """增量维护的最小/最大值金字塔
+
+    第 k 级把 ``factor**k`` 个原始样本归并为一个块，记录块内每个通道的最小值
+    与最大值。新样本到达时只归并新完成的块（各级均为增量计算）。绘图时根据
+    可见时间范围与像素宽度选取合适的级别，每个块输出 min、max 两个点，
+    总点数约为 2 × 像素宽度，同时保留尖峰。
+    """
+
+    def __init__(self, raw_capacity: int, channels: int = 4, factor: int = 8):
+        self._factor = max(2, int(factor))
+        self._channels = int(channels)
+        self._raw_capacity = int(raw_capacity)
+        self._levels: list[_Level] = []
+        block = self._factor
+        while block <= max(self._factor, self._raw_capacity):
+            self._levels.append(_Level(block, self._raw_capacity, self._channels))
+            block *= self._factor
+
+    @property
+    def raw_capacity(self) -> int:
+        return self._raw_capacity
+
+    def reset(self) -> None:
+        for level in self._levels:
+            level.reset()
+
+    def update(self, raw: SampleRingBuffer) -> None:
+        """把原始缓冲区中新完成的块归并进各级"""
+        if not self._levels:
+            return
+        if raw.total_appended < self._levels[0].next_block * self._levels[0].block_size:
+            # 原始数据被清空后重新开始
+            self.reset()
+
+        self._update_first_level(raw)
+        for k in range(1, len(self._levels)):
+            self._update_level(self._levels[k - 1], self._levels[k])
+
+    def _update_first_level(self, raw: SampleRingBuffer) -> None:
+        level = self._levels[0]
+        size = level.block_size
+        first = raw.first_index
+        if level.next_block * size < first:
+            # 尚未归并的数据已被原始缓冲区淘汰，各级从当前最旧的完整块重新开始
+            start = -(-first // size)
+            for lv in self._levels:
+                lv.reset(start * size // lv.block_size + (1 if (start * size) % lv.block_size else 0))
+        end = raw.total_appended // size
+        if end <= level.next_block:
+            return
+
+        a = level.next_block * size - first
+        b = end * size - first
+        data = raw.view()[:, a:b]
+        nblocks = end - level.next_block
+        shaped = data.reshape(data.shape[0], nblocks, size)
+        rows = np.empty((nblocks, 2 + 2 * self._channels), dtype=np.float64)
+        rows[:, _L_IDX] = np.arange(level.next_block, end, dtype=np.float64)
+        rows[:, _L_T] = shaped[COL_T, :, 0]
+        rows[:, 2 : 2 + self._channels] = shaped[1 : 1 + self._channels].min(axis=2).T
+        rows[:, 2 + self._channels :] = shaped[1 : 1 + self._channels].max(axis=2).T
+        level.buf.extend(rows)
+        level.next_block = end
+
+    def _update_level(self, lower: _Level, level: _Level) -> None:
+        f = self._factor
+        if not len(lower.buf):
+            return
+        idx = lower.buf.column(_L_IDX)
+        first = int(idx[0])
+        if level.next_block * f < first:
+            level.reset(-(-first // f))
+        end = (int(idx[-1]) + 1) // f
+        if end <= level.next_block:
+            return
+
+        a = level.next_block * f - first
+        b = end * f - first
+        data = lower.buf.view()[:, a:b]
+        nblocks = end - level.next_block
+        shaped = data.reshape(data.shape[0], nblocks, f)
+        c = self._channels
+        rows = np.empty((nblocks, 2 + 2 * c), dtype=np.float64)
+        rows[:, _L_IDX] = np.arange(level.next_block, end, dtype=np.float64)
+        rows[:, _L_T] = shaped[_L_T, :, 0]
+        rows[:, 2 : 2 + c] = shaped[2 : 2 + c].min(axis=2).T
+        rows[:, 2 + c :] = shaped[2 + c :].max(axis=2).T
+        level.buf.extend(rows)
+        level.next_block = end
+
+    def select(
+        self, raw: SampleRingBuffer, x0: float, x1: float, width_px: int
+    ) -> tuple[np.ndarray, list[np.ndarray]]:
+        """按可见范围与像素宽度返回待绘制的 (x, [各通道 y])
+
+        可见点数不超过 2 × 像素宽度时直接返回原始数据视图（零拷贝）。
+        """
+        t = raw.column(COL_T)
+        n_raw = len(t)
+        if n_raw == 0:
+            return t, [raw.column(1 + ch) for ch in range(self._channels)]
+
+        i0 = max(0, int(np.searchsorted(t, x0, side="left")) - 1)
+        i1 = min(n_raw, int(np.searchsorted(t, x1, side="right")) + 1)
+        n = i1 - i0
+        width_px = max(1, int(width_px))
+        if n <= 2 * width_px:
+            return t[i0:i1], [raw.column(1 + ch)[i0:i1] for ch in range(self._channels)]
+
+        k = None
+        for idx_level, lv in enumerate(self._levels):
+            if len(lv.buf) and n / lv.block_size <= width_px:
+                k = idx_level
+                break
+        if k is None:
+            k = next((j for j in range(len(self._levels) - 1, -1, -1) if len(self._levels[j].buf)), None)
+        if k is None:
+            return t[i0:i1], [raw.column(1 + ch)[i0:i1] for ch in range(self._channels)]
+
+        first = raw.first_index
+        x_parts: list[np.ndarray] = []
+        y_parts: list[list[np.ndarray]] = [[] for _ in range(self._channels)]
+
+        # 先取选定级别的块；其后尚未凑满该级块的部分逐级用更细的级别补齐，最后接原始样本
+        cursor = first + i0
+        end_abs = first + i1
+        for j in range(k, -1, -1):
+            lv = self._levels[j]
+            size = lv.block_size
+            b0 = cursor // size
+            b1 = min(-(-end_abs // size), lv.next_block)
+            if b1 > b0 and len(lv.buf):
+                idx = lv.buf.column(_L_IDX)
+                r0 = int(np.searchsorted(idx, b0, side="left"))
+                r1 = int(np.searchsorted(idx, b1, side="left"))
+                if r1 > r0:
+                    bt = lv.buf.column(_L_T)[r0:r1]
+                    x_parts.append(np.repeat(bt, 2))
+                    for ch in range(self._channels):
+                        y = np.empty(2 * (r1 - r0), dtype=np.float64)
+                        y[0::2] = lv.lo(ch)[r0:r1]
+                        y[1::2] = lv.hi(ch)[r0:r1]
+                        y_parts[ch].append(y)
+            cursor = max(cursor, lv.next_block * size)
+
+        # 末尾尚未凑满最小块的原始样本直接追加，保证最新数据可见
+        tail_start = max(i0, cursor - first)
+        if tail_start < i1:
+            x_parts.append(t[tail_start:i1])
+            for ch in range(self._channels):
+                y_parts[ch].append(raw.column(1 + ch)[tail_start:i1])
+
+        if not x_parts:
+            return t[i0:i1], [raw.column(1 + ch)[i0:i1] for ch in range(self._channels)]
+        x = np.concatenate(x_parts)
+        ys = [np.concatenate(parts) for parts in y_parts]
+        return x, ys
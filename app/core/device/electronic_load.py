@@ -1,14 +1,252 @@
 """电子负载设备业务层"""
 from __future__ import annotations
 
+import math
+from typing import Any
+
+from ..exceptions import SCPIError, TimeoutError
 from ..scpi import SCPIClient
 
 
+def _parse_flag(resp: str) -> bool:
+    return resp.strip() == "1"
+
+
+def _scpi_arg(value: Any) -> str:
+    return ("ON" if value else "OFF") if isinstance(value, bool) else str(value)
+
+
+def _is_timeout(error: BaseException | None) -> bool:
+    """异常链中是否有传输层超时（应答可能只是迟到，不能据此判断设备不支持）"""
+    while error is not None:
+        if isinstance(error, TimeoutError):
+            return True
+        error = error.__cause__
+    return False
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-9)
+    return a == b
+
+
 class ElectronicLoad:
-    """电子负载设备封装，提供高级业务方法"""
+    """电子负载设备封装，提供高级业务方法
+
+    影子状态：设置命令成功写出后记录设定值，模式、设定值、保护、Von/Voff、
+    量程、速率等查询直接由本地应答，不再访问设备。复位、切换模式、回到本地
+    模式时全部作废；终端原始命令由 DeviceManager 作废；重新连接会创建新实例。
+    输入开关与测量值可能由设备自行改变（保护、Voff 卸载），始终实时查询。
+    设备对设定值的截断不会反映在影子状态中，需要时用 ``verify_shadow`` 读回。
+    """
+
+    MEASURE_ALL_COMMANDS = ["MEAS:VOLT?", "MEAS:CURR?", "MEAS:POW?", "MEAS:RES?"]
+    BATTERY_MODES = {"CC": "CURR", "CR": "RES", "CP": "POW"}  # 电池放电方式 -> 工作模式
+
+    # 可缓存查询的应答解析，未列出的按浮点数解析
+    _SHADOW_PARSERS = {"MODE": str.strip, "SYST:BEEP:STAT": _parse_flag, "SYST:SENS": _parse_flag}
 
-    def __init__(self, scpi: SCPIClient):
+    def __init__(self, scpi: SCPIClient, shadow: bool = True):
         self._scpi = scpi
+        self._compound_measure: bool | None = None  # None 表示尚未探测设备是否支持复合命令
+        self._shadow_enabled = shadow
+        self._shadow: dict[str, Any] = {}
+        self._shadow_gen = 0  # 每次改写/作废递增，查询回填前据此判断是否已过期
+        self._shadow_hits = 0
+        self._shadow_misses = 0
+        self._mode_aliases: dict[str, str] = {}  # 写入的模式名 -> 设备应答的模式名
+
+    @property
+    def scpi(self) -> SCPIClient:
+        """底层 SCPI 客户端"""
+        return self._scpi
+
+    # ========== 影子状态 ==========
+
+    @property
+    def shadow_enabled(self) -> bool:
+        """是否用影子状态应答可缓存的查询"""
+        return self._shadow_enabled
+
+    @shadow_enabled.setter
+    def shadow_enabled(self, enabled: bool) -> None:
+        self._shadow_enabled = bool(enabled)
+        if not enabled:
+            self.invalidate_shadow()
+
+    def invalidate_shadow(self, headers: list[str] | None = None) -> None:
+        """作废影子状态（headers 为 None 时全部作废），之后的查询重新读取设备"""
+        self._shadow_gen += 1
+        if headers is None:
+            self._shadow.clear()
+            return
+        for h in headers:
+            self._shadow.pop(h, None)
+
+    def shadow_state(self) -> dict[str, Any]:
+        """当前影子状态副本 {SCPI 命令头: 值}"""
+        return dict(self._shadow)
+
+    def shadow_stats(self) -> dict[str, int]:
+        """影子状态统计：条目数、命中（省去的查询）与未命中次数"""
+        return {"entries": len(self._shadow), "hits": self._shadow_hits, "misses": self._shadow_misses}
+
+    def verify_shadow(self, headers: list[str] | None = None) -> dict[str, tuple[Any, Any]]:
+        """批量读回设备状态并刷新影子状态
+
+        headers 为 None 时读回全部已缓存项；也可传入尚未缓存的命令头作为批量预取。
+        设备支持复合命令时一行读完，否则流水线发送，均只需一次往返。
+
+        Returns:
+            与缓存不一致的项 {命令头: (缓存值, 设备值)}，例如设备对设定值做了截断
+        """
+        keys = list(self._shadow) if headers is None else list(headers)
+        if not keys:
+            return {}
+        gen = self._shadow_gen
+        resp = self._scpi.query_many(
+            [f"{h}?" for h in keys],
+            compound=self._compound_measure is True,
+            pipelined=self._compound_measure is not True,
+        )
+        mismatches: dict[str, tuple[Any, Any]] = {}
+        for h, text in zip(keys, resp):
+            actual = self._SHADOW_PARSERS.get(h, float)(text)
+            cached = self._shadow.get(h)
+            if cached is not None and not _same_value(cached, actual):
+                mismatches[h] = (cached, actual)
+            if self._shadow_enabled and gen == self._shadow_gen:
+                self._shadow[h] = actual
+        return mismatches
+
+    def _set(self, header: str, value: Any) -> None:
+        """发送设置命令并记录设定值；值不是数值/布尔（如 MAX、MIN）或发送失败时该项作废"""
+        self._shadow_gen += 1
+        self._shadow.pop(header, None)
+        self._scpi.send(f"{header} {_scpi_arg(value)}")
+        self._record(header, value)
+
+    def _record(self, header: str, value: Any) -> None:
+        if not self._shadow_enabled:
+            return
+        try:
+            self._shadow[header] = value if isinstance(value, bool) else float(value)
+        except (TypeError, ValueError):
+            self._shadow.pop(header, None)
+
+    def _unchanged(self, header: str, value: Any) -> bool:
+        """设定值与影子状态一致（写入可省略）"""
+        if not self._shadow_enabled or header not in self._shadow:
+            return False
+        cached = self._shadow[header]
+        try:
+            wanted = value if isinstance(value, bool) else float(value)
+        except (TypeError, ValueError):
+            return False
+        return _same_value(cached, wanted)
+
+    def _get(self, header: str) -> Any:
+        """可缓存的查询：命中影子状态时不访问设备"""
+        if self._shadow_enabled and header in self._shadow:
+            self._shadow_hits += 1
+            return self._shadow[header]
+        self._shadow_misses += 1
+        gen = self._shadow_gen
+        value = self._SHADOW_PARSERS.get(header, float)(self._scpi.query(f"{header}?"))
+        # 查询期间其他线程改写过设定值时不回填，避免用旧值覆盖
+        if self._shadow_enabled and gen == self._shadow_gen:
+            self._shadow[header] = value
+        return value
+
+    def apply_settings(self, settings: dict[str, Any], mode: str | None = None) -> dict[str, Any]:
+        """参数事务：一次往返下发一组设定值
+
+        与影子状态比对，去掉设备已是该值的写入；其余写入（及需要切换的模式）
+        拼成一条 ``;:`` 复合命令，末尾附带最后一个参数的查询作为整行执行完毕的
+        确认，读回值（可能被设备截断）直接记入影子状态。切换模式时同一行还读回
+        ``MODE?``，之后同模式的事务可以继续比对。设备不支持复合命令时回退为
+        逐条写入后再查询。
+
+        Args:
+            settings: {SCPI 命令头: 值}，按顺序写入，例如 {"CURR": 1.5, "CURR:PROT": 5}
+            mode: 需要时先切换的工作模式；切换模式会使影子状态作废，此时不做比对
+
+        Returns:
+            实际写出的 {命令头: 值}；全部无变化时为空，不访问设备
+        """
+        mode_changed = mode is not None and not self._mode_is(mode)
+        writes = {h: v for h, v in settings.items() if mode_changed or not self._unchanged(h, v)}
+        if not writes and not mode_changed:
+            return {}
+
+        commands = [f"MODE {mode}"] if mode_changed else []
+        commands += [f"{h} {_scpi_arg(v)}" for h, v in writes.items()]
+        checks = ([list(writes)[-1]] if writes else []) + (["MODE"] if mode_changed else [])
+        if mode_changed:
+            self.invalidate_shadow()
+        else:
+            self.invalidate_shadow(list(writes))
+
+        gen = self._shadow_gen
+        try:
+            actual = self._write_and_check(commands, checks)
+        except (SCPIError, ValueError) as e:
+            # 迟到的应答会被之后的查询读走，所有失败路径都先重新同步
+            self._scpi.clear_input(late_replies=_is_timeout(e))
+            raise
+
+        if gen == self._shadow_gen:
+            for h, v in writes.items():
+                self._record(h, v)
+            if self._shadow_enabled:
+                self._shadow.update(zip(checks, actual))
+        if mode_changed:
+            # 设备应答的模式名可能与写入的不同（如写 CURR 读回 CC），记住两者的对应
+            self._mode_aliases[mode] = actual[-1]
+        return writes
+
+    def _write_and_check(self, commands: list[str], checks: list[str]) -> list[Any]:
+        """写出 commands 并读回 checks 各项；优先拼成一条复合命令"""
+        if self._compound_measure is not False:
+            try:
+                resp = self._scpi.query(";:".join(commands + [f"{h}?" for h in checks]))
+                replies = [x.strip() for x in resp.split(";")]
+                if len(replies) != len(checks):
+                    raise SCPIError(f"复合命令应答数量不符：期望 {len(checks)}，实际 {len(replies)}")
+                actual = [self._SHADOW_PARSERS.get(h, float)(x) for h, x in zip(checks, replies)]
+                self._compound_measure = True
+                return actual
+            except (SCPIError, ValueError) as e:
+                if self._compound_measure or not self._compound_unsupported(e):
+                    raise
+                # 设备不支持复合命令：丢弃残留应答后逐条重发（设定值写入可重复执行）
+                self._compound_measure = False
+                self._scpi.clear_input()
+        for command in commands:
+            self._scpi.send(command)
+        return [self._SHADOW_PARSERS.get(h, float)(self._scpi.query(f"{h}?")) for h in checks]
+
+    def _compound_unsupported(self, error: BaseException) -> bool:
+        """首次复合命令失败后判断设备是否不支持复合命令
+
+        应答数量不符或无法解析说明不支持。超时可能只是偶发：先等待并丢弃迟到
+        的应答，再以 ``SYST:ERR?`` 确认，设备报告命令错误（-1xx）才算不支持；
+        确认失败时保持未探测状态，下次继续尝试复合命令。
+        """
+        if not _is_timeout(error):
+            return True
+        self._scpi.clear_input(late_replies=True)
+        try:
+            code = int(self._scpi.query("SYST:ERR?").split(",", 1)[0])
+        except (SCPIError, ValueError):
+            return False
+        return -200 < code <= -100
+
+    def _mode_is(self, mode: str) -> bool:
+        """影子状态中的当前模式是否就是 mode"""
+        cached = self._shadow.get("MODE")
+        return cached is not None and cached in (mode, self._mode_aliases.get(mode))
 
     # ========== 系统命令 ==========
 
@@ -17,8 +255,10 @@ class ElectronicLoad:
         return self._scpi.query("*IDN?")
 
     def reset(self) -> None:
-        """复位设备 (*RST)"""
+        """复位设备 (*RST)，影子状态全部作废"""
+        self.invalidate_shadow()
         self._scpi.send("*RST")
+        self.invalidate_shadow()
 
     def clear_status(self) -> None:
         """清除状态 (*CLS)"""
@@ -29,8 +269,12 @@ class ElectronicLoad:
         self._scpi.send("SYST:REM")
 
     def set_local(self) -> None:
-        """进入本地模式 (SYST:LOC)"""
+        """进入本地模式 (SYST:LOC)
+
+        本地模式下面板操作可能改写设定值，影子状态全部作废。
+        """
         self._scpi.send("SYST:LOC")
+        self.invalidate_shadow()
 
     def set_rwlock(self) -> None:
         """进入远程锁定模式 (SYST:RWL)"""
@@ -38,139 +282,140 @@ class ElectronicLoad:
 
     def set_beeper(self, enabled: bool) -> None:
         """设置蜂鸣器 (SYST:BEEP:STAT)"""
-        self._scpi.send(f"SYST:BEEP:STAT {'ON' if enabled else 'OFF'}")
+        self._set("SYST:BEEP:STAT", bool(enabled))
 
     def get_beeper(self) -> bool:
         """查询蜂鸣器状态"""
-        resp = self._scpi.query("SYST:BEEP:STAT?")
-        return resp.strip() == "1"
+        return self._get("SYST:BEEP:STAT")
 
     def set_sense(self, enabled: bool) -> None:
         """设置远端补偿 (SYST:SENS)"""
-        self._scpi.send(f"SYST:SENS {'ON' if enabled else 'OFF'}")
+        self._set("SYST:SENS", bool(enabled))
 
     def get_sense(self) -> bool:
         """查询远端补偿状态"""
-        resp = self._scpi.query("SYST:SENS?")
-        return resp.strip() == "1"
+        return self._get("SYST:SENS")
 
     # ========== 模式控制 ==========
 
     def set_mode(self, mode: str) -> None:
         """设置工作模式 (MODE)
-        
+
+        切换模式后设定值可能随模式变化，影子状态全部作废；同一行读回设备的
+        模式作为新的影子状态（已是该模式时不访问设备）。
+
         Args:
             mode: 'CURR'(CC), 'VOLT'(CV), 'POW'(CP), 'RES'(CR)
         """
-        self._scpi.send(f"MODE {mode}")
+        self.apply_settings({}, mode=mode)
 
     def get_mode(self) -> str:
         """查询当前工作模式"""
-        return self._scpi.query("MODE?").strip()
+        return self._get("MODE")
 
     # ========== 参数设定 ==========
 
     def set_current(self, value: float) -> None:
         """设置电流 (CURR)"""
-        self._scpi.send(f"CURR {value}")
+        self._set("CURR", value)
 
     def get_current(self) -> float:
         """查询电流设定值"""
-        return float(self._scpi.query("CURR?"))
+        return self._get("CURR")
 
     def set_voltage(self, value: float) -> None:
         """设置电压 (VOLT)"""
-        self._scpi.send(f"VOLT {value}")
+        self._set("VOLT", value)
 
     def get_voltage(self) -> float:
         """查询电压设定值"""
-        return float(self._scpi.query("VOLT?"))
+        return self._get("VOLT")
 
     def set_power(self, value: float) -> None:
         """设置功率 (POW)"""
-        self._scpi.send(f"POW {value}")
+        self._set("POW", value)
 
     def get_power(self) -> float:
         """查询功率设定值"""
-        return float(self._scpi.query("POW?"))
+        return self._get("POW")
 
     def set_resistance(self, value: float) -> None:
         """设置电阻 (RES)"""
-        self._scpi.send(f"RES {value}")
+        self._set("RES", value)
 
     def get_resistance(self) -> float:
         """查询电阻设定值"""
-        return float(self._scpi.query("RES?"))
+        return self._get("RES")
 
     # ========== 保护设置 ==========
 
     def set_current_protection(self, value: float) -> None:
         """设置过流保护 (CURR:PROT)"""
-        self._scpi.send(f"CURR:PROT {value}")
+        self._set("CURR:PROT", value)
 
     def get_current_protection(self) -> float:
         """查询过流保护值"""
-        return float(self._scpi.query("CURR:PROT?"))
+        return self._get("CURR:PROT")
 
     def set_power_protection(self, value: float) -> None:
         """设置过功率保护 (POW:PROT)"""
-        self._scpi.send(f"POW:PROT {value}")
+        self._set("POW:PROT", value)
 
     def get_power_protection(self) -> float:
         """查询过功率保护值"""
-        return float(self._scpi.query("POW:PROT?"))
+        return self._get("POW:PROT")
 
     def set_voltage_on(self, value: float) -> None:
         """设置 Von (VOLT:ON)"""
-        self._scpi.send(f"VOLT:ON {value}")
+        self._set("VOLT:ON", value)
 
     def get_voltage_on(self) -> float:
         """查询 Von"""
-        return float(self._scpi.query("VOLT:ON?"))
+        return self._get("VOLT:ON")
 
     def set_voltage_off(self, value: float) -> None:
         """设置 Voff (VOLT:OFF)"""
-        self._scpi.send(f"VOLT:OFF {value}")
+        self._set("VOLT:OFF", value)
 
     def get_voltage_off(self) -> float:
         """查询 Voff"""
-        return float(self._scpi.query("VOLT:OFF?"))
+        return self._get("VOLT:OFF")
 
     # ========== 量程设置 ==========
 
     def set_current_range(self, value: float | str) -> None:
         """设置电流档位 (CURR:RANG)"""
-        self._scpi.send(f"CURR:RANG {value}")
+        self._set("CURR:RANG", value)
 
     def get_current_range(self) -> float:
         """查询电流档位"""
-        return float(self._scpi.query("CURR:RANG?"))
+        return self._get("CURR:RANG")
 
     def set_voltage_range(self, value: float | str) -> None:
         """设置电压档位 (VOLT:RANG)"""
-        self._scpi.send(f"VOLT:RANG {value}")
+        self._set("VOLT:RANG", value)
 
     def get_voltage_range(self) -> float:
         """查询电压档位"""
-        return float(self._scpi.query("VOLT:RANG?"))
+        return self._get("VOLT:RANG")
 
     # ========== 速率设置 ==========
 
     def set_current_slew(self, value: float) -> None:
         """设置电流上升率及下降率 (CURR:SLEW)"""
-        self._scpi.send(f"CURR:SLEW {value}")
+        self._set("CURR:SLEW", value)
 
     def get_current_slew(self) -> float:
         """查询电流速率"""
-        return float(self._scpi.query("CURR:SLEW?"))
+        return self._get("CURR:SLEW")
 
     def set_voltage_slew(self, value: float) -> None:
         """设置电压上升率及下降率 (VOLT:SLEW)"""
-        self._scpi.send(f"VOLT:SLEW {value}")
+        self._set("VOLT:SLEW", value)
 
     def get_voltage_slew(self) -> float:
         """查询电压速率"""
-        return float(self._scpi.query("VOLT:SLEW?"))
+        return self._get("VOLT:SLEW")
 
     # ========== 测量命令 ==========
 
@@ -190,6 +435,42 @@ class ElectronicLoad:
         """测量等效阻抗 (MEAS:RES?)"""
         return float(self._scpi.query("MEAS:RES?"))
 
+    def measure_all(self) -> tuple[float, float, float, float]:
+        """一次读取电压/电流/功率/内阻 (V, I, P, R)
+
+        优先使用一条复合命令完成四项查询（一次往返），设备不支持复合命令时
+        自动回退为逐条查询，之后不再尝试复合模式。偶发超时不作为不支持的
+        依据，下次继续探测。任何失败后都会重新同步（超时后还会等待并丢弃迟到的
+        应答），之后的测量不会错位。
+        """
+        try:
+            if self._compound_measure is not False:
+                try:
+                    resp = self._scpi.query_many(self.MEASURE_ALL_COMMANDS, compound=True)
+                    v, i, p, r = (float(x) for x in resp)
+                    self._compound_measure = True
+                    return v, i, p, r
+                except (SCPIError, ValueError) as e:
+                    if self._compound_measure or not self._compound_unsupported(e):
+                        # 曾经成功过或只是偶发超时：不是不支持，保留复合模式
+                        raise
+                    self._compound_measure = False
+                    self._scpi.clear_input()
+
+            resp = self._scpi.query_many(self.MEASURE_ALL_COMMANDS, compound=False)
+            v, i, p, r = (float(x) for x in resp)
+            return v, i, p, r
+        except (SCPIError, ValueError) as e:
+            self._scpi.clear_input(late_replies=_is_timeout(e))
+            raise
+
+    @property
+    def measure_mode(self) -> str:
+        """批量测量方式：'compound'（复合命令）/'sequential'（逐条）/'unknown'（尚未探测）"""
+        if self._compound_measure is None:
+            return "unknown"
+        return "compound" if self._compound_measure else "sequential"
+
     def measure_voltage_max(self) -> float:
         """测量电压峰值 (MEAS:VOLT:MAX?)"""
         return float(self._scpi.query("MEAS:VOLT:MAX?"))
@@ -223,3 +504,36 @@ class ElectronicLoad:
         注：进入短路界面后，配合 INPUT ON/OFF 开始/停止短路测试。
         """
         self._scpi.send(f"INPUT:SHORT {'ON' if enabled else 'OFF'}")
+
+    # ========== 电池放电 ==========
+
+    def start_battery_discharge(self, mode: str, value: float, cutoff_v: float | None = None) -> float | None:
+        """开始电池放电（CC/CR/CP），截止电压由设备端执行
+
+        指令集中没有独立的电池测试命令，这里借助卸载电压 Voff (VOLT:OFF)：
+        电池电压低于 Voff 时设备自行卸载，关断不经过上位机轮询。截止时间、
+        截止容量仍由上位机判断。
+
+        Returns:
+            设置前的 Voff，结束放电时传给 ``stop_battery_discharge`` 恢复；
+            未设置截止电压时为 None
+        """
+        scpi_mode = self.BATTERY_MODES.get(mode.upper())
+        if scpi_mode is None:
+            raise ValueError(f"不支持的放电模式: {mode}")
+
+        settings: dict[str, Any] = {}
+        prev_voff: float | None = None
+        if cutoff_v is not None:
+            prev_voff = self.get_voltage_off()
+            settings["VOLT:OFF"] = cutoff_v
+        settings[scpi_mode] = value
+        self.apply_settings(settings, mode=scpi_mode)
+        self.set_input(True)
+        return prev_voff
+
+    def stop_battery_discharge(self, restore_voff: float | None = None) -> None:
+        """结束电池放电：关闭输入，并恢复放电前的 Voff"""
+        self.set_input(False)
+        if restore_voff is not None:
+            self.set_voltage_off(restore_voff)
@@ -1,58 +1,165 @@
 """设备管理器，协调 UI 和设备通信"""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from queue import Queue
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from queue import Empty, PriorityQueue, Queue
 from typing import Any, Callable
 from uuid import uuid4
 
 from PyQt6.QtCore import QObject, QThread, pyqtSignal
 
+from .battery_test import BatteryTestEngine
 from .device import ElectronicLoad
 from .exceptions import ConnectionError, SCPIError, TransportError
-from .scpi import SCPIClient
+from .samples import SampleBlockBuffer
+from .scheduler import FixedRateScheduler
+from .scpi import CommandPriority, SCPIClient
 from .transport import SerialTransport, TcpTransport, Transport
 
 
 class MeasurementWorker(QThread):
-    """测量轮询工作线程"""
+    """测量轮询工作线程，按固定速率采样，按帧率批量投递"""
 
-    measurement_ready = pyqtSignal(float, float, float, float)  # v, i, p, r
+    block_ready = pyqtSignal(object)  # np.ndarray, shape (n, 5)，列见 SAMPLE_COLUMNS
+    stats_updated = pyqtSignal(dict)  # 实际采样率、测量方式及调度抖动/超时统计
     error_occurred = pyqtSignal(str)
+    battery_progress = pyqtSignal(dict)  # BatteryTestEngine.snapshot()
+    battery_finished = pyqtSignal(dict)  # 截止后的最终状态
+
+    STATS_INTERVAL_S = 1.0
+    FLUSH_HZ = 30.0
 
     def __init__(self, device: ElectronicLoad, interval_ms: int = 200):
         super().__init__()
         self._device = device
-        self._interval_ms = interval_ms
-        self._running = False
+        self._scheduler = FixedRateScheduler(interval_ms / 1000.0)
+        self._stop_event = threading.Event()
+        self._pending = SampleBlockBuffer()
+        self._battery: BatteryTestEngine | None = None
+
+    def set_battery_engine(self, engine: BatteryTestEngine | None) -> None:
+        """挂接电池测试引擎：每个采样在本线程内积分并判断截止"""
+        self._battery = engine
+
+    def _feed_battery(self, t: float, v: float, i: float, p: float) -> None:
+        engine = self._battery
+        if engine is None:
+            return
+        reason = engine.feed(t, v, i, p)
+        if reason is None:
+            return
+        self._battery = None
+        # 截止关断直接在测量线程中发出，走安全通道，不等待 GUI 线程
+        scpi = self._device.scpi
+        scpi.set_thread_priority(CommandPriority.SAFETY)
+        try:
+            engine.stop(self._device, reason)
+        except Exception as e:
+            self.error_occurred.emit(f"电池测试截止关断失败: {e}")
+        finally:
+            scpi.set_thread_priority(CommandPriority.BULK)
+        self.battery_finished.emit(engine.snapshot())
+
+    def set_interval_ms(self, interval_ms: int) -> None:
+        """修改采样周期（下一个节拍起生效）"""
+        self._scheduler.set_interval(interval_ms / 1000.0)
 
     def run(self) -> None:
         """线程主循环"""
-        self._running = True
-        while self._running:
+        self._stop_event.clear()
+        # 周期测量走 BULK 通道：锁释放时让位于排队中的控制/安全命令
+        self._device.scpi.set_thread_priority(CommandPriority.BULK)
+        # 以单调时钟为基准换算墙上时间，避免系统校时导致时间戳跳变
+        wall_anchor = time.time()
+        mono_anchor = time.monotonic()
+        window_start = mono_anchor
+        window_samples = 0
+        flush_period = 1.0 / self.FLUSH_HZ
+        last_flush = mono_anchor
+        while self._scheduler.wait_next(self._stop_event):
             try:
-                v = self._device.measure_voltage()
-                i = self._device.measure_current()
-                p = self._device.measure_power()
-                r = self._device.measure_resistance()
-                self.measurement_ready.emit(v, i, p, r)
+                t0 = time.monotonic()
+                v, i, p, r = self._device.measure_all()
+                t1 = time.monotonic()
+                # 设备不回传采样时刻，取本次查询往返的中点作为采集时间
+                t = wall_anchor + ((t0 + t1) / 2.0 - mono_anchor)
+                self._pending.append(t, v, i, p, r)
+                window_samples += 1
+                self._feed_battery((t0 + t1) / 2.0, v, i, p)
             except Exception as e:
                 self.error_occurred.emit(f"测量失败: {e}")
 
-            self.msleep(self._interval_ms)
+            now = time.monotonic()
+            if self._pending and (now - last_flush >= flush_period or self._pending.is_full()):
+                self.block_ready.emit(self._pending.take())
+                last_flush = now
+                engine = self._battery
+                if engine is not None:
+                    self.battery_progress.emit(engine.snapshot())
+
+            if now - window_start >= self.STATS_INTERVAL_S:
+                stats = self._scheduler.take_stats()
+                stats["rate"] = window_samples / (now - window_start)
+                stats["mode"] = self._device.measure_mode
+                self.stats_updated.emit(stats)
+                window_start = now
+                window_samples = 0
+
+        if self._pending:
+            self.block_ready.emit(self._pending.take())
 
     def stop(self) -> None:
         """停止线程"""
-        self._running = False
+        self._stop_event.set()
+
+
+_STOP_PRIORITY = len(CommandPriority)  # 停止标记排在所有已入队命令之后
+_command_seq = itertools.count()
+_claim_lock = threading.Lock()
 
 
-@dataclass(frozen=True)
+@dataclass(order=True)
 class _Command:
-    request_id: str
-    func: Callable[[], Any]
+    priority: int
+    seq: int
+    request_id: str = field(compare=False)
+    func: Callable[[], Any] = field(compare=False)
+    coalesce_key: str | None = field(default=None, compare=False)
+    started: bool = field(default=False, compare=False)
+    superseded: bool = field(default=False, compare=False)
+    canceled: bool = field(default=False, compare=False)
+
+    def claim(self) -> bool:
+        """命令线程执行前调用；已被取代或取消时返回 False，不再执行"""
+        with _claim_lock:
+            if self.superseded or self.canceled:
+                return False
+            self.started = True
+            return True
+
+    def supersede(self) -> bool:
+        """由同键的新命令取代；已开始执行或已被取消时返回 False"""
+        with _claim_lock:
+            if self.started or self.superseded or self.canceled:
+                return False
+            self.superseded = True
+            return True
+
+    def cancel(self) -> bool:
+        """从队列中取消；已开始执行或已被取代时返回 False"""
+        with _claim_lock:
+            if self.started or self.superseded:
+                return False
+            self.canceled = True
+            return True
 
 
 class _CommandWorker(QThread):
+    """命令执行线程：按 (优先级, 入队顺序) 依次执行队列中的命令"""
+
     result_ready = pyqtSignal(str, object)
     error_occurred = pyqtSignal(str, str)
 
@@ -67,6 +174,8 @@ class _CommandWorker(QThread):
             cmd = self._queue.get()
             if cmd.request_id == "__STOP__":
                 break
+            if not cmd.claim():
+                continue
             try:
                 res = cmd.func()
                 self.result_ready.emit(cmd.request_id, res)
@@ -76,21 +185,35 @@ class _CommandWorker(QThread):
     def stop(self) -> None:
         self._running = False
         try:
-            self._queue.put_nowait(_Command("__STOP__", lambda: None))
+            self._queue.put_nowait(_Command(_STOP_PRIORITY, next(_command_seq), "__STOP__", lambda: None))
         except Exception:
             pass
 
 
 class DeviceManager(QObject):
-    """设备管理器，负责连接、断开、测量轮询"""
+    """设备管理器，负责连接、断开、测量轮询
+
+    命令分三个优先级通道（见 ``CommandPriority``）：CONTROL/BULK 进入同一个
+    优先级队列，由命令线程按优先级执行；SAFETY 命令由独立的安全线程执行，
+    不会排在正在执行的命令之后，并通过 ``SCPIClient.send_urgent`` 绕过事务锁
+    直接写出。
+
+    带合并键（coalesce_key）的命令后写者胜：同键命令尚未开始执行时被新命令
+    取代，不再执行，并发出 ``command_superseded``。用于拖动数值、脚本连续改
+    设定值等场景，避免过时的写入堆积在队列中。
+    """
 
     connected = pyqtSignal(str)  # 连接成功，参数为 IDN
     disconnected = pyqtSignal()
     error_occurred = pyqtSignal(str)
-    measurement_ready = pyqtSignal(float, float, float, float)  # v, i, p, r
+    measurement_block = pyqtSignal(object)  # np.ndarray (n, 5): t, v, i, p, r
+    measurement_stats = pyqtSignal(dict)  # 采样统计，见 MeasurementWorker.stats_updated
     comm_log = pyqtSignal(str, str)  # direction, message
     command_result = pyqtSignal(str, object)  # request_id, result
     command_error = pyqtSignal(str, str)  # request_id, error
+    command_superseded = pyqtSignal(str, str)  # 被取代的 request_id, 取代它的 request_id
+    battery_progress = pyqtSignal(dict)  # 电池测试进度，见 BatteryTestEngine.snapshot
+    battery_finished = pyqtSignal(dict)  # 电池测试因截止条件在测量线程中结束
 
     def __init__(self):
         super().__init__()
@@ -98,16 +221,33 @@ class DeviceManager(QObject):
         self._scpi: SCPIClient | None = None
         self._device: ElectronicLoad | None = None
         self._measurement_worker: MeasurementWorker | None = None
+        self._sample_interval_ms = 200
+        self._battery_engine: BatteryTestEngine | None = None
 
         self._pending_connect_ids: set[str] = set()
         self._pending_disconnect_ids: set[str] = set()
 
-        self._cmd_queue: Queue[_Command] = Queue()
+        self._estop_last_ms: float | None = None
+        self._estop_max_ms = 0.0
+        self._estop_count = 0
+
+        self._coalesce_lock = threading.Lock()
+        self._coalesce_pending: dict[str, _Command] = {}
+        self._coalesce_keyed = 0
+        self._coalesce_superseded = 0
+
+        self._cmd_queue: PriorityQueue[_Command] = PriorityQueue()
         self._cmd_worker = _CommandWorker(self._cmd_queue)
         self._cmd_worker.result_ready.connect(self._on_command_result)
         self._cmd_worker.error_occurred.connect(self._on_command_error)
         self._cmd_worker.start()
 
+        self._safety_queue: Queue[_Command] = Queue()
+        self._safety_worker = _CommandWorker(self._safety_queue)
+        self._safety_worker.result_ready.connect(self._on_command_result)
+        self._safety_worker.error_occurred.connect(self._on_command_error)
+        self._safety_worker.start()
+
     def connect_serial_async(self, port: str, baudrate: int = 115200) -> str:
         """异步连接串口设备（不阻塞 UI）"""
         req = self._enqueue(lambda: self._connect_serial_impl(port, baudrate))
@@ -170,45 +310,228 @@ class DeviceManager(QObject):
         self._transport = None
         self._scpi = None
         self._device = None
-
-    def _enqueue(self, func: Callable[[], Any]) -> str:
+        self._battery_engine = None
+
+    def _enqueue(
+        self,
+        func: Callable[[], Any],
+        priority: CommandPriority = CommandPriority.CONTROL,
+        coalesce_key: str | None = None,
+    ) -> str:
         request_id = uuid4().hex
-        self._cmd_queue.put(_Command(request_id, func))
+
+        def _job() -> Any:
+            self._release_coalesce_key(cmd)
+            scpi = self._scpi
+            if scpi is not None:
+                scpi.set_thread_priority(priority)
+            return func()
+
+        cmd = _Command(int(priority), next(_command_seq), request_id, _job, coalesce_key)
+        if priority == CommandPriority.SAFETY:
+            self._safety_queue.put(cmd)
+            return request_id
+
+        superseded: _Command | None = None
+        if coalesce_key is not None:
+            with self._coalesce_lock:
+                self._coalesce_keyed += 1
+                prev = self._coalesce_pending.get(coalesce_key)
+                if prev is not None and prev.supersede():
+                    superseded = prev
+                    self._coalesce_superseded += 1
+                self._coalesce_pending[coalesce_key] = cmd
+        self._cmd_queue.put(cmd)
+        if superseded is not None:
+            self.command_superseded.emit(superseded.request_id, request_id)
         return request_id
 
+    def _release_coalesce_key(self, cmd: _Command) -> None:
+        """命令开始执行或被取消后不再可被取代：若合并键仍指向它则移除"""
+        if cmd.coalesce_key is None:
+            return
+        with self._coalesce_lock:
+            if self._coalesce_pending.get(cmd.coalesce_key) is cmd:
+                del self._coalesce_pending[cmd.coalesce_key]
+
+    def coalescing_stats(self) -> dict[str, Any]:
+        """合并统计：带合并键的请求数、被取代（省去执行）的请求数及比例、当前排队数"""
+        with self._coalesce_lock:
+            keyed, superseded = self._coalesce_keyed, self._coalesce_superseded
+        return {
+            "keyed": keyed,
+            "superseded": superseded,
+            "ratio": superseded / keyed if keyed else 0.0,
+            "queued": self._cmd_queue.qsize(),
+        }
+
+    def _cancel_queued(self, reason: str) -> None:
+        """取消尚在排队的控制/遥测命令（连接、断开请求保留）"""
+        keep: list[_Command] = []
+        canceled: list[str] = []
+        while True:
+            try:
+                cmd = self._cmd_queue.get_nowait()
+            except Empty:
+                break
+            rid = cmd.request_id
+            if rid.startswith("__") or rid in self._pending_connect_ids or rid in self._pending_disconnect_ids:
+                keep.append(cmd)
+            elif cmd.cancel():
+                # 已取消的命令不能再被同键的新命令"取代"
+                self._release_coalesce_key(cmd)
+                canceled.append(rid)
+        for cmd in keep:
+            self._cmd_queue.put(cmd)
+        for rid in canceled:
+            self._on_command_error(rid, reason)
+
     def send_async(self, command: str) -> str:
         return self._enqueue(lambda: self._send_impl(command))
 
     def query_async(self, command: str) -> str:
         return self._enqueue(lambda: self._query_impl(command))
 
-    def run_device_call_async(self, func: Callable[[ElectronicLoad], Any]) -> str:
-        return self._enqueue(lambda: func(self._require_device()))
+    def run_device_call_async(
+        self,
+        func: Callable[[ElectronicLoad], Any],
+        priority: CommandPriority = CommandPriority.CONTROL,
+        coalesce_key: str | None = None,
+    ) -> str:
+        """在命令线程中执行设备操作；coalesce_key 相同且尚未执行的请求会被本次取代"""
+        return self._enqueue(lambda: func(self._require_device()), priority, coalesce_key)
+
+    def apply_settings_async(self, settings: dict[str, Any], mode: str | None = None) -> str:
+        """以参数事务下发一组设定值（见 ``ElectronicLoad.apply_settings``）
+
+        合并键由模式与命令头集合组成：同一组参数连续更新时只执行最后一次。
+        """
+        key = "settings:" + (f"MODE {mode}|" if mode else "") + ",".join(sorted(settings))
+        settings = dict(settings)
+        return self.run_device_call_async(lambda dev: dev.apply_settings(settings, mode), coalesce_key=key)
+
+    def emergency_stop_async(self, after: Callable[[ElectronicLoad], Any] | None = None) -> str:
+        """紧急停止：在安全通道插队发送 INPUT OFF
+
+        排队中的控制/遥测命令被取消（以免之后再次打开输入），``after`` 在 INPUT OFF
+        写出后于安全通道中执行。结果为从调用到 INPUT OFF 写出完成的延迟（毫秒）。
+        """
+        requested = time.monotonic()
+        self._cancel_queued("已被紧急停止取消")
+
+        def _job() -> float:
+            dev = self._require_device()
+            sent = dev.scpi.send_urgent("INPUT OFF")
+            latency_ms = (sent - requested) * 1000.0
+            self._estop_last_ms = latency_ms
+            self._estop_max_ms = max(self._estop_max_ms, latency_ms)
+            self._estop_count += 1
+            if after is not None:
+                after(dev)
+            return latency_ms
+
+        return self._enqueue(_job, CommandPriority.SAFETY)
+
+    def start_battery_test_async(self, engine: BatteryTestEngine) -> str:
+        """开始电池放电测试：配置设备并打开输入，之后由测量线程积分与判断截止"""
+        # 测试期间必须持续采样，截止判断依赖测量线程
+        self.set_measurement_enabled(True)
+
+        def _job() -> float | None:
+            engine.start(self._require_device())
+            self._battery_engine = engine
+            worker = self._measurement_worker
+            if worker is not None:
+                worker.set_battery_engine(engine)
+            return engine.prev_voff
+
+        return self._enqueue(_job)
+
+    def stop_battery_test_async(self, reason: str = "手动停止") -> str:
+        """手动结束电池测试，结果为引擎最终状态"""
+        engine = self._detach_battery_engine()
+
+        def _job() -> dict | None:
+            if engine is None:
+                return None
+            engine.stop(self._require_device(), reason)
+            return engine.snapshot()
+
+        return self._enqueue(_job)
+
+    def emergency_stop_battery_async(self) -> str:
+        """紧急停止电池测试：INPUT OFF 插队发出后恢复 Voff，结果为延迟（毫秒）"""
+        engine = self._detach_battery_engine()
+
+        def _after(dev: ElectronicLoad) -> None:
+            if engine is not None and engine.mark_stopped("紧急停止") and engine.prev_voff is not None:
+                dev.set_voltage_off(engine.prev_voff)
+
+        return self.emergency_stop_async(_after)
+
+    def _detach_battery_engine(self) -> BatteryTestEngine | None:
+        engine = self._battery_engine
+        self._battery_engine = None
+        if self._measurement_worker is not None:
+            self._measurement_worker.set_battery_engine(None)
+        return engine
+
+    @property
+    def battery_engine(self) -> BatteryTestEngine | None:
+        """正在运行的电池测试引擎"""
+        return self._battery_engine
+
+    def _on_battery_finished(self, snapshot: dict) -> None:
+        self._battery_engine = None
+        self.battery_finished.emit(snapshot)
+
+    def estop_latency_stats(self) -> dict:
+        """紧急停止延迟统计：最近一次/最大值（毫秒）及次数"""
+        return {"last_ms": self._estop_last_ms, "max_ms": self._estop_max_ms, "count": self._estop_count}
 
     def _require_device(self) -> ElectronicLoad:
         if not self._device:
             raise SCPIError("设备未连接")
         return self._device
 
+    def _invalidate_shadow_for(self, command: str) -> None:
+        """终端原始命令可能改写任意设定值：只要不全是查询就作废影子状态"""
+        if self._device and not all(part.strip().endswith("?") for part in command.split(";") if part.strip()):
+            self._device.invalidate_shadow()
+
     def _send_impl(self, command: str) -> None:
         if not self._scpi:
             raise SCPIError("设备未连接")
-        self._scpi.send(command)
+        try:
+            self._scpi.send(command)
+        finally:
+            self._invalidate_shadow_for(command)
 
     def _query_impl(self, command: str) -> str:
         if not self._scpi:
             raise SCPIError("设备未连接")
-        return self._scpi.query(command)
+        try:
+            return self._scpi.query(command)
+        finally:
+            self._invalidate_shadow_for(command)
+
+    def verify_state_async(self, headers: list[str] | None = None) -> str:
+        """批量读回设备状态校验影子状态，结果为不一致项 {命令头: (缓存值, 设备值)}"""
+        return self._enqueue(lambda: self._require_device().verify_shadow(headers), CommandPriority.BULK)
+
+    def export_metadata_async(self, verify: bool = False) -> str:
+        """读取导出所需的模式与保护值；优先由影子状态应答，verify 为 True 时先一次性读回"""
 
-    def export_metadata_async(self) -> str:
         def _job() -> dict:
             dev = self._require_device()
+            if verify:
+                dev.verify_shadow(["MODE", "CURR:PROT", "POW:PROT"])
             mode = dev.get_mode()
             max_i = dev.get_current_protection()
             max_p = dev.get_power_protection()
             return {"mode": mode, "max_current": max_i, "max_power": max_p}
 
-        return self._enqueue(_job)
+        return self._enqueue(_job, CommandPriority.BULK)
 
     def _on_command_result(self, request_id: str, result: object) -> None:
         if request_id.startswith("__"):
@@ -242,11 +565,12 @@ class DeviceManager(QObject):
 
     def shutdown(self) -> None:
         self._stop_measurement()
-        try:
-            self._cmd_worker.stop()
-            self._cmd_worker.wait(1000)
-        except Exception:
-            pass
+        for worker in (self._safety_worker, self._cmd_worker):
+            try:
+                worker.stop()
+                worker.wait(1000)
+            except Exception:
+                pass
 
     def _start_measurement(self) -> None:
         """启动测量轮询"""
@@ -256,9 +580,13 @@ class DeviceManager(QObject):
         if self._measurement_worker:
             return
 
-        self._measurement_worker = MeasurementWorker(self._device)
-        self._measurement_worker.measurement_ready.connect(self.measurement_ready)
+        self._measurement_worker = MeasurementWorker(self._device, self._sample_interval_ms)
+        self._measurement_worker.block_ready.connect(self.measurement_block)
+        self._measurement_worker.stats_updated.connect(self.measurement_stats)
         self._measurement_worker.error_occurred.connect(self.error_occurred)
+        self._measurement_worker.battery_progress.connect(self.battery_progress)
+        self._measurement_worker.battery_finished.connect(self._on_battery_finished)
+        self._measurement_worker.set_battery_engine(self._battery_engine)
         self._measurement_worker.finished.connect(self._on_measurement_finished)
         self._measurement_worker.start()
 
@@ -272,12 +600,27 @@ class DeviceManager(QObject):
                 self._start_measurement()
             return
 
+        if self._battery_engine is not None:
+            # 电池测试依赖测量线程判断截止，测试期间不暂停采样
+            return
+
         if self._measurement_worker:
             try:
                 self._measurement_worker.stop()
             except Exception:
                 pass
 
+    @property
+    def sample_interval_ms(self) -> int:
+        """目标采样周期（毫秒）"""
+        return self._sample_interval_ms
+
+    def set_sample_interval(self, interval_ms: int) -> None:
+        """设置目标采样周期，测量进行中时立即生效"""
+        self._sample_interval_ms = max(1, int(interval_ms))
+        if self._measurement_worker:
+            self._measurement_worker.set_interval_ms(self._sample_interval_ms)
+
     def _stop_measurement(self) -> None:
         """停止测量轮询"""
         if self._measurement_worker:
@@ -0,0 +1,157 @@
+"""多设备管理器，并行驱动多台电子负载"""
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .device import ElectronicLoad
+from .device_manager import DeviceManager
+from .exceptions import SCPIError
+
+
+class MultiDeviceManager(QObject):
+    """按设备 ID 管理多个相互独立的设备会话
+
+    每台设备对应一个 ``DeviceManager``：拥有各自的传输层、命令队列线程与
+    测量线程，一台设备的慢查询或超时不会阻塞其他设备。各设备的信号被汇总
+    转发，第一个参数均为设备 ID。
+    """
+
+    device_added = pyqtSignal(str)
+    device_removed = pyqtSignal(str)
+    device_connected = pyqtSignal(str, str)  # device_id, IDN
+    device_disconnected = pyqtSignal(str)
+    device_error = pyqtSignal(str, str)  # device_id, error
+    measurement_block = pyqtSignal(str, object)  # device_id, np.ndarray (n, 5)
+    measurement_stats = pyqtSignal(str, dict)  # device_id, 采样统计
+    comm_log = pyqtSignal(str, str, str)  # device_id, direction, message
+    command_result = pyqtSignal(str, str, object)  # device_id, request_id, result
+    command_error = pyqtSignal(str, str, str)  # device_id, request_id, error
+    command_superseded = pyqtSignal(str, str, str)  # device_id, 被取代的 request_id, 新 request_id
+
+    def __init__(self, sample_interval_ms: int = 200):
+        super().__init__()
+        self._managers: dict[str, DeviceManager] = {}
+        self._sample_interval_ms = max(1, int(sample_interval_ms))
+
+    def add_device(self, device_id: str) -> DeviceManager:
+        """创建一个设备会话（ID 已存在时返回原会话）"""
+        mgr = self._managers.get(device_id)
+        if mgr is not None:
+            return mgr
+
+        mgr = DeviceManager()
+        mgr.set_sample_interval(self._sample_interval_ms)
+        mgr.connected.connect(lambda idn, d=device_id: self.device_connected.emit(d, idn))
+        mgr.disconnected.connect(lambda d=device_id: self.device_disconnected.emit(d))
+        mgr.error_occurred.connect(lambda err, d=device_id: self.device_error.emit(d, err))
+        mgr.measurement_block.connect(lambda block, d=device_id: self.measurement_block.emit(d, block))
+        mgr.measurement_stats.connect(lambda stats, d=device_id: self.measurement_stats.emit(d, stats))
+        mgr.comm_log.connect(lambda direction, msg, d=device_id: self.comm_log.emit(d, direction, msg))
+        mgr.command_result.connect(lambda req, res, d=device_id: self.command_result.emit(d, req, res))
+        mgr.command_error.connect(lambda req, err, d=device_id: self.command_error.emit(d, req, err))
+        mgr.command_superseded.connect(
+            lambda old, new, d=device_id: self.command_superseded.emit(d, old, new)
+        )
+        self._managers[device_id] = mgr
+        self.device_added.emit(device_id)
+        return mgr
+
+    def remove_device(self, device_id: str) -> None:
+        """断开并释放一个设备会话"""
+        mgr = self._managers.pop(device_id, None)
+        if mgr is None:
+            return
+        # 先在命令线程中断开连接，再停止该设备的线程
+        mgr.disconnect_async()
+        mgr.shutdown()
+        mgr.deleteLater()
+        self.device_removed.emit(device_id)
+
+    def manager(self, device_id: str) -> DeviceManager:
+        """获取设备 ID 对应的 DeviceManager"""
+        mgr = self._managers.get(device_id)
+        if mgr is None:
+            raise SCPIError(f"未知设备: {device_id}")
+        return mgr
+
+    def device(self, device_id: str) -> ElectronicLoad | None:
+        """获取设备实例（未连接时为 None）"""
+        return self.manager(device_id).device
+
+    def device_ids(self) -> list[str]:
+        return list(self._managers)
+
+    def __len__(self) -> int:
+        return len(self._managers)
+
+    def __contains__(self, device_id: object) -> bool:
+        return device_id in self._managers
+
+    def connect_tcp_async(self, device_id: str, host: str, port: int) -> str:
+        return self.add_device(device_id).connect_tcp_async(host, port)
+
+    def connect_serial_async(self, device_id: str, port: str, baudrate: int = 115200) -> str:
+        return self.add_device(device_id).connect_serial_async(port, baudrate)
+
+    def disconnect_async(self, device_id: str) -> str:
+        return self.manager(device_id).disconnect_async()
+
+    def disconnect_all(self) -> list[str]:
+        return [mgr.disconnect_async() for mgr in self._managers.values() if mgr.is_connected()]
+
+    def send_async(self, device_id: str, command: str) -> str:
+        return self.manager(device_id).send_async(command)
+
+    def query_async(self, device_id: str, command: str) -> str:
+        return self.manager(device_id).query_async(command)
+
+    def run_device_call_async(
+        self, device_id: str, func: Callable[[ElectronicLoad], Any], coalesce_key: str | None = None
+    ) -> str:
+        return self.manager(device_id).run_device_call_async(func, coalesce_key=coalesce_key)
+
+    def apply_settings_async(self, device_id: str, settings: dict[str, Any], mode: str | None = None) -> str:
+        return self.manager(device_id).apply_settings_async(settings, mode)
+
+    def broadcast_call_async(self, func: Callable[[ElectronicLoad], Any]) -> dict[str, str]:
+        """对所有已连接设备并行执行同一操作，返回 {device_id: request_id}"""
+        return {
+            d: mgr.run_device_call_async(func) for d, mgr in self._managers.items() if mgr.is_connected()
+        }
+
+    def is_connected(self, device_id: str) -> bool:
+        mgr = self._managers.get(device_id)
+        return mgr is not None and mgr.is_connected()
+
+    def connected_ids(self) -> list[str]:
+        return [d for d, mgr in self._managers.items() if mgr.is_connected()]
+
+    def set_measurement_enabled(self, enabled: bool, device_id: str | None = None) -> None:
+        """启用/暂停测量轮询；device_id 为 None 时作用于全部设备"""
+        targets = self._managers.values() if device_id is None else [self.manager(device_id)]
+        for mgr in targets:
+            mgr.set_measurement_enabled(enabled)
+
+    @property
+    def sample_interval_ms(self) -> int:
+        return self._sample_interval_ms
+
+    def set_sample_interval(self, interval_ms: int, device_id: str | None = None) -> None:
+        """设置采样周期；device_id 为 None 时作用于全部设备（含之后新增的设备）"""
+        if device_id is not None:
+            self.manager(device_id).set_sample_interval(interval_ms)
+            return
+        self._sample_interval_ms = max(1, int(interval_ms))
+        for mgr in self._managers.values():
+            mgr.set_sample_interval(self._sample_interval_ms)
+
+    def shutdown(self) -> None:
+        """断开所有设备并停止全部工作线程"""
+        for mgr in self._managers.values():
+            if mgr.is_connected():
+                mgr.disconnect_async()
+        for mgr in self._managers.values():
+            mgr.shutdown()
+        self._managers.clear()
@@ -1,34 +1,243 @@
 from __future__ import annotations
 
 import csv
+import io
 import json
 import os
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+from .samples import SAMPLE_COLUMNS, format_timestamps
+
+RECORD_FORMATS = ("csv", "bin")
+FSYNC_POLICIES = ("never", "interval", "always")
+
+# 二进制会话的记录格式：每条样本 5 个小端 float64（t 为 epoch 秒），与采样块 (n, 5) 的内存布局一致
+BINARY_RECORD_DTYPE = np.dtype([(name, "<f8") for name in SAMPLE_COLUMNS])
+BINARY_DATA_NAME = "data.bin"
+
 
 @dataclass
 class RecordingSession:
     session_dir: Path
-    data_csv_path: Path
+    data_path: Path
     meta_json_path: Path
+    format: str = "csv"
+
+    @property
+    def data_csv_path(self) -> Path:
+        return self.data_path
+
+
+def open_binary_recording(data_path: Path) -> np.ndarray:
+    """以内存映射方式打开二进制会话数据，返回结构化数组（字段 t/v/i/p/r）
+
+    文件末尾若有未写完整的记录（例如程序异常退出）会被忽略。
+    """
+    size = os.path.getsize(data_path)
+    n = size // BINARY_RECORD_DTYPE.itemsize
+    if n == 0:
+        return np.empty(0, dtype=BINARY_RECORD_DTYPE)
+    return np.memmap(data_path, dtype=BINARY_RECORD_DTYPE, mode="r", shape=(n,))
+
+
+def binary_storage_header() -> dict[str, Any]:
+    """写入 meta.json 的二进制存储描述"""
+    return {
+        "format": "bin",
+        "file": BINARY_DATA_NAME,
+        "byte_order": "little",
+        "record_size": BINARY_RECORD_DTYPE.itemsize,
+        "fields": [[name, "float64"] for name in SAMPLE_COLUMNS],
+        "time_unit": "epoch_s",
+    }
+
+
+class _SessionWriter(threading.Thread):
+    """会话文件写入线程
+
+    GUI 线程只把采样块放入有界队列（deque 的 append/popleft 为原子操作，
+    入队与出队计数各由一个线程独占修改，无需加锁）。写入线程按时间或
+    行数成组提交：一次格式化、一次 write + flush，再按 fsync 策略落盘。
+    队列满时丢弃新到的块并计数，保证 GUI 线程永不因磁盘阻塞。
+    """
+
+    def __init__(
+        self,
+        file: io.IOBase,
+        fmt: str,
+        *,
+        max_queued_rows: int,
+        commit_rows: int,
+        commit_interval_s: float,
+        fsync_policy: str,
+        fsync_interval_s: float,
+    ):
+        super().__init__(name="RecordingWriter", daemon=True)
+        self._file = file
+        self._format = fmt
+        self._max_queued_rows = max(1, int(max_queued_rows))
+        self._commit_rows = max(1, int(commit_rows))
+        self._commit_interval_s = max(0.01, float(commit_interval_s))
+        self._fsync_policy = fsync_policy
+        self._fsync_interval_s = max(0.0, float(fsync_interval_s))
+
+        self._queue: deque[np.ndarray] = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+
+        self.enqueued_rows = 0  # 仅生产者线程修改
+        self.dropped_rows = 0  # 仅生产者线程修改
+        self.written_rows = 0  # 仅写入线程修改
+        self._lost_rows = 0  # 写入失败而丢失的行（仅写入线程修改）
+        self.written_bytes = 0
+        self.commits = 0
+        self.fsyncs = 0
+        self.last_commit_ms = 0.0
+        self.error: str | None = None
+
+    @property
+    def queued_rows(self) -> int:
+        return self.enqueued_rows - self.written_rows - self._lost_rows
+
+    def put(self, block: np.ndarray) -> bool:
+        n = len(block)
+        if self.error is not None or self.queued_rows + n > self._max_queued_rows:
+            self.dropped_rows += n
+            return False
+        self._queue.append(block)
+        self.enqueued_rows += n
+        if self.queued_rows >= self._commit_rows:
+            self._wake.set()
+        return True
+
+    def close(self, timeout: float | None = None) -> None:
+        """请求停止：写完队列中剩余数据后落盘并关闭文件"""
+        self._stopping = True
+        self._wake.set()
+        self.join(timeout)
+
+    def run(self) -> None:
+        last_fsync = time.monotonic()
+        while True:
+            self._wake.wait(self._commit_interval_s)
+            self._wake.clear()
+            stopping = self._stopping
+
+            blocks: list[np.ndarray] = []
+            while self._queue:
+                blocks.append(self._queue.popleft())
+            if blocks and self.error is None:
+                t0 = time.perf_counter()
+                rows = sum(len(b) for b in blocks)
+                try:
+                    self._commit(np.concatenate(blocks) if len(blocks) > 1 else blocks[0])
+                    now = time.monotonic()
+                    if self._fsync_policy == "always" or (
+                        self._fsync_policy == "interval" and now - last_fsync >= self._fsync_interval_s
+                    ):
+                        os.fsync(self._file.fileno())
+                        self.fsyncs += 1
+                        last_fsync = now
+                    self.written_rows += rows
+                    self.commits += 1
+                except Exception as e:
+                    self.error = str(e)
+                    self._lost_rows += rows
+                self.last_commit_ms = (time.perf_counter() - t0) * 1000.0
+            elif blocks:
+                self._lost_rows += sum(len(b) for b in blocks)
+
+            if stopping and not self._queue:
+                break
+
+        try:
+            self._file.flush()
+            if self._fsync_policy != "never":
+                os.fsync(self._file.fileno())
+        except Exception:
+            pass
+        try:
+            self._file.close()
+        except Exception:
+            pass
+
+    def _commit(self, block: np.ndarray) -> None:
+        if self._format == "bin":
+            data = np.ascontiguousarray(block, dtype="<f8").tobytes()
+            self._file.write(data)
+            self.written_bytes += len(data)
+        else:
+            ts = format_timestamps(block[:, 0])
+            text = "".join(
+                f"{t},{v:.6f},{i:.6f},{p:.6f},{r:.6f}\r\n"
+                for t, (v, i, p, r) in zip(ts, block[:, 1:5].tolist())
+            )
+            self._file.write(text)
+            self.written_bytes += len(text.encode("utf-8"))
+        self._file.flush()
 
 
 class RecordingManager:
-    def __init__(self) -> None:
+    """采集会话录制
+
+    写盘在后台线程中完成（见 ``_SessionWriter``），``append_block`` 只负责入队。
+
+    Args:
+        max_queued_rows: 队列上限（行），超出后丢弃新数据并计数
+        commit_rows: 队列积累到该行数时立即提交
+        commit_interval_s: 最长提交间隔，崩溃时最多丢失约这么长时间的数据
+        fsync_policy: 'never'（仅 flush）、'interval'（按 fsync_interval_s 间隔）、'always'（每次提交）
+    """
+
+    def __init__(
+        self,
+        max_queued_rows: int = 200_000,
+        commit_rows: int = 4096,
+        commit_interval_s: float = 0.2,
+        fsync_policy: str = "interval",
+        fsync_interval_s: float = 1.0,
+    ) -> None:
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"不支持的 fsync 策略: {fsync_policy}")
         self._session: RecordingSession | None = None
-        self._file = None
-        self._writer: csv.writer | None = None
-        self._rows_written = 0
+        self._writer: _SessionWriter | None = None
+        self._format = "csv"
+        self._meta: dict[str, Any] = {}
+        self._writer_options = {
+            "max_queued_rows": max_queued_rows,
+            "commit_rows": commit_rows,
+            "commit_interval_s": commit_interval_s,
+            "fsync_policy": fsync_policy,
+            "fsync_interval_s": fsync_interval_s,
+        }
+        self._stats_time = time.monotonic()
+        self._stats_bytes = 0
 
     @staticmethod
     def default_base_dir() -> Path:
         home = Path(os.path.expanduser("~"))
         return home / "Documents" / "VLoad" / "sessions"
 
-    def start_new_session(self, meta: dict[str, Any], base_dir: Path | None = None) -> RecordingSession:
+    def start_new_session(
+        self, meta: dict[str, Any], base_dir: Path | None = None, fmt: str = "csv"
+    ) -> RecordingSession:
+        """创建新的采集会话
+
+        Args:
+            meta: 写入 meta.json 的会话信息
+            base_dir: 会话根目录，默认为 ~/Documents/VLoad/sessions
+            fmt: 'csv'（文本）或 'bin'（定长 float64 记录，可内存映射）
+        """
+        if fmt not in RECORD_FORMATS:
+            raise ValueError(f"不支持的录制格式: {fmt}")
         self.stop()
 
         base = base_dir or self.default_base_dir()
@@ -41,44 +250,88 @@ class RecordingManager:
         session_dir = base / name
         session_dir.mkdir(parents=True, exist_ok=True)
 
-        data_csv_path = session_dir / "data.csv"
         meta_json_path = session_dir / "meta.json"
+        meta = dict(meta)
+        if fmt == "bin":
+            data_path = session_dir / BINARY_DATA_NAME
+            meta["storage"] = binary_storage_header()
+            f = open(data_path, "wb")
+        else:
+            data_path = session_dir / "data.csv"
+            meta["storage"] = {"format": "csv", "file": data_path.name}
+            f = open(data_path, "w", newline="", encoding="utf-8")
+            csv.writer(f).writerow(["时间", "电压(V)", "电流(A)", "功率(W)", "内阻(Ω)"])
+            f.flush()
 
         meta_json_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
 
-        f = open(data_csv_path, "w", newline="", encoding="utf-8")
-        writer = csv.writer(f)
-        writer.writerow(["时间", "电压(V)", "电流(A)", "功率(W)", "内阻(Ω)"])
-
-        self._file = f
-        self._writer = writer
-        self._rows_written = 0
-        self._session = RecordingSession(session_dir=session_dir, data_csv_path=data_csv_path, meta_json_path=meta_json_path)
+        self._writer = _SessionWriter(f, fmt, **self._writer_options)
+        self._writer.start()
+        self._format = fmt
+        self._meta = meta
+        self._stats_time = time.monotonic()
+        self._stats_bytes = 0
+        self._session = RecordingSession(
+            session_dir=session_dir, data_path=data_path, meta_json_path=meta_json_path, format=fmt
+        )
         return self._session
 
     def append(self, ts: str, v: float, i: float, p: float, r: float) -> None:
-        if not self._writer or not self._file:
+        if not self._writer:
             return
-        self._writer.writerow([ts, f"{v:.6f}", f"{i:.6f}", f"{p:.6f}", f"{r:.6f}"])
-        self._rows_written += 1
-        if self._rows_written % 200 == 0:
-            try:
-                self._file.flush()
-            except Exception:
-                pass
+        try:
+            t = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S.%f").timestamp()
+        except ValueError:
+            t = time.time()
+        self.append_block(np.array([[t, v, i, p, r]], dtype=np.float64))
+
+    def append_block(self, block: np.ndarray) -> None:
+        """批量写入采样块 (n, 5)：t, v, i, p, r（仅入队，不阻塞调用线程）"""
+        if not self._writer or len(block) == 0:
+            return
+        self._writer.put(np.array(block, dtype=np.float64, copy=True))
+
+    def stats(self) -> dict[str, Any] | None:
+        """录制管线统计：排队/丢弃/已写行数、写入速率等；未在录制时返回 None"""
+        writer = self._writer
+        if not writer:
+            return None
+        now = time.monotonic()
+        written = writer.written_bytes
+        dt = now - self._stats_time
+        rate = (written - self._stats_bytes) / dt if dt > 0 else 0.0
+        self._stats_time = now
+        self._stats_bytes = written
+        return {
+            "queued": writer.queued_rows,
+            "dropped": writer.dropped_rows,
+            "written": writer.written_rows,
+            "bytes_per_s": rate,
+            "commits": writer.commits,
+            "fsyncs": writer.fsyncs,
+            "last_commit_ms": writer.last_commit_ms,
+            "error": writer.error,
+        }
 
     def stop(self) -> None:
-        if self._file:
-            try:
-                self._file.flush()
-            except Exception:
-                pass
-            try:
-                self._file.close()
-            except Exception:
-                pass
-        self._file = None
+        writer = self._writer
         self._writer = None
+        if writer:
+            writer.close()
+            self._finalize_meta(writer)
+
+    def _finalize_meta(self, writer: _SessionWriter) -> None:
+        """会话结束时把行数与丢弃数写回 meta.json（二进制格式读取时仍以文件大小为准）"""
+        session = self._session
+        if not session:
+            return
+        try:
+            self._meta["storage"]["rows"] = writer.written_rows
+            if writer.dropped_rows:
+                self._meta["storage"]["dropped_rows"] = writer.dropped_rows
+            session.meta_json_path.write_text(json.dumps(self._meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        except Exception:
+            pass
 
     def discard_session(self) -> None:
         session = self._session
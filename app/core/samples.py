@@ -0,0 +1,199 @@
+"""采样数据块定义与缓冲"""
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+
+# 采样块的列顺序：时间戳(s, epoch)、电压、电流、功率、内阻
+SAMPLE_COLUMNS = ("t", "v", "i", "p", "r")
+COL_T, COL_V, COL_I, COL_P, COL_R = range(len(SAMPLE_COLUMNS))
+
+
+def format_timestamps(t: np.ndarray) -> list[str]:
+    """批量把 epoch 秒格式化为本地时间字符串 'YYYY-mm-dd HH:MM:SS.fff'"""
+    if len(t) == 0:
+        return []
+    first = datetime.fromtimestamp(float(t[0])).astimezone().utcoffset()
+    last = datetime.fromtimestamp(float(t[-1])).astimezone().utcoffset()
+    if first != last:
+        # 跨越夏令时切换，逐条换算
+        return [datetime.fromtimestamp(float(x)).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] for x in t]
+    offset_ms = int(first.total_seconds() * 1000) if first is not None else 0
+    ms = np.round(np.asarray(t, dtype=np.float64) * 1000.0).astype(np.int64) + offset_ms
+    text = np.datetime_as_string(ms.astype("datetime64[ms]"), unit="ms")
+    return [s.replace("T", " ") for s in text.tolist()]
+
+
+class SampleBlockBuffer:
+    """预分配的采样累积缓冲区
+
+    采集线程逐条写入，按帧率整体取出为 (n, 5) 的 float64 数组，
+    避免每个样本都经过一次跨线程信号。
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._buf = np.empty((max(1, int(capacity)), len(SAMPLE_COLUMNS)), dtype=np.float64)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def is_full(self) -> bool:
+        return self._count >= self._buf.shape[0]
+
+    def append(self, t: float, v: float, i: float, p: float, r: float) -> None:
+        if self._count >= self._buf.shape[0]:
+            raise OverflowError("采样缓冲区已满")
+        self._buf[self._count] = (t, v, i, p, r)
+        self._count += 1
+
+    def take(self) -> np.ndarray:
+        """取出当前累积的全部样本（拷贝），并清空缓冲区"""
+        block = self._buf[: self._count].copy()
+        self._count = 0
+        return block
+
+
+class SampleRingBuffer:
+    """列式环形采样缓冲区（容量固定，满后丢弃最旧样本）
+
+    底层为 (列数, 2 × 容量) 的 float64 数组，写入位置只向后推进；写到末尾时
+    把最近的“容量”条样本整体搬回开头（摊还 O(1)）。因此任意时刻有效数据
+    在内存中都是连续的，``column()``/``view()`` 直接返回视图而无需拷贝，
+    可原样交给 ``setData`` 使用。底层数组按需倍增到 2 × 容量，大容量的
+    缓冲区在数据量较少时不会预先占用全部内存。
+    """
+
+    INITIAL_ALLOC = 4096
+
+    def __init__(self, capacity: int = 50000, columns: int = len(SAMPLE_COLUMNS)):
+        self._capacity = max(1, int(capacity))
+        self._columns = int(columns)
+        self._data = np.empty((self._columns, min(self._capacity * 2, self.INITIAL_ALLOC)), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        self._total = 0  # 累计写入条数（含已丢弃），可作为样本的绝对序号
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def first_index(self) -> int:
+        """当前最旧样本的绝对序号"""
+        return self._total - len(self)
+
+    @property
+    def total_appended(self) -> int:
+        return self._total
+
+    def clear(self) -> None:
+        self._start = 0
+        self._end = 0
+        self._total = 0
+
+    def set_capacity(self, capacity: int) -> None:
+        """调整容量，保留最近的样本"""
+        capacity = max(1, int(capacity))
+        if capacity == self._capacity:
+            return
+        keep = min(len(self), capacity)
+        data = np.empty((self._columns, min(capacity * 2, max(keep * 2, self.INITIAL_ALLOC))), dtype=np.float64)
+        data[:, :keep] = self._data[:, self._end - keep : self._end]
+        self._data = data
+        self._capacity = capacity
+        self._start = 0
+        self._end = keep
+
+    def load(self, columns: np.ndarray) -> None:
+        """用 (列数, n) 的数组整体替换缓冲区内容
+
+        容量不足时扩大到 n。连续的 float64 数组直接作为底层存储（不拷贝），
+        调用方之后不应再修改它。
+        """
+        data = np.ascontiguousarray(columns, dtype=np.float64)
+        if data.ndim != 2 or data.shape[0] != self._columns:
+            raise ValueError(f"需要 ({self._columns}, n) 的数组，实际为 {data.shape}")
+        n = data.shape[1]
+        self._capacity = max(self._capacity, n)
+        if n == 0:
+            data = np.empty((self._columns, min(self._capacity * 2, self.INITIAL_ALLOC)), dtype=np.float64)
+        self._data = data
+        self._start = 0
+        self._end = n
+        self._total = n
+
+    def append(self, *values: float) -> None:
+        """追加一条样本（按列顺序传入）"""
+        if self._end >= self._data.shape[1]:
+            self._make_room(1)
+        self._data[:, self._end] = values
+        self._end += 1
+        self._total += 1
+        if self._end - self._start > self._capacity:
+            self._start += 1
+
+    def extend(self, block: np.ndarray) -> None:
+        """追加 (n, 列数) 的样本块"""
+        n = len(block)
+        if n == 0:
+            return
+        if n >= self._capacity:
+            # 整块超过容量，只保留最后 capacity 条
+            if self._data.shape[1] < self._capacity:
+                self._data = np.empty((self._columns, self._capacity * 2), dtype=np.float64)
+            self._data[:, : self._capacity] = np.asarray(block[-self._capacity :], dtype=np.float64).T
+            self._start = 0
+            self._end = self._capacity
+            self._total += n
+            return
+        if self._end + n > self._data.shape[1]:
+            self._make_room(n)
+        self._data[:, self._end : self._end + n] = np.asarray(block, dtype=np.float64).T
+        self._end += n
+        self._total += n
+        if self._end - self._start > self._capacity:
+            self._start = self._end - self._capacity
+
+    def column(self, col: int) -> np.ndarray:
+        """返回某一列有效数据的只读连续视图"""
+        view = self._data[col, self._start : self._end]
+        view.flags.writeable = False
+        return view
+
+    def view(self) -> np.ndarray:
+        """返回 (列数, n) 的只读视图"""
+        view = self._data[:, self._start : self._end]
+        view.flags.writeable = False
+        return view
+
+    def last(self) -> np.ndarray | None:
+        if self._end == self._start:
+            return None
+        return self._data[:, self._end - 1].copy()
+
+    def _make_room(self, n: int) -> None:
+        alloc = self._data.shape[1]
+        if alloc < self._capacity * 2:
+            # 尚未达到 2 × 容量：倍增底层数组
+            keep = len(self)
+            new_alloc = min(self._capacity * 2, max(alloc * 2, keep + n))
+            data = np.empty((self._columns, new_alloc), dtype=np.float64)
+            data[:, :keep] = self._data[:, self._start : self._end]
+            self._data = data
+            self._start = 0
+            self._end = keep
+            if self._end + n <= new_alloc:
+                return
+        self._compact()
+
+    def _compact(self) -> None:
+        keep = min(len(self), self._capacity)
+        if keep:
+            self._data[:, :keep] = self._data[:, self._end - keep : self._end]
+        self._start = 0
+        self._end = keep
@@ -0,0 +1,87 @@
+"""固定速率采样调度器"""
+from __future__ import annotations
+
+import threading
+import time
+
+
+class FixedRateScheduler:
+    """基于单调时钟截止时间的固定速率调度器
+
+    与“每轮结束后 sleep 固定时长”不同，下一次采样的截止时间始终按
+    ``上一截止时间 + 周期`` 推进，查询耗时不会累积成漂移。某一轮耗时超过
+    一个周期时，错过的节拍会被合并跳过，而不是连续补发追赶。
+    """
+
+    def __init__(self, interval_s: float):
+        self._interval_s = max(1e-3, float(interval_s))
+        self._deadline: float | None = None
+        self._reset_stats()
+
+    @property
+    def interval_s(self) -> float:
+        return self._interval_s
+
+    def set_interval(self, interval_s: float) -> None:
+        """修改采样周期，从下一个节拍起生效"""
+        self._interval_s = max(1e-3, float(interval_s))
+        self._deadline = None
+
+    def wait_next(self, stop_event: threading.Event | None = None) -> bool:
+        """等待到下一个节拍
+
+        Args:
+            stop_event: 可选的停止事件，置位后立即返回
+
+        Returns:
+            False 表示等待期间收到停止请求
+        """
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = now
+            return not (stop_event is not None and stop_event.is_set())
+
+        deadline = self._deadline + self._interval_s
+        if now > deadline + self._interval_s:
+            # 本轮耗时超过一个周期：合并错过的节拍，直接对齐到最近的未来节拍
+            missed = int((now - deadline) // self._interval_s)
+            deadline += missed * self._interval_s
+            self._overruns += 1
+            self._skipped += missed
+            if deadline < now:
+                deadline += self._interval_s
+
+        delay = deadline - now
+        if delay > 0:
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+
+        lateness = max(0.0, time.monotonic() - deadline)
+        self._deadline = deadline
+        self._ticks += 1
+        self._jitter_sum += lateness
+        self._jitter_max = max(self._jitter_max, lateness)
+        return not (stop_event is not None and stop_event.is_set())
+
+    def take_stats(self) -> dict:
+        """返回自上次调用以来的调度统计并清零"""
+        ticks = self._ticks
+        stats = {
+            "target_rate": 1.0 / self._interval_s,
+            "jitter_ms_mean": (self._jitter_sum / ticks * 1000.0) if ticks else 0.0,
+            "jitter_ms_max": self._jitter_max * 1000.0,
+            "overruns": self._overruns,
+            "skipped": self._skipped,
+        }
+        self._reset_stats()
+        return stats
+
+    def _reset_stats(self) -> None:
+        self._ticks = 0
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+        self._overruns = 0
+        self._skipped = 0
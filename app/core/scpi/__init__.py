@@ -1,3 +1,4 @@
-from .scpi_client import SCPIClient
+from .async_scpi_client import AsyncSCPIClient
+from .scpi_client import CommandPriority, PriorityLock, SCPIClient
 
-__all__ = ["SCPIClient"]
+__all__ = ["SCPIClient", "AsyncSCPIClient", "CommandPriority", "PriorityLock"]
@@ -0,0 +1,200 @@
+"""asyncio SCPI 协议客户端"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Callable
+
+from ..exceptions import SCPIError
+from ..transport.async_transport import AsyncTransport
+
+
+class AsyncSCPIClient:
+    """asyncio SCPI 客户端，支持查询流水线与取消
+
+    查询命令写出前，在同一把写锁内把一个 Future 放入 FIFO；后台读取任务按
+    到达顺序逐行取出应答并交给队首的 Future。因此多个协程可以并发调用
+    ``query``，命令连续发出而无需等待上一条应答（流水线），在途数量受
+    ``max_in_flight`` 限制，以免超出设备输入缓冲区。
+
+    调用方被取消时，对应 Future 仍留在 FIFO 中，其应答到达后被丢弃，后续
+    应答不会错位。等待应答超时则说明 FIFO 已无法与设备对齐：所有在途查询
+    以 SCPIError 结束，并清空接收缓冲区重新同步。
+    """
+
+    def __init__(self, transport: AsyncTransport, max_in_flight: int = 8):
+        self._transport = transport
+        self._write_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max(1, int(max_in_flight)))
+        self._pending: deque[asyncio.Future[str]] = deque()
+        self._reader_task: asyncio.Task | None = None
+        self._has_pending = asyncio.Event()
+        self._log_callback: Callable[[str, str], None] | None = None
+
+    def set_log_callback(self, callback: Callable[[str, str], None]) -> None:
+        """设置日志回调函数，参数为 (direction, message)，direction 为 'TX'、'RX' 或 'ERR'"""
+        self._log_callback = callback
+
+    def _log(self, direction: str, message: str) -> None:
+        if self._log_callback:
+            self._log_callback(direction, message)
+
+    async def open(self) -> None:
+        """打开传输层并启动应答读取任务"""
+        await self._transport.open()
+        self._ensure_reader()
+
+    async def close(self) -> None:
+        """停止读取任务，结束所有在途查询并关闭传输层"""
+        await self._stop_reader()
+        self._fail_pending(SCPIError("连接已关闭"))
+        await self._transport.close()
+
+    async def _stop_reader(self) -> None:
+        task = self._reader_task
+        self._reader_task = None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def is_connected(self) -> bool:
+        """检查是否已连接"""
+        return self._transport.is_open()
+
+    @property
+    def in_flight(self) -> int:
+        """已发出但尚未收到应答的查询数"""
+        return len(self._pending)
+
+    def _ensure_reader(self) -> None:
+        if self._reader_task is None or self._reader_task.done():
+            self._reader_task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        while True:
+            # 没有在途查询时不读取，避免把读超时当成错误
+            await self._has_pending.wait()
+            try:
+                line = await self._transport.read_line()
+            except Exception as e:
+                self._log("ERR", f"读取应答失败: {e}")
+                # 持有写锁期间清空接收缓冲区，避免吞掉之后新发出查询的应答
+                async with self._write_lock:
+                    self._fail_pending(SCPIError(f"读取应答失败: {e}"))
+                    await self._transport.clear_input()
+                continue
+            self._log("RX", line)
+            if not self._pending:
+                continue
+            fut = self._pending.popleft()
+            if not self._pending:
+                self._has_pending.clear()
+            if not fut.done():
+                fut.set_result(line)
+
+    def _fail_pending(self, error: Exception) -> None:
+        self._has_pending.clear()
+        while self._pending:
+            fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_exception(error)
+                # 避免无人等待时出现 "exception was never retrieved" 警告
+                fut.exception()
+
+    async def send(self, command: str) -> None:
+        """发送命令（无返回值）"""
+        if not self._transport.is_open():
+            raise SCPIError("设备未连接")
+        async with self._write_lock:
+            try:
+                self._log("TX", command)
+                await self._transport.write_line(command)
+            except Exception as e:
+                self._log("ERR", f"发送失败: {e}")
+                raise SCPIError(f"发送命令失败: {e}") from e
+
+    async def _submit(self, command: str, fut: asyncio.Future[str]) -> None:
+        """写出一条查询，其应答 Future 在写出前进入 FIFO（不等待应答）
+
+        写出期间被取消时命令可能已经发出，Future 留在 FIFO 中占位，应答到达后
+        被丢弃；写出失败（传输层报错）说明命令未送达，此时从 FIFO 中移除。
+        """
+        if not self._transport.is_open():
+            raise SCPIError("设备未连接")
+        self._ensure_reader()
+        async with self._write_lock:
+            self._pending.append(fut)
+            self._has_pending.set()
+            try:
+                self._log("TX", command)
+                await self._transport.write_line(command)
+            except Exception as e:
+                self._log("ERR", f"查询失败: {e}")
+                self._discard_pending(fut)
+                raise SCPIError(f"查询命令失败: {e}") from e
+
+    def _discard_pending(self, fut: asyncio.Future[str]) -> None:
+        try:
+            self._pending.remove(fut)
+        except ValueError:
+            pass
+        if not self._pending:
+            self._has_pending.clear()
+
+    async def query(self, command: str) -> str:
+        """查询命令（有返回值），可与其他协程的查询并发流水线执行
+
+        在途槽位在应答被取走（或在途查询整体失败）时归还；调用方取消后
+        Future 仍在 FIFO 中占位，槽位随之保留，在途数量不会超过 ``max_in_flight``。
+        """
+        await self._slots.acquire()
+        fut: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(lambda _f: self._slots.release())
+        try:
+            await self._submit(command, fut)
+        except BaseException:
+            if fut not in self._pending:
+                # 未进入 FIFO（或已移除）：结束 Future 以归还槽位
+                fut.cancel()
+            raise
+        return await self._await_reply(fut)
+
+    async def _await_reply(self, fut: asyncio.Future[str]) -> str:
+        timeout = self._transport.timeout_ms / 1000.0 * (1 + len(self._pending))
+        try:
+            # shield：调用方取消时 Future 仍留在 FIFO 中占位，应答到达后被丢弃
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError as e:
+            self._log("ERR", "查询超时，重新同步")
+            await self._resync(SCPIError("查询超时"))
+            raise SCPIError("查询超时") from e
+
+    async def _resync(self, error: Exception) -> None:
+        """停止读取任务、结束在途查询并清空接收缓冲区，之后的查询重新对齐"""
+        async with self._write_lock:
+            await self._stop_reader()
+            self._fail_pending(error)
+            await self._transport.clear_input()
+
+    async def query_many(self, commands: list[str], compound: bool = False) -> list[str]:
+        """批量查询
+
+        Args:
+            commands: 查询命令列表
+            compound: True 时以 ';:' 拼成一条复合命令，应答按 ';' 拆分；
+                False 时各命令连续写出（流水线），再依次等待应答
+        """
+        if compound:
+            response = await self.query(";:".join(commands))
+            parts = [x.strip() for x in response.split(";")]
+            if len(parts) != len(commands):
+                raise SCPIError(f"复合查询应答数量不符：期望 {len(commands)}，实际 {len(parts)}")
+            return parts
+        return list(await asyncio.gather(*(self.query(c) for c in commands)))
+
+    async def clear_input(self) -> None:
+        """丢弃尚未读取的应答"""
+        await self._resync(SCPIError("接收缓冲区已清空"))
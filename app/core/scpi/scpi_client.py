@@ -1,50 +1,143 @@
 """SCPI 协议客户端"""
 from __future__ import annotations
 
+import heapq
+import itertools
 import threading
-from typing import Callable
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Callable, Iterator
 
-from ..exceptions import SCPIError
+from ..exceptions import SCPIError, TimeoutError
 from ..transport import Transport
 
 
+class CommandPriority(IntEnum):
+    """命令优先级通道，数值越小越优先"""
+
+    SAFETY = 0  # 紧急停止等安全命令
+    CONTROL = 1  # 参数设置、模式切换等用户操作
+    BULK = 2  # 周期测量、元数据读取等批量遥测
+
+
+class PriorityLock:
+    """按优先级出让的互斥锁
+
+    锁释放时交给等待者中优先级最高者（同级先到先得），而不是由操作系统
+    任意唤醒，因此排队中的控制命令不会被连续的测量轮询抢先。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._locked = False
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    def acquire(self, priority: int = CommandPriority.CONTROL) -> None:
+        with self._cond:
+            if not self._locked and not self._waiters:
+                self._locked = True
+                return
+            ticket = (int(priority), next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            while self._locked or self._waiters[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._locked = True
+
+    def release(self) -> None:
+        with self._cond:
+            self._locked = False
+            if self._waiters:
+                self._cond.notify_all()
+
+    @contextmanager
+    def hold(self, priority: int = CommandPriority.CONTROL) -> Iterator[None]:
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
 class SCPIClient:
-    """SCPI 协议客户端，负责命令发送/查询和日志记录"""
+    """SCPI 协议客户端，负责命令发送/查询和日志记录
+
+    一次完整的命令/查询事务持有 ``PriorityLock``，优先级取自调用线程通过
+    ``set_thread_priority`` 设置的通道（默认 CONTROL）。写出单行另有一把
+    写锁：``send_urgent`` 只取写锁，可在其他线程等待应答期间插入发送。
+    """
+
+    MAX_LATE_REPLIES = 64  # 重新同步时最多丢弃的迟到应答行数
 
     def __init__(self, transport: Transport):
         self._transport = transport
-        self._lock = threading.Lock()
+        self._lock = PriorityLock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
         self._log_callback: Callable[[str, str], None] | None = None
 
     def set_log_callback(self, callback: Callable[[str, str], None]) -> None:
         """设置日志回调函数，参数为 (direction, message)，direction 为 'TX' 或 'RX'"""
         self._log_callback = callback
 
+    def set_thread_priority(self, priority: CommandPriority) -> None:
+        """设置当前线程后续事务的优先级通道"""
+        self._local.priority = priority
+
+    def _hold(self):
+        return self._lock.hold(getattr(self._local, "priority", CommandPriority.CONTROL))
+
+    def _write(self, command: str) -> None:
+        with self._write_lock:
+            self._transport.write_line(command)
+
     def send(self, command: str) -> None:
         """发送命令（无返回值）"""
-        with self._lock:
+        with self._hold():
             if not self._transport.is_open():
                 raise SCPIError("设备未连接")
 
             try:
                 if self._log_callback:
                     self._log_callback("TX", command)
-                self._transport.write_line(command)
+                self._write(command)
             except Exception as e:
                 if self._log_callback:
                     self._log_callback("ERR", f"发送失败: {e}")
                 raise SCPIError(f"发送命令失败: {e}") from e
 
+    def send_urgent(self, command: str) -> float:
+        """插队发送无应答的命令，返回写出完成时刻（time.monotonic）
+
+        不等待正在进行的查询事务：只在写锁上与其他写出互斥，整行写出后才
+        释放，因此不会与其他命令的字节交错。无应答命令不影响接收端应答的
+        顺序，正在等待的查询仍能收到自己的应答。
+        """
+        if not self._transport.is_open():
+            raise SCPIError("设备未连接")
+        try:
+            self._write(command)
+            done = time.monotonic()
+            if self._log_callback:
+                self._log_callback("TX", command)
+            return done
+        except Exception as e:
+            if self._log_callback:
+                self._log_callback("ERR", f"紧急发送失败: {e}")
+            raise SCPIError(f"发送命令失败: {e}") from e
+
     def query(self, command: str) -> str:
         """查询命令（有返回值）"""
-        with self._lock:
+        with self._hold():
             if not self._transport.is_open():
                 raise SCPIError("设备未连接")
 
             try:
                 if self._log_callback:
                     self._log_callback("TX", command)
-                self._transport.write_line(command)
+                self._write(command)
 
                 response = self._transport.read_line()
                 if self._log_callback:
@@ -55,6 +148,101 @@ class SCPIClient:
                     self._log_callback("ERR", f"查询失败: {e}")
                 raise SCPIError(f"查询命令失败: {e}") from e
 
+    def query_many(self, commands: list[str], compound: bool = False, pipelined: bool = False) -> list[str]:
+        """批量查询，整个批次只占用一次锁
+
+        Args:
+            commands: 查询命令列表，例如 ['MEAS:VOLT?', 'MEAS:CURR?']
+            compound: True 时以 ';:' 拼成一条 SCPI 复合命令发送，设备在一行内以 ';' 分隔返回全部结果
+            pipelined: True 时先连续写出全部命令，再依次读取各自的应答（一次往返）；
+                两者均为 False 时逐条发送并读取应答
+
+        Returns:
+            与 commands 一一对应的应答列表
+        """
+        with self._hold():
+            if not self._transport.is_open():
+                raise SCPIError("设备未连接")
+
+            try:
+                if compound:
+                    line = ";:".join(commands)
+                    if self._log_callback:
+                        self._log_callback("TX", line)
+                    self._write(line)
+                    response = self._transport.read_line()
+                    if self._log_callback:
+                        self._log_callback("RX", response)
+                    parts = [x.strip() for x in response.split(";")]
+                    if len(parts) != len(commands):
+                        raise SCPIError(f"复合查询应答数量不符：期望 {len(commands)}，实际 {len(parts)}")
+                    return parts
+
+                if pipelined:
+                    if self._log_callback:
+                        for command in commands:
+                            self._log_callback("TX", command)
+                    with self._write_lock:
+                        self._transport.write_lines(commands)
+                    try:
+                        responses = self._transport.read_lines(len(commands))
+                    except Exception as e:
+                        # 读到一部分后超时：其余应答稍后才到，丢弃它们以免与之后的查询错位
+                        self._resync(late_replies=isinstance(e, TimeoutError))
+                        raise
+                    if self._log_callback:
+                        for response in responses:
+                            self._log_callback("RX", response)
+                    return responses
+
+                responses: list[str] = []
+                for command in commands:
+                    if self._log_callback:
+                        self._log_callback("TX", command)
+                    self._write(command)
+                    response = self._transport.read_line()
+                    if self._log_callback:
+                        self._log_callback("RX", response)
+                    responses.append(response)
+                return responses
+            except SCPIError as e:
+                if self._log_callback:
+                    self._log_callback("ERR", f"批量查询失败: {e}")
+                raise
+            except Exception as e:
+                if self._log_callback:
+                    self._log_callback("ERR", f"批量查询失败: {e}")
+                raise SCPIError(f"批量查询失败: {e}") from e
+
+    def clear_input(self, late_replies: bool = False) -> None:
+        """丢弃尚未读取的应答，用于查询失败后重新同步
+
+        Args:
+            late_replies: True 时先读取并丢弃迟到的应答，直到一个超时周期内
+                不再有数据。用于读取超时之后：设备可能仍在返回被放弃的应答，
+                只清空已到达的数据不足以避免之后的查询错位
+        """
+        with self._hold():
+            self._resync(late_replies)
+
+    def _resync(self, late_replies: bool) -> None:
+        """清空接收端（调用方已持有事务锁）"""
+        if late_replies:
+            self._discard_late_replies()
+        try:
+            self._transport.clear_input()
+        except Exception:
+            pass
+
+    def _discard_late_replies(self) -> None:
+        for _ in range(self.MAX_LATE_REPLIES):
+            try:
+                line = self._transport.read_line()
+            except Exception:
+                return
+            if self._log_callback:
+                self._log_callback("ERR", f"丢弃迟到的应答: {line}")
+
     def is_connected(self) -> bool:
         """检查是否已连接"""
         return self._transport.is_open()
@@ -0,0 +1,583 @@
+"""波形/会话数据导入：按页惰性读取"""
+from __future__ import annotations
+
+import csv
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .recording_manager import open_binary_recording
+from .samples import SAMPLE_COLUMNS
+
+# 各数值列在表头中的候选名称（先精确匹配，再包含匹配）
+COLUMN_CANDIDATES = {
+    "t": ["时间"],
+    "v": ["电压(V)", "电压"],
+    "i": ["电流(A)", "电流"],
+    "p": ["功率(W)", "功率"],
+    "r": ["内阻(Ω)", "内阻", "内阻(Ohm)"],
+}
+
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S")
+
+# 可交给 numpy datetime64 整列解析的时间格式（日期与时间之间为空格，位于第 10 个字节）
+_ISO_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,6})?$")
+
+# 无时间列时的默认采样间隔 (s)
+DEFAULT_ROW_INTERVAL_S = 0.2
+
+
+class ImportFormatError(ValueError):
+    """导入文件格式不符合要求"""
+
+
+def find_column(header_cells: list[str], candidates: list[str]) -> int | None:
+    for c in candidates:
+        for idx, h in enumerate(header_cells):
+            if h == c:
+                return idx
+    for c in candidates:
+        for idx, h in enumerate(header_cells):
+            if c in h:
+                return idx
+    return None
+
+
+def map_columns(header_cells: list[str]) -> list[int | None]:
+    """按 t, v, i, p, r 顺序返回列下标；缺少数值列时抛出 ImportFormatError"""
+    cells = [str(x).strip() for x in header_cells]
+    indices = [find_column(cells, COLUMN_CANDIDATES[name]) for name in SAMPLE_COLUMNS]
+    if None in indices[1:]:
+        raise ImportFormatError("文件缺少必要列（电压/电流/功率/内阻），无法导入")
+    return indices
+
+
+def parse_timestamp(text: object) -> datetime | None:
+    s = str(text).strip()
+    if not s:
+        return None
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def detect_timestamp_format(text: object) -> str | None:
+    """返回能解析该时间文本的 strptime 格式"""
+    s = str(text).strip()
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            datetime.strptime(s, fmt)
+            return fmt
+        except ValueError:
+            pass
+    return None
+
+
+def parse_float_column(cells: np.ndarray) -> np.ndarray:
+    """把字节串列整体转换为 float64；含非法值时逐个转换并以 NaN 代替"""
+    try:
+        return cells.astype(np.float64)
+    except ValueError:
+        out = np.full(len(cells), np.nan, dtype=np.float64)
+        for k, c in enumerate(cells.tolist()):
+            try:
+                out[k] = float(c)
+            except ValueError:
+                pass
+        return out
+
+
+class ImportSource(ABC):
+    """导入数据源：行数已知，按行区间读取 (n, 5) 数值块 (t, v, i, p, r)
+
+    t 为 epoch 秒：以导入时刻为起点，加上文件中相对首行的时间偏移。
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """总行数"""
+
+    @abstractmethod
+    def read_rows(self, start: int, stop: int, use_cache: bool = True) -> np.ndarray:
+        """读取 [start, stop) 行，返回 (n, 5) 数组"""
+
+    def row(self, row: int) -> np.ndarray:
+        return self.read_rows(row, row + 1)[0]
+
+    def close(self) -> None:
+        pass
+
+
+class ArrayImportSource(ImportSource):
+    """已完整读入内存的数据"""
+
+    def __init__(self, block: np.ndarray):
+        self._block = np.asarray(block, dtype=np.float64).reshape(-1, len(SAMPLE_COLUMNS))
+
+    def __len__(self) -> int:
+        return len(self._block)
+
+    def read_rows(self, start: int, stop: int, use_cache: bool = True) -> np.ndarray:
+        return self._block[start:stop]
+
+
+class BinaryImportSource(ImportSource):
+    """二进制会话文件，内存映射后按需切片，打开几乎不耗时"""
+
+    def __init__(self, path: Path, base_time: float):
+        self._records = open_binary_recording(Path(path))
+        self._offset = base_time - float(self._records["t"][0]) if len(self._records) else 0.0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def read_rows(self, start: int, stop: int, use_cache: bool = True) -> np.ndarray:
+        rec = self._records[start:stop]
+        block = np.empty((len(rec), len(SAMPLE_COLUMNS)), dtype=np.float64)
+        for col, name in enumerate(SAMPLE_COLUMNS):
+            block[:, col] = rec[name]
+        block[:, 0] += self._offset
+        return block
+
+
+class CsvImportSource(ImportSource):
+    """CSV 文件：打开时扫描一次建立行偏移索引，数值按页解析并缓存
+
+    索引只记录每页首行的字节偏移（每 PAGE_ROWS 行一项），2 GB 的文件也只
+    需几千个整数；空行（去掉换行后长度不超过 1 字节）不计入行号。
+    """
+
+    PAGE_ROWS = 4096
+    CACHE_PAGES = 64
+    SCAN_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, path: Path, base_time: float):
+        self._path = Path(path)
+        self._base_time = float(base_time)
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._file = open(self._path, "rb")
+        try:
+            header = self._file.readline()
+            cells = next(csv.reader([header.decode("utf-8-sig")]), [])
+            self._columns = map_columns(cells)
+            self._file_size = os.path.getsize(self._path)
+            self._field_count = len(cells)
+            self._page_offsets, self._rows = self._build_index(len(header))
+            self._detect_timestamps()
+        except Exception:
+            self._file.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._cache.clear()
+
+    def _build_index(self, data_start: int) -> tuple[np.ndarray, int]:
+        offsets: list[np.ndarray] = []
+        rows = 0
+        pending = data_start  # 当前未结束行的起始偏移
+        pos = data_start
+        self._file.seek(data_start)
+        while True:
+            chunk = self._file.read(self.SCAN_BYTES)
+            if not chunk:
+                break
+            nl = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 0x0A) + pos
+            pos += len(chunk)
+            if not len(nl):
+                continue
+            starts = np.empty(len(nl), dtype=np.int64)
+            starts[0] = pending
+            starts[1:] = nl[:-1] + 1
+            valid = starts[(nl - starts) > 1]
+            if len(valid):
+                k = np.arange(rows, rows + len(valid))
+                offsets.append(valid[k % self.PAGE_ROWS == 0])
+                rows += len(valid)
+            pending = int(nl[-1]) + 1
+        if self._file_size - pending > 1:
+            # 末行没有换行符
+            if rows % self.PAGE_ROWS == 0:
+                offsets.append(np.array([pending], dtype=np.int64))
+            rows += 1
+        page_offsets = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int64)
+        return page_offsets, rows
+
+    def _read_page(self, page: int) -> bytes:
+        start = int(self._page_offsets[page])
+        end = int(self._page_offsets[page + 1]) if page + 1 < len(self._page_offsets) else self._file_size
+        self._file.seek(start)
+        return self._file.read(end - start)
+
+    def _detect_timestamps(self) -> None:
+        """在首页中找到第一个有效时间，确定时间格式与相对时间的基准"""
+        self._base_dt: datetime | None = None
+        self._ts_format: str | None = None
+        self._ts_vectorized = False
+        idx_t = self._columns[0]
+        if not self._rows or idx_t is None:
+            return
+        for row in csv.reader(line.decode("utf-8", errors="replace") for line in self._read_page(0).split(b"\n") if len(line) > 1):
+            if idx_t >= len(row):
+                continue
+            fmt = detect_timestamp_format(row[idx_t])
+            if fmt is not None:
+                self._ts_format = fmt
+                self._base_dt = datetime.strptime(row[idx_t].strip(), fmt)
+                self._ts_vectorized = bool(_ISO_TIMESTAMP.match(row[idx_t].strip()))
+                return
+
+    def _parse_page_bytes(self, data: bytes, first_row: int) -> np.ndarray:
+        data = data.replace(b"\r", b"")
+        if b'"' not in data and b"\n\n" not in data and not data.startswith(b"\n"):
+            body = data[:-1] if data.endswith(b"\n") else data
+            n = body.count(b"\n") + 1 if body else 0
+            fields = body.replace(b"\n", b",").split(b",") if body else []
+            if len(fields) == n * self._field_count:
+                return self._parse_fields(fields, n, first_row)
+        return self._parse_lines_rowwise([line for line in data.split(b"\n") if len(line) > 1], first_row)
+
+    def _parse_fields(self, fields: list[bytes], n: int, first_row: int) -> np.ndarray:
+        """整页向量化解析：fields 为按行展开的全部字段"""
+        step = self._field_count
+        idx_t, idx_v, idx_i, idx_p, idx_r = self._columns
+        out = np.empty((n, len(SAMPLE_COLUMNS)), dtype=np.float64)
+        for col, idx in ((1, idx_v), (2, idx_i), (3, idx_p), (4, idx_r)):
+            cells = fields[idx::step]
+            try:
+                out[:, col] = list(map(float, cells))
+            except ValueError:
+                out[:, col] = parse_float_column(np.array(cells))
+
+        default_t = self._base_time + (first_row + np.arange(n)) * DEFAULT_ROW_INTERVAL_S
+        if idx_t is None or self._base_dt is None:
+            out[:, 0] = default_t
+        elif self._ts_vectorized:
+            out[:, 0] = self._parse_time_column(np.array(fields[idx_t::step]), default_t)
+        else:
+            out[:, 0] = [
+                self._row_time(c.decode("utf-8", errors="replace"), d)
+                for c, d in zip(fields[idx_t::step], default_t)
+            ]
+        return out
+
+    def _parse_time_column(self, cells: np.ndarray, default_t: np.ndarray) -> np.ndarray:
+        """整列解析 'YYYY-mm-dd HH:MM:SS[.ffffff]' 格式的时间"""
+        iso = np.ascontiguousarray(cells)
+        width = iso.dtype.itemsize
+        if width >= 11:
+            iso = iso.copy()
+            iso.view(np.uint8).reshape(len(iso), width)[:, 10] = ord("T")
+        try:
+            stamps = iso.astype("datetime64[us]")
+        except ValueError:
+            return np.array(
+                [self._row_time(c.decode("utf-8", errors="replace"), d) for c, d in zip(cells.tolist(), default_t)]
+            )
+        base = np.datetime64(self._base_dt, "us")
+        rel = (stamps - base).astype(np.float64) / 1e6
+        return np.where(np.isnat(stamps), np.nan, self._base_time + rel)
+
+    def _row_time(self, text: str, default: float) -> float:
+        """解析一个时间单元格；文件有时间列而本格无法解析时返回 NaN（该行无效）"""
+        s = text.strip()
+        try:
+            dt = datetime.strptime(s, self._ts_format) if self._ts_format else None
+        except ValueError:
+            dt = parse_timestamp(s)
+        if self._base_dt is None:
+            return float(default)
+        if dt is None:
+            return np.nan
+        return self._base_time + (dt - self._base_dt).total_seconds()
+
+    def _parse_lines_rowwise(self, lines: list[bytes], first_row: int) -> np.ndarray:
+        idx_t, idx_v, idx_i, idx_p, idx_r = self._columns
+        out = np.full((len(lines), len(SAMPLE_COLUMNS)), np.nan, dtype=np.float64)
+        for k, row in enumerate(csv.reader(line.decode("utf-8", errors="replace") for line in lines)):
+            for col, idx in ((1, idx_v), (2, idx_i), (3, idx_p), (4, idx_r)):
+                try:
+                    out[k, col] = float(row[idx])
+                except (ValueError, IndexError):
+                    pass
+            default = self._base_time + (first_row + k) * DEFAULT_ROW_INTERVAL_S
+            if idx_t is not None and idx_t < len(row):
+                out[k, 0] = self._row_time(row[idx_t], default)
+            else:
+                out[k, 0] = default
+        return out
+
+    def _page(self, page: int, use_cache: bool) -> np.ndarray:
+        cached = self._cache.get(page)
+        if cached is not None:
+            self._cache.move_to_end(page)
+            return cached
+        block = self._parse_page_bytes(self._read_page(page), page * self.PAGE_ROWS)
+        expected = min(self.PAGE_ROWS, self._rows - page * self.PAGE_ROWS)
+        if len(block) != expected:
+            # 文件在索引建立后被修改：按索引的行数截断或补 NaN，保持行号稳定
+            fixed = np.full((expected, len(SAMPLE_COLUMNS)), np.nan, dtype=np.float64)
+            fixed[: min(expected, len(block))] = block[:expected]
+            block = fixed
+        if use_cache:
+            self._cache[page] = block
+            if len(self._cache) > self.CACHE_PAGES:
+                self._cache.popitem(last=False)
+        return block
+
+    def read_rows(self, start: int, stop: int, use_cache: bool = True) -> np.ndarray:
+        start = max(0, start)
+        stop = min(self._rows, stop)
+        if stop <= start:
+            return np.empty((0, len(SAMPLE_COLUMNS)), dtype=np.float64)
+        p0 = start // self.PAGE_ROWS
+        p1 = (stop - 1) // self.PAGE_ROWS
+        with self._lock:
+            pages = [self._page(p, use_cache) for p in range(p0, p1 + 1)]
+        block = pages[0] if len(pages) == 1 else np.concatenate(pages)
+        offset = p0 * self.PAGE_ROWS
+        return block[start - offset : stop - offset]
+
+
+class FilteredImportSource(ImportSource):
+    """数据源的有效行视图：只保留数值与时间均有效的行，时间列单调不减
+
+    Args:
+        source: 原数据源，由本视图接管关闭
+        rows: 保留行在原数据源中的行号（升序），None 表示全部保留
+        t: 替换后的时间列（与保留行一一对应），None 表示沿用原数据源的时间
+    """
+
+    def __init__(self, source: ImportSource, rows: np.ndarray | None, t: np.ndarray | None):
+        self.source = source
+        self._rows = rows
+        self._t = t
+
+    def __len__(self) -> int:
+        if self._rows is not None:
+            return len(self._rows)
+        return len(self._t) if self._t is not None else len(self.source)
+
+    def read_rows(self, start: int, stop: int, use_cache: bool = True) -> np.ndarray:
+        start = max(0, start)
+        stop = min(len(self), stop)
+        if stop <= start:
+            return np.empty((0, len(SAMPLE_COLUMNS)), dtype=np.float64)
+        if self._rows is None:
+            block = self.source.read_rows(start, stop, use_cache).copy()
+        else:
+            rows = self._rows[start:stop]
+            first = int(rows[0])
+            block = self.source.read_rows(first, int(rows[-1]) + 1, use_cache)[rows - first]
+        if self._t is not None:
+            block[:, 0] = self._t[start:stop]
+        return block
+
+    def close(self) -> None:
+        self.source.close()
+
+
+class ImportCanceled(Exception):
+    pass
+
+
+def load_xlsx_source(
+    path: Path,
+    base_time: float,
+    progress: Callable[[int, int], None] | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+) -> ArrayImportSource:
+    """以只读流式模式读取 Excel 文件的活动工作表
+
+    只读模式逐行解析 XML，不在内存中构建完整的单元格对象树。
+
+    Args:
+        progress: 进度回调 (已读行数, 总行数)，总行数取自工作表尺寸信息，未知时为 0
+        should_cancel: 返回 True 时中止读取并抛出 ImportCanceled
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        total = max(0, int(ws.max_row or 0) - 1)
+
+        rows_iter = ws.iter_rows(values_only=True)
+        header_row = next(rows_iter, None)
+        if not header_row:
+            raise ImportFormatError("文件为空")
+        idx_t, idx_v, idx_i, idx_p, idx_r = map_columns([str(x) if x is not None else "" for x in header_row])
+
+        rows: list[tuple[float, float, float, float, float]] = []
+        base_dt: datetime | None = None
+        for idx, row in enumerate(rows_iter):
+            if idx % 10000 == 0:
+                if should_cancel is not None and should_cancel():
+                    raise ImportCanceled()
+                if progress is not None:
+                    progress(min(idx, total), total)
+            if not row:
+                continue
+            try:
+                v = float(row[idx_v])
+                i = float(row[idx_i])
+                p = float(row[idx_p])
+                r = float(row[idx_r])
+
+                dt = parse_timestamp(row[idx_t]) if idx_t is not None and idx_t < len(row) else None
+                if dt is not None:
+                    if base_dt is None:
+                        base_dt = dt
+                    t = (dt - base_dt).total_seconds()
+                else:
+                    t = idx * DEFAULT_ROW_INTERVAL_S
+
+                rows.append((base_time + t, v, i, p, r))
+            except (ValueError, TypeError, IndexError):
+                continue
+    finally:
+        wb.close()
+    return ArrayImportSource(np.asarray(rows, dtype=np.float64).reshape(-1, len(SAMPLE_COLUMNS)))
+
+
+def open_import_source(
+    path: Path,
+    base_time: float,
+    progress: Callable[[int, int], None] | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+) -> ImportSource:
+    """按扩展名打开导入数据源（progress/should_cancel 仅用于需要整体读入的 Excel 文件）"""
+    ext = Path(path).suffix.lower()
+    if ext == ".csv":
+        return CsvImportSource(path, base_time)
+    if ext == ".bin":
+        return BinaryImportSource(path, base_time)
+    if ext in (".xlsx", ".xls"):
+        return load_xlsx_source(path, base_time, progress, should_cancel)
+    raise ImportFormatError("仅支持 CSV、Excel 和二进制会话文件")
+
+
+class SessionImportWorker(QThread):
+    """后台导入线程
+
+    先打开数据源（CSV 建立行偏移索引、二进制文件内存映射），随后在本线程内
+    按块读出数值，把有效行（数值与时间均可解析）依次压紧填入预先分配的列
+    数组，读完后经 ``columns_loaded`` 一次性交给曲线（取消时交出已读部分）。
+    与原先逐行导入一致，无效行被跳过；时间列强制单调不减，以免乱序时间破坏
+    曲线的二分查找。
+
+    读到第一个有效行时通过 ``opened`` 把数据源交给表格；跳过了行或调整了时间
+    时，读完后再经 ``filtered`` 交出只含有效行的视图（FilteredImportSource）。
+    文件中没有有效数据时关闭数据源，直接以 ``succeeded(0)`` 结束，不发出上述
+    信号，当前会话保持不变。
+    """
+
+    opened = pyqtSignal(object)  # ImportSource
+    filtered = pyqtSignal(object)  # FilteredImportSource
+    columns_loaded = pyqtSignal(object)  # np.ndarray (5, n)：t, v, i, p, r
+    progress = pyqtSignal(int, int)  # done, total
+    succeeded = pyqtSignal(int)  # 有效行数
+    failed = pyqtSignal(str)
+    canceled = pyqtSignal()
+
+    FILL_ROWS = 65536
+
+    def __init__(self, path: str, base_time: float):
+        super().__init__()
+        self._path = Path(path)
+        self._base_time = base_time
+        self._cancel = False
+
+    def cancel(self) -> None:
+        self._cancel = True
+
+    def run(self) -> None:
+        try:
+            source = open_import_source(
+                self._path, self._base_time, progress=self.progress.emit, should_cancel=lambda: self._cancel
+            )
+        except ImportCanceled:
+            self.canceled.emit()
+            return
+        except ImportError:
+            self.failed.emit("读取 Excel 文件需要安装 openpyxl 库\n请运行: pip install openpyxl")
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        total = len(source)
+        columns = np.empty((len(SAMPLE_COLUMNS), total), dtype=np.float64)
+        kept_rows: list[np.ndarray] = []  # 各块保留行的行号，全部保留时不使用
+        done = 0
+        kept = 0
+        opened = False
+        try:
+            while done < total:
+                if self._cancel:
+                    break
+                block = source.read_rows(done, min(total, done + self.FILL_ROWS), use_cache=False)
+                if not len(block):
+                    break
+                valid = np.isfinite(block).all(axis=1)
+                n = int(np.count_nonzero(valid))
+                if n == len(block):
+                    columns[:, kept : kept + n] = block.T
+                    kept_rows.append(np.arange(done, done + n))
+                else:
+                    columns[:, kept : kept + n] = block[valid].T
+                    kept_rows.append(np.flatnonzero(valid) + done)
+                done += len(block)
+                kept += n
+                if n and not opened:
+                    self.opened.emit(source)
+                    opened = True
+                self.progress.emit(done, total)
+        except Exception as e:
+            if not opened:
+                source.close()
+            self.failed.emit(str(e))
+            return
+
+        if not opened:
+            source.close()
+            if self._cancel:
+                self.canceled.emit()
+            else:
+                self.succeeded.emit(0)
+            return
+
+        columns = columns if kept == total else columns[:, :kept].copy()
+        t = columns[0]
+        retimed = kept > 1 and bool((t[1:] < t[:-1]).any())
+        if retimed:
+            np.maximum.accumulate(t, out=t)
+        if self._cancel:
+            self.columns_loaded.emit(columns)
+            self.canceled.emit()
+            return
+        if kept < done or retimed:
+            rows = np.concatenate(kept_rows) if kept < done else None
+            # 曲线取得 columns 的所有权，视图保留一份时间列
+            self.filtered.emit(FilteredImportSource(source, rows, t.copy() if retimed else None))
+        self.columns_loaded.emit(columns)
+        self.succeeded.emit(kept)
@@ -1,5 +1,13 @@
+from .async_transport import AsyncSerialTransport, AsyncTcpTransport, AsyncTransport
 from .base import Transport
 from .serial_transport import SerialTransport
 from .tcp_transport import TcpTransport
 
-__all__ = ["Transport", "SerialTransport", "TcpTransport"]
+__all__ = [
+    "Transport",
+    "SerialTransport",
+    "TcpTransport",
+    "AsyncTransport",
+    "AsyncSerialTransport",
+    "AsyncTcpTransport",
+]
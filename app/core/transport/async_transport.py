@@ -0,0 +1,218 @@
+"""asyncio 传输层实现"""
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+
+import serial
+
+from ..exceptions import ConnectionError, TimeoutError, TransportError
+
+
+class AsyncTransport(ABC):
+    """asyncio 传输层抽象基类
+
+    与 ``Transport`` 的接口一一对应，但所有 I/O 均为协程，不占用额外线程；
+    一个事件循环即可同时驱动多台设备。
+    """
+
+    _timeout_ms: int = 2000
+
+    @abstractmethod
+    async def open(self) -> None:
+        """打开连接"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """关闭连接"""
+
+    @abstractmethod
+    async def write_line(self, data: str) -> None:
+        """发送一行数据（自动添加换行符）"""
+
+    @abstractmethod
+    async def read_line(self) -> str:
+        """读取一行数据（读到换行符或超时）"""
+
+    async def clear_input(self) -> None:
+        """丢弃接收缓冲区中尚未读取的数据"""
+
+    @abstractmethod
+    def is_open(self) -> bool:
+        """检查连接是否打开"""
+
+    @property
+    def timeout_ms(self) -> int:
+        """获取超时时间（毫秒）"""
+        return self._timeout_ms
+
+    @timeout_ms.setter
+    def timeout_ms(self, value: int) -> None:
+        self._timeout_ms = value
+
+
+class AsyncTcpTransport(AsyncTransport):
+    """基于 asyncio.open_connection 的 TCP 传输
+
+    StreamReader 自带接收缓冲，一次到达的多行应答会保留给后续读取。
+    """
+
+    def __init__(self, host: str, port: int, timeout_ms: int = 2000):
+        self._host = host
+        self._port = port
+        self._timeout_ms = timeout_ms
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def open(self) -> None:
+        """打开 TCP 连接"""
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), self._timeout_ms / 1000.0
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ConnectionError(f"无法连接到 {self._host}:{self._port}: {e}") from e
+
+    async def close(self) -> None:
+        """关闭 TCP 连接"""
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        if writer:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def write_line(self, data: str) -> None:
+        """发送一行数据"""
+        if not self._writer:
+            raise TransportError("TCP 连接未打开")
+        try:
+            self._writer.write((data + "\n").encode("ascii"))
+            await self._writer.drain()
+        except OSError as e:
+            raise TransportError(f"TCP 写入失败: {e}") from e
+
+    async def read_line(self) -> str:
+        """读取一行数据"""
+        if not self._reader:
+            raise TransportError("TCP 连接未打开")
+        try:
+            line = await asyncio.wait_for(self._reader.readuntil(b"\n"), self._timeout_ms / 1000.0)
+            return line.decode("ascii").strip()
+        except asyncio.TimeoutError as e:
+            raise TimeoutError("TCP 读取超时") from e
+        except asyncio.IncompleteReadError as e:
+            raise TimeoutError("TCP 连接断开") from e
+        except asyncio.LimitOverrunError as e:
+            raise TransportError(f"TCP 应答过长: {e}") from e
+        except OSError as e:
+            raise TransportError(f"TCP 读取失败: {e}") from e
+        except UnicodeDecodeError as e:
+            raise TransportError(f"数据解码失败: {e}") from e
+
+    async def clear_input(self) -> None:
+        """丢弃已到达但未读取的数据"""
+        if not self._reader:
+            return
+        try:
+            while True:
+                chunk = await asyncio.wait_for(self._reader.read(4096), 0.05)
+                if not chunk:
+                    break
+        except (asyncio.TimeoutError, OSError):
+            pass
+
+    def is_open(self) -> bool:
+        """检查 TCP 连接是否打开"""
+        return self._writer is not None and not self._writer.is_closing()
+
+
+class AsyncSerialTransport(AsyncTransport):
+    """非阻塞串口适配器
+
+    串口以 timeout=0 打开，读取只取走驱动中已到达的字节；没有完整一行时让出
+    事件循环并短暂等待后再查询，不为每个串口单独开线程（Windows 上同样可用）。
+    """
+
+    POLL_INTERVAL_S = 0.002
+
+    def __init__(self, port: str, baudrate: int = 115200, timeout_ms: int = 2000):
+        self._port = port
+        self._baudrate = baudrate
+        self._timeout_ms = timeout_ms
+        self._serial: serial.Serial | None = None
+        self._buffer = bytearray()
+
+    async def open(self) -> None:
+        """打开串口连接"""
+        try:
+            self._serial = serial.Serial(
+                port=self._port,
+                baudrate=self._baudrate,
+                bytesize=serial.EIGHTBITS,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                timeout=0,
+                write_timeout=self._timeout_ms / 1000.0,
+            )
+        except serial.SerialException as e:
+            raise ConnectionError(f"无法打开串口 {self._port}: {e}") from e
+        self._buffer.clear()
+
+    async def close(self) -> None:
+        """关闭串口连接"""
+        if self._serial and self._serial.is_open:
+            self._serial.close()
+        self._serial = None
+        self._buffer.clear()
+
+    async def write_line(self, data: str) -> None:
+        """发送一行数据"""
+        if not self._serial or not self._serial.is_open:
+            raise TransportError("串口未打开")
+        try:
+            self._serial.write((data + "\n").encode("ascii"))
+        except serial.SerialException as e:
+            raise TransportError(f"串口写入失败: {e}") from e
+
+    async def read_line(self) -> str:
+        """读取一行数据"""
+        if not self._serial or not self._serial.is_open:
+            raise TransportError("串口未打开")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._timeout_ms / 1000.0
+        try:
+            while True:
+                pos = self._buffer.find(b"\n")
+                if pos >= 0:
+                    line = bytes(self._buffer[:pos])
+                    del self._buffer[: pos + 1]
+                    return line.decode("ascii").strip()
+                waiting = self._serial.in_waiting
+                if waiting:
+                    self._buffer += self._serial.read(waiting)
+                    continue
+                if loop.time() >= deadline:
+                    raise TimeoutError("串口读取超时")
+                await asyncio.sleep(self.POLL_INTERVAL_S)
+        except serial.SerialException as e:
+            raise TransportError(f"串口读取失败: {e}") from e
+        except UnicodeDecodeError as e:
+            raise TransportError(f"数据解码失败: {e}") from e
+
+    async def clear_input(self) -> None:
+        """清空串口接收缓冲区"""
+        self._buffer.clear()
+        if not self._serial or not self._serial.is_open:
+            return
+        try:
+            self._serial.reset_input_buffer()
+        except serial.SerialException:
+            pass
+
+    def is_open(self) -> bool:
+        """检查串口是否打开"""
+        return self._serial is not None and self._serial.is_open
@@ -25,6 +25,19 @@ class Transport(ABC):
         """读取一行数据（读到换行符或超时）"""
         pass
 
+    def write_lines(self, lines: list[str]) -> None:
+        """连续发送多行数据（不等待应答）"""
+        for line in lines:
+            self.write_line(line)
+
+    def read_lines(self, count: int) -> list[str]:
+        """依次读取 count 行数据"""
+        return [self.read_line() for _ in range(count)]
+
+    def clear_input(self) -> None:
+        """丢弃接收缓冲区中尚未读取的数据（用于应答错位后的重新同步）"""
+        pass
+
     @abstractmethod
     def is_open(self) -> bool:
         """检查连接是否打开"""
@@ -63,6 +63,15 @@ class SerialTransport(Transport):
         except UnicodeDecodeError as e:
             raise TransportError(f"数据解码失败: {e}") from e
 
+    def clear_input(self) -> None:
+        """清空串口接收缓冲区"""
+        if not self._serial or not self._serial.is_open:
+            return
+        try:
+            self._serial.reset_input_buffer()
+        except serial.SerialException:
+            pass
+
     def is_open(self) -> bool:
         """检查串口是否打开"""
         return self._serial is not None and self._serial.is_open
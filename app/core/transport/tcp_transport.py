@@ -8,13 +8,24 @@ from .base import Transport
 
 
 class TcpTransport(Transport):
-    """TCP Socket 传输实现"""
+    """TCP Socket 传输实现
+
+    接收数据先进入持久的接收缓冲区（bytearray + 读游标），一次 recv 收到的
+    多行应答会保留到后续读取，不会被丢弃；recv_into 直接写入预分配的
+    memoryview，长应答的拼接为线性开销。
+    """
+
+    RECV_CHUNK = 65536
 
     def __init__(self, host: str, port: int, timeout_ms: int = 2000):
         self._host = host
         self._port = port
         self._timeout_ms = timeout_ms
         self._socket: socket.socket | None = None
+        self._rx = bytearray()
+        self._rx_pos = 0  # 接收缓冲区中下一个未读字节的位置
+        self._chunk = bytearray(self.RECV_CHUNK)
+        self._chunk_view = memoryview(self._chunk)
 
     def open(self) -> None:
         """打开 TCP 连接"""
@@ -24,6 +35,7 @@ class TcpTransport(Transport):
             self._socket.connect((self._host, self._port))
         except socket.error as e:
             raise ConnectionError(f"无法连接到 {self._host}:{self._port}: {e}") from e
+        self._reset_rx()
 
     def close(self) -> None:
         """关闭 TCP 连接"""
@@ -33,39 +45,102 @@ class TcpTransport(Transport):
             except socket.error:
                 pass
         self._socket = None
+        self._reset_rx()
+
+    def _reset_rx(self) -> None:
+        self._rx.clear()
+        self._rx_pos = 0
 
     def write_line(self, data: str) -> None:
         """发送一行数据"""
+        self.write_lines([data])
+
+    def write_lines(self, lines: list[str]) -> None:
+        """连续发送多行数据，合并为一次 sendall"""
         if not self._socket:
             raise TransportError("TCP 连接未打开")
 
         try:
-            line = data + "\n"
-            self._socket.sendall(line.encode("ascii"))
+            payload = "".join(line + "\n" for line in lines)
+            self._socket.sendall(payload.encode("ascii"))
         except socket.error as e:
             raise TransportError(f"TCP 写入失败: {e}") from e
 
     def read_line(self) -> str:
-        """读取一行数据"""
+        """读取一行数据，同一次接收中多余的数据保留给后续读取"""
+        return self.read_lines(1)[0]
+
+    def read_lines(self, count: int) -> list[str]:
+        """依次读取 count 行数据"""
         if not self._socket:
             raise TransportError("TCP 连接未打开")
 
+        lines: list[str] = []
+        search = self._rx_pos  # 已确认不含换行符的部分不再重复扫描
         try:
-            buffer = b""
-            while b"\n" not in buffer:
-                chunk = self._socket.recv(1024)
-                if not chunk:
-                    raise TimeoutError("TCP 读取超时或连接断开")
-                buffer += chunk
-
-            line = buffer.split(b"\n", 1)[0]
-            return line.decode("ascii").strip()
+            while len(lines) < count:
+                end = self._rx.find(b"\n", search)
+                if end < 0:
+                    search = len(self._rx)
+                    self._fill()
+                    continue
+                line = bytes(self._rx[self._rx_pos : end])
+                self._rx_pos = end + 1
+                search = self._rx_pos
+                lines.append(line.decode("ascii").strip())
+            return lines
         except socket.timeout as e:
             raise TimeoutError("TCP 读取超时") from e
         except socket.error as e:
             raise TransportError(f"TCP 读取失败: {e}") from e
         except UnicodeDecodeError as e:
             raise TransportError(f"数据解码失败: {e}") from e
+        finally:
+            self._compact_rx()
+
+    def read_available_lines(self) -> list[str]:
+        """返回接收缓冲区中已完整到达的所有行（不阻塞等待新数据）"""
+        lines: list[str] = []
+        while True:
+            end = self._rx.find(b"\n", self._rx_pos)
+            if end < 0:
+                break
+            lines.append(bytes(self._rx[self._rx_pos : end]).decode("ascii", errors="replace").strip())
+            self._rx_pos = end + 1
+        self._compact_rx()
+        return lines
+
+    def _fill(self) -> None:
+        """从 socket 接收一批数据追加到接收缓冲区"""
+        n = self._socket.recv_into(self._chunk_view)
+        if n == 0:
+            raise TimeoutError("TCP 读取超时或连接断开")
+        self._rx += self._chunk_view[:n]
+
+    def _compact_rx(self) -> None:
+        if self._rx_pos == len(self._rx):
+            self._reset_rx()
+        elif self._rx_pos > self.RECV_CHUNK and self._rx_pos * 2 > len(self._rx):
+            # 已读部分过半时才整体前移，摊还 O(1)
+            del self._rx[: self._rx_pos]
+            self._rx_pos = 0
+
+    def clear_input(self) -> None:
+        """丢弃接收缓冲区及 socket 中已到达但未读取的数据"""
+        self._reset_rx()
+        if not self._socket:
+            return
+        try:
+            self._socket.settimeout(0.05)
+            while self._socket.recv(4096):
+                pass
+        except socket.error:
+            pass
+        finally:
+            try:
+                self._socket.settimeout(self._timeout_ms / 1000.0)
+            except socket.error:
+                pass
 
     def is_open(self) -> bool:
         """检查 TCP 连接是否打开"""
@@ -0,0 +1,14 @@
+from .dut import Battery, Dut, VoltageSource
+from .instrument import LoadSpec, SimulatedLoad
+from .server import LinkProfile, SimulatorPtyServer, SimulatorTcpServer
+
+__all__ = [
+    "Dut",
+    "VoltageSource",
+    "Battery",
+    "LoadSpec",
+    "SimulatedLoad",
+    "LinkProfile",
+    "SimulatorTcpServer",
+    "SimulatorPtyServer",
+]
@@ -0,0 +1,66 @@
+"""命令行启动模拟负载：python -m app.simulator --tcp-port 5025 --pty"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from .dut import Battery, VoltageSource
+from .instrument import SimulatedLoad
+from .server import LinkProfile, SimulatorPtyServer, SimulatorTcpServer
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="模拟电子负载（SCPI over TCP / pty 串口）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, default=5025, help="TCP 端口，-1 表示不启用")
+    parser.add_argument("--pty", action="store_true", help="同时创建 pty 虚拟串口")
+    parser.add_argument("--baudrate", type=int, default=None, help="pty 串口模拟的波特率")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--fragment", type=int, default=0, help="应答分片字节数，0 表示不分片")
+    parser.add_argument("--fragment-gap-ms", type=float, default=1.0)
+    parser.add_argument("--no-compound", action="store_true", help="不支持 ';' 复合命令")
+    parser.add_argument("--noise", type=float, default=0.0, help="测量值相对噪声（标准差）")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--dut", choices=("source", "battery"), default="source")
+    parser.add_argument("--voltage", type=float, default=12.0, help="恒压源电压 (V)")
+    parser.add_argument("--r-internal", type=float, default=None, help="内阻 (Ω)")
+    parser.add_argument("--capacity-mah", type=float, default=2000.0)
+    parser.add_argument("--cells", type=int, default=1, help="电池串联节数")
+    args = parser.parse_args(argv)
+
+    if args.dut == "battery":
+        r = 0.08 if args.r_internal is None else args.r_internal
+        dut = Battery(capacity_mah=args.capacity_mah, r_internal=r, cells=args.cells)
+    else:
+        r = 0.05 if args.r_internal is None else args.r_internal
+        dut = VoltageSource(args.voltage, r)
+    load = SimulatedLoad(dut, noise=args.noise, compound=not args.no_compound, seed=args.seed)
+    profile = LinkProfile(args.latency_ms, args.jitter_ms, args.fragment, args.fragment_gap_ms, args.seed)
+
+    servers: list = []
+    if args.tcp_port >= 0:
+        tcp = SimulatorTcpServer(load, args.host, args.tcp_port, profile).start()
+        servers.append(tcp)
+        host, port = tcp.address
+        print(f"TCP: {host}:{port}")
+    if args.pty:
+        pty = SimulatorPtyServer(load, profile, args.baudrate).start()
+        servers.append(pty)
+        print(f"串口: {pty.port}")
+    if not servers:
+        parser.error("至少启用 TCP 或 pty 之一")
+
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for s in servers:
+            s.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
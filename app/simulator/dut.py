@@ -0,0 +1,73 @@
+"""被测设备（DUT）模型"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class Dut(ABC):
+    """被测设备：以开路电压 + 内阻的戴维南等效描述"""
+
+    @abstractmethod
+    def emf(self) -> float:
+        """当前开路电压 (V)"""
+
+    @abstractmethod
+    def internal_resistance(self) -> float:
+        """当前内阻 (Ω)"""
+
+    def advance(self, dt: float, current: float) -> None:
+        """以恒定电流 current (A) 放电 dt 秒，更新内部状态"""
+
+
+class VoltageSource(Dut):
+    """带内阻的恒压源（如稳压电源、适配器）"""
+
+    def __init__(self, voltage: float = 12.0, r_internal: float = 0.05):
+        self.voltage = float(voltage)
+        self.r_internal = max(0.0, float(r_internal))
+
+    def emf(self) -> float:
+        return self.voltage
+
+    def internal_resistance(self) -> float:
+        return self.r_internal
+
+
+class Battery(Dut):
+    """电池：开路电压随放电深度沿 OCV 曲线下降，放出的电量按库仑计数
+
+    OCV 曲线为 (荷电状态, 开路电压) 的分段线性表，默认近似单节锂电池；
+    放空后开路电压停留在曲线最低点。
+    """
+
+    DEFAULT_OCV = ((0.0, 3.0), (0.05, 3.3), (0.2, 3.6), (0.5, 3.75), (0.8, 3.95), (1.0, 4.2))
+
+    def __init__(
+        self,
+        capacity_mah: float = 2000.0,
+        r_internal: float = 0.08,
+        soc: float = 1.0,
+        ocv: tuple[tuple[float, float], ...] = DEFAULT_OCV,
+        cells: int = 1,
+    ):
+        self.capacity_mah = max(1e-6, float(capacity_mah))
+        self.r_internal = max(0.0, float(r_internal)) * cells
+        self.soc = min(1.0, max(0.0, float(soc)))
+        self._ocv_soc = np.array([x for x, _ in ocv], dtype=np.float64)
+        self._ocv_v = np.array([v for _, v in ocv], dtype=np.float64) * cells
+        self.discharged_mah = 0.0
+
+    def emf(self) -> float:
+        return float(np.interp(self.soc, self._ocv_soc, self._ocv_v))
+
+    def internal_resistance(self) -> float:
+        return self.r_internal
+
+    def advance(self, dt: float, current: float) -> None:
+        if dt <= 0 or current <= 0:
+            return
+        mah = current * dt / 3.6
+        self.discharged_mah += mah
+        self.soc = max(0.0, self.soc - mah / self.capacity_mah)
@@ -0,0 +1,558 @@
+"""模拟电子负载：SCPI 状态机与工作点计算"""
+from __future__ import annotations
+
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+from .dut import Dut, VoltageSource
+
+# 长助记符缩写不符合“前 4 个字母（第 4 个为元音则取前 3 个）”规则的节点
+_SHORT_FORM_EXCEPTIONS = {
+    "ISTART": "IST",
+    "ISTA": "IST",
+    "VTRIG": "VTR",
+    "VTRI": "VTR",
+    "PTPEAK": "PTP",
+    "PTPE": "PTP",
+    "RESULT": "RES",
+    "RESU": "RES",
+    "TSTART": "TST",
+    "TSTA": "TST",
+    "INORMAL": "INOR",
+    "INORM": "INOR",
+    "POWER": "POW",
+    "BATTERY": "BATT",
+}
+# 可省略的默认节点，如 CURRent[:LEVel[:IMMediate][:AMPLitude]]、CURR:SLEW[:BOTH]
+_OPTIONAL_NODES = {"LEV", "IMM", "AMPL", "BOTH"}
+# FUNCtion 与 MODE 等效，OCP/TIMing 的 :STATe 可省略
+_HEADER_ALIASES = {"FUNC": "MODE", "OCP:STAT": "OCP", "TIM:STAT": "TIM", "SOUR:VOLT:RANG": "VOLT:RANG"}
+
+_MODES = {"CURR", "VOLT", "POW", "RES", "DYN", "LED", "LIST", "OCP", "BATT", "AUTO"}
+_NUMBER = re.compile(r"^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z/]*)$")
+_UNIT_SCALE = {"": 1.0, "V": 1.0, "A": 1.0, "W": 1.0, "S": 1.0, "OHM": 1.0, "MV": 1e-3, "MA": 1e-3, "MW": 1e-3, "MS": 1e-3}
+
+_OVERFLOW = 9.9e37  # SCPI 约定的溢出值，用于电流为零时的等效阻抗
+
+
+def short_form(node: str) -> str:
+    """SCPI 助记符转为短格式"""
+    node = node.upper()
+    if node in _SHORT_FORM_EXCEPTIONS:
+        return _SHORT_FORM_EXCEPTIONS[node]
+    if len(node) <= 4:
+        return node
+    return node[:3] if node[3] in "AEIOU" else node[:4]
+
+
+def normalize_header(header: str) -> str:
+    """规范化命令头：统一为短格式并去掉可省略节点，如 'SOURce:CURRent:LEVel' -> 'CURR'"""
+    header = header.strip().lstrip(":")
+    if header.startswith("*"):
+        return header.upper()
+    nodes = [short_form(n) for n in header.split(":") if n]
+    while len(nodes) > 1 and nodes[-1] in _OPTIONAL_NODES:
+        nodes.pop()
+    if nodes and nodes[0] == "SOUR" and len(nodes) > 1:
+        nodes = nodes[1:]
+    key = ":".join(nodes)
+    return _HEADER_ALIASES.get(key, key)
+
+
+@dataclass(frozen=True)
+class LoadSpec:
+    """模拟负载的额定参数"""
+
+    model: str = "VLOAD-SIM"
+    serial: str = "SIM000001"
+    version: str = "V1.00"
+    max_voltage: float = 150.0
+    max_current: float = 30.0
+    max_power: float = 300.0
+    max_resistance: float = 7500.0
+    min_resistance: float = 0.05
+
+
+class SimulatedLoad:
+    """模拟电子负载
+
+    按 ``电子负载SCPI指令集.md`` 解析命令（长/短格式、复合命令 ``;`` 与 ``;:``），
+    维护模式、设定值、保护、Von/Voff 等状态；每次处理命令时先按经过的时间推进
+    被测设备（电池放电），再根据工作模式求解工作点得到测量值。
+
+    不认识的命令记入错误队列（``SYST:ERR?`` 读取），不认识的查询不回复，
+    与真实设备一样会让上位机等待超时。
+    """
+
+    def __init__(
+        self,
+        dut: Dut | None = None,
+        spec: LoadSpec = LoadSpec(),
+        noise: float = 0.0,
+        compound: bool = True,
+        seed: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.dut = dut if dut is not None else VoltageSource()
+        self.spec = spec
+        self.noise = max(0.0, float(noise))
+        self.compound = compound
+        self._rng = random.Random(seed)
+        self._clock = clock
+        self._lock = threading.RLock()
+        self.errors: deque[str] = deque(maxlen=32)
+        self.input_events: deque[tuple[float, bool]] = deque(maxlen=1024)  # (时刻, 输入开关)
+        self.commands_handled = 0
+        self._handlers = self._build_handlers()
+        self.reset()
+
+    # ========== 状态 ==========
+
+    def reset(self) -> None:
+        """恢复复位值 (*RST)"""
+        with self._lock:
+            spec = self.spec
+            self.mode = "CURR"
+            self.input_on = False
+            self.short = False
+            self.remote = False
+            self.params: dict[str, float] = {
+                "CURR": 0.0,
+                "VOLT": spec.max_voltage,
+                "POW": 0.0,
+                "RES": spec.max_resistance,
+                "CURR:PROT": spec.max_current,
+                "POW:PROT": spec.max_power,
+                "VOLT:ON": 0.0,
+                "VOLT:OFF": 0.5,
+                "CURR:SLEW": 1.0,
+                "CURR:SLEW:RISE": 1.0,
+                "CURR:SLEW:FALL": 1.0,
+                "VOLT:SLEW": 0.5,
+                "CURR:RANG": spec.max_current,
+                "VOLT:RANG": spec.max_voltage,
+                "DYN:HIGH": 0.0,
+                "DYN:HIGH:DWEL": 0.00001,
+                "DYN:LOW": 0.0,
+                "DYN:LOW:DWEL": 0.00001,
+                "DYN:SLEW": 1.0,
+                "DYN:SLEW:RISE": 1.0,
+                "DYN:SLEW:FALL": 1.0,
+                "LED:VOLT": 0.0,
+                "LED:CURR": 0.0,
+                "LED:RCO": 0.0,
+                "LIST:COUN": 1.0,
+                "OCP:IST": 0.0,
+                "OCP:IEND": 0.0,
+                "OCP:STEP": 10.0,
+                "OCP:DWEL": 0.01,
+                "OCP:VTR": 0.0,
+            }
+            self.list_curr: list[float] = []
+            self.list_dwell: list[float] = []
+            self.list_step = "AUTO"
+            self.dyn_mode = "CONT"
+            self.beeper = False
+            self.sense = False
+            self.ocp_running = False
+            self.ocp_started_at: float | None = None
+            self.ocp_result = -3.0
+            self.ocp_pmax = (0.0, 0.0, 0.0)
+            self.protection_tripped = False
+            self._unloaded = False  # 电压跌破 Voff 后卸载（保持到重新打开输入）
+            self._loading = False  # 电压达到 Von 后开始带载
+            self._input_on_at = self._clock()
+            self._last_update = self._clock()
+            self._v = self.dut.emf()
+            self._i = 0.0
+            self._v_min = self._v_max = self._v
+            self._i_min = self._i_max = 0.0
+
+    def set_input(self, on: bool) -> None:
+        with self._lock:
+            self._advance()
+            now = self._clock()
+            self.input_on = bool(on)
+            self.input_events.append((now, self.input_on))
+            if on:
+                self._input_on_at = now
+                self._unloaded = False
+                self._loading = False
+                self.protection_tripped = False
+            self._solve()
+
+    # ========== 工作点 ==========
+
+    def _advance(self) -> None:
+        """按上次工作点的电流推进被测设备状态"""
+        now = self._clock()
+        dt = now - self._last_update
+        self._last_update = now
+        if dt > 0:
+            self.dut.advance(dt, self._i)
+
+    def _setpoint_current(self, now: float) -> float | None:
+        """CC 类模式（CC/DYN/LIST/OCP/BATT）当前应拉的电流；非 CC 类返回 None"""
+        p = self.params
+        if self.mode in ("CURR", "BATT"):
+            return p["CURR"]
+        if self.mode == "DYN":
+            high, low = p["DYN:HIGH:DWEL"], p["DYN:LOW:DWEL"]
+            period = max(1e-9, high + low)
+            phase = (now - self._input_on_at) % period
+            return p["DYN:HIGH"] if phase < high else p["DYN:LOW"]
+        if self.mode == "LIST":
+            if not self.list_curr:
+                return 0.0
+            dwell = self.list_dwell or [1.0]
+            steps = [(c, dwell[min(k, len(dwell) - 1)]) for k, c in enumerate(self.list_curr)]
+            cycle = sum(max(1e-9, d) for _, d in steps)
+            elapsed = now - self._input_on_at
+            count = int(p["LIST:COUN"])
+            if count <= 99999 and elapsed >= cycle * count:
+                return 0.0
+            pos = elapsed % cycle
+            for c, d in steps:
+                if pos < d:
+                    return c
+                pos -= d
+            return steps[-1][0]
+        if self.mode == "OCP":
+            if not self.ocp_running or self.ocp_started_at is None:
+                return 0.0
+            steps = max(1, int(p["OCP:STEP"]))
+            k = min(steps, int((now - self.ocp_started_at) / max(1e-9, p["OCP:DWEL"])))
+            return p["OCP:IST"] + (p["OCP:IEND"] - p["OCP:IST"]) * k / steps
+        return None
+
+    def _solve(self) -> None:
+        """根据模式与被测设备求解端电压与电流"""
+        now = self._clock()
+        e = self.dut.emf()
+        rs = self.dut.internal_resistance()
+        spec = self.spec
+        v_on, v_off = self.params["VOLT:ON"], self.params["VOLT:OFF"]
+
+        if not self.input_on:
+            i = 0.0
+        elif self.short:
+            i = min(spec.max_current, e / rs) if rs > 0 else spec.max_current
+        else:
+            if not self._loading and e >= v_on:
+                self._loading = True
+            if self._unloaded or not self._loading:
+                i = 0.0
+            else:
+                i = self._mode_current(now, e, rs)
+
+        i = max(0.0, min(i, spec.max_current))
+        v = max(0.0, e - i * rs)
+        if self.input_on and not self.short and i > 0 and v < v_off:
+            # 电压跌破 Voff：卸载并保持，直到重新打开输入
+            self._unloaded = True
+            i = 0.0
+            v = e
+        if i > self.params["CURR:PROT"] or v * i > self.params["POW:PROT"]:
+            self.protection_tripped = True
+            self.input_on = False
+            self.input_events.append((now, False))
+            i = 0.0
+            v = e
+        self._update_ocp(now, v, i)
+        self._v, self._i = v, i
+        self._v_min, self._v_max = min(self._v_min, v), max(self._v_max, v)
+        self._i_min, self._i_max = min(self._i_min, i), max(self._i_max, i)
+
+    def _mode_current(self, now: float, e: float, rs: float) -> float:
+        p = self.params
+        cc = self._setpoint_current(now)
+        if cc is not None:
+            return min(cc, e / rs) if rs > 0 else cc
+        if self.mode == "RES":
+            return e / (rs + max(self.spec.min_resistance, p["RES"]))
+        if self.mode == "VOLT":
+            if e <= p["VOLT"]:
+                return 0.0
+            return (e - p["VOLT"]) / rs if rs > 0 else self.spec.max_current
+        if self.mode == "POW":
+            power = p["POW"]
+            if power <= 0 or e <= 0:
+                return 0.0
+            if rs <= 0:
+                return power / e
+            disc = e * e - 4.0 * rs * power
+            # 超过被测设备最大输出功率时停在最大功率点
+            return (e - math.sqrt(disc)) / (2.0 * rs) if disc >= 0 else e / (2.0 * rs)
+        if self.mode == "LED":
+            vo, io = p["LED:VOLT"], p["LED:CURR"]
+            return io if e >= vo else 0.0
+        return 0.0
+
+    def _update_ocp(self, now: float, v: float, i: float) -> None:
+        if self.mode != "OCP" or not self.ocp_running:
+            return
+        if v * i > self.ocp_pmax[0]:
+            self.ocp_pmax = (v * i, v, i)
+        if i > 0 and v <= self.params["OCP:VTR"]:
+            self.ocp_result = i
+            self.ocp_running = False
+            return
+        steps = max(1, int(self.params["OCP:STEP"]))
+        if self.ocp_started_at is not None and now - self.ocp_started_at >= (steps + 1) * self.params["OCP:DWEL"]:
+            self.ocp_result = -2.0
+            self.ocp_running = False
+
+    def _measured(self, value: float) -> float:
+        if self.noise and value:
+            value *= 1.0 + self._rng.gauss(0.0, self.noise)
+        return value
+
+    def measurements(self) -> tuple[float, float, float, float]:
+        """当前测量值 (V, I, P, R)"""
+        with self._lock:
+            self._advance()
+            self._solve()
+            v, i = self._measured(self._v), self._measured(self._i)
+            return v, i, v * i, v / i if i > 1e-9 else _OVERFLOW
+
+    # ========== SCPI ==========
+
+    def handle_line(self, line: str) -> str | None:
+        """处理一行命令，返回应答行（无查询或查询均无法识别时为 None）"""
+        line = line.strip()
+        if not line:
+            return None
+        with self._lock:
+            self._advance()
+            self._solve()
+            parts = [x for x in line.split(";") if x.strip()]
+            if len(parts) > 1 and not self.compound:
+                self.errors.append('-113,"Undefined header"')
+                return None
+            replies: list[str] = []
+            path: list[str] = []
+            for part in parts:
+                part = part.strip()
+                header, _, arg = part.partition(" ")
+                header = header.strip()
+                query = header.endswith("?")
+                if query:
+                    header = header[:-1]
+                if not header.startswith((":", "*")) and path:
+                    # 复合命令中不以 ':' 开头的命令沿用上一条命令的路径
+                    header = ":".join(path + [header])
+                key = normalize_header(header)
+                if not key.startswith("*"):
+                    path = key.split(":")[:-1]
+                self.commands_handled += 1
+                try:
+                    reply = self._dispatch(key, query, arg.strip())
+                except ValueError as e:
+                    self.errors.append(f'-224,"{e}"')
+                    continue
+                if reply is not None:
+                    replies.append(reply)
+            return ";".join(replies) if replies else None
+
+    def _dispatch(self, key: str, query: bool, arg: str) -> str | None:
+        handler = self._handlers.get(key)
+        if handler is not None:
+            return handler(query, arg)
+        if key in self.params:
+            if query:
+                return _fmt(self.params[key])
+            self.params[key] = self._number(key, arg)
+            self._solve()
+            return None
+        self.errors.append(f'-113,"Undefined header {key}"')
+        return None
+
+    def _number(self, key: str, arg: str) -> float:
+        token = arg.strip().upper()
+        spec = self.spec
+        limit = {
+            "CURR": spec.max_current,
+            "VOLT": spec.max_voltage,
+            "POW": spec.max_power,
+            "RES": spec.max_resistance,
+        }.get(key.split(":")[0], spec.max_voltage)
+        if key in ("LIST:COUN", "OCP:STEP"):
+            limit = 100000.0
+        if token.startswith("MAX"):
+            return limit
+        if token.startswith("MIN"):
+            return spec.min_resistance if key == "RES" else 0.0
+        m = _NUMBER.match(arg.strip())
+        if not m:
+            raise ValueError(f"参数无效: {arg}")
+        unit = m.group(2).upper().split("/")[0]
+        value = float(m.group(1)) * _UNIT_SCALE.get(unit, 1.0)
+        return min(max(value, 0.0), limit)
+
+    def _build_handlers(self) -> dict[str, Callable[[bool, str], str | None]]:
+        def _const(value_fn: Callable[[], str]) -> Callable[[bool, str], str | None]:
+            return lambda query, _arg: value_fn() if query else None
+
+        def _bool_flag(attr: str, after: Callable[[], None] | None = None):
+            def _h(query: bool, arg: str) -> str | None:
+                if query:
+                    return "1" if getattr(self, attr) else "0"
+                setattr(self, attr, _parse_bool(arg))
+                if after:
+                    after()
+                return None
+
+            return _h
+
+        def _mode(query: bool, arg: str) -> str | None:
+            if query:
+                return self.mode
+            mode = short_form(arg.strip())
+            if mode not in _MODES:
+                raise ValueError(f"未知模式: {arg}")
+            self.mode = mode
+            self._solve()
+            return None
+
+        def _input(query: bool, arg: str) -> str | None:
+            if query:
+                return "1" if self.input_on else "0"
+            self.set_input(_parse_bool(arg))
+            return None
+
+        def _meas(index: int) -> Callable[[bool, str], str | None]:
+            return _const(lambda: _fmt(self.measurements()[index]))
+
+        def _minmax(attr: str) -> Callable[[bool, str], str | None]:
+            return _const(lambda: _fmt(self._measured(getattr(self, attr))))
+
+        def _list_values(attr: str):
+            def _h(query: bool, arg: str) -> str | None:
+                if query:
+                    return ",".join(_fmt(x) for x in getattr(self, attr))
+                setattr(self, attr, [self._number("CURR", x) for x in arg.split(",") if x.strip()])
+                return None
+
+            return _h
+
+        def _list_step(query: bool, arg: str) -> str | None:
+            if query:
+                return self.list_step
+            self.list_step = arg.strip().upper()
+            return None
+
+        def _dyn_mode(query: bool, arg: str) -> str | None:
+            if query:
+                return self.dyn_mode
+            self.dyn_mode = arg.strip().upper()
+            return None
+
+        def _ocp(query: bool, arg: str) -> str | None:
+            if query:
+                return "1" if self.ocp_running else "0"
+            if _parse_bool(arg):
+                self.ocp_running = True
+                self.ocp_started_at = self._clock()
+                self.ocp_result = -1.0
+                self.ocp_pmax = (0.0, 0.0, 0.0)
+            else:
+                self.ocp_running = False
+                if self.ocp_result == -1.0:
+                    self.ocp_result = -3.0
+            self._solve()
+            return None
+
+        def _ocp_pmax(query: bool, _arg: str) -> str | None:
+            return ",".join(_fmt(x) for x in self.ocp_pmax) if query else None
+
+        def _short(query: bool, arg: str) -> str | None:
+            if query:
+                return "1" if self.short else "0"
+            self.short = _parse_bool(arg)
+            self._solve()
+            return None
+
+        def _cmd(fn: Callable[[], None]) -> Callable[[bool, str], str | None]:
+            def _h(query: bool, _arg: str) -> str | None:
+                if not query:
+                    fn()
+                return None
+
+            return _h
+
+        def _set_remote(remote: bool) -> Callable[[], None]:
+            return lambda: setattr(self, "remote", remote)
+
+        def _error(query: bool, _arg: str) -> str | None:
+            if not query:
+                return None
+            return self.errors.popleft() if self.errors else '0,"No error"'
+
+        def _reset_minmax() -> None:
+            self._v_min = self._v_max = self._v
+            self._i_min = self._i_max = self._i
+
+        def _cls() -> None:
+            self.errors.clear()
+            _reset_minmax()
+
+        spec = self.spec
+        return {
+            "*IDN": _const(lambda: f"{spec.model},{spec.serial},{spec.version}"),
+            "*RST": _cmd(self.reset),
+            "*CLS": _cmd(_cls),
+            "*TRG": _cmd(lambda: None),
+            "SYST:VERS": _const(lambda: "1999.0"),
+            "SYST:ERR": _error,
+            "SYST:REM": _cmd(_set_remote(True)),
+            "SYST:LOC": _cmd(_set_remote(False)),
+            "SYST:RWL": _cmd(_set_remote(True)),
+            "SYST:BEEP:STAT": _bool_flag("beeper"),
+            "SYST:BEEP": _bool_flag("beeper"),
+            "SYST:SENS:STAT": _bool_flag("sense"),
+            "SYST:SENS": _bool_flag("sense"),
+            "MODE": _mode,
+            "INP": _input,
+            "INP:SHOR": _short,
+            "MEAS:VOLT": _meas(0),
+            "MEAS:CURR": _meas(1),
+            "MEAS:POW": _meas(2),
+            "MEAS:RES": _meas(3),
+            "MEAS:VOLT:MAX": _minmax("_v_max"),
+            "MEAS:VOLT:MIN": _minmax("_v_min"),
+            "MEAS:VOLT:PTP": _const(lambda: _fmt(self._v_max - self._v_min)),
+            "MEAS:CURR:MAX": _minmax("_i_max"),
+            "MEAS:CURR:MIN": _minmax("_i_min"),
+            "MEAS:CURR:PTP": _const(lambda: _fmt(self._i_max - self._i_min)),
+            "DYN:MODE": _dyn_mode,
+            "LIST:CURR": _list_values("list_curr"),
+            "LIST:DWEL": _list_values("list_dwell"),
+            "LIST:CURR:SLEW": _cmd(lambda: None),
+            "LIST:STEP": _list_step,
+            "INIT:NAME": _cmd(lambda: None),
+            "OCP": _ocp,
+            "OCP:RES": _const(lambda: _fmt(self.ocp_result)),
+            "OCP:RES:OCP": _const(lambda: _fmt(self.ocp_result)),
+            "OCP:RES:PMAX": _ocp_pmax,
+        }
+
+
+def _parse_bool(arg: str) -> bool:
+    token = arg.strip().upper()
+    if token in ("1", "ON"):
+        return True
+    if token in ("0", "OFF"):
+        return False
+    raise ValueError(f"布尔参数无效: {arg}")
+
+
+def _fmt(value: float) -> str:
+    if abs(value) >= 1e9:
+        return f"{value:.1E}"
+    return f"{value:.4f}"
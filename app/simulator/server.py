@@ -0,0 +1,210 @@
+"""模拟负载的通信端：TCP 服务器与 pty 虚拟串口"""
+from __future__ import annotations
+
+import os
+import random
+import select
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+from .instrument import SimulatedLoad
+
+
+@dataclass(frozen=True)
+class LinkProfile:
+    """链路特性
+
+    latency_ms 为收到命令到开始发送应答的延迟，jitter_ms 为在其上叠加的
+    均匀随机抖动 [0, jitter_ms)；fragment_bytes > 0 时应答按该长度分片发送，
+    片间间隔 fragment_gap_ms，用于检验上位机的行重组。
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    fragment_bytes: int = 0
+    fragment_gap_ms: float = 1.0
+    seed: int | None = None
+
+
+class _Link:
+    """按链路特性发送应答，逐行处理收到的命令"""
+
+    def __init__(self, load: SimulatedLoad, profile: LinkProfile, bytes_per_s: float | None = None):
+        self._load = load
+        self._profile = profile
+        self._bytes_per_s = bytes_per_s
+        self._rng = random.Random(profile.seed)
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes, send) -> None:
+        """接收数据，每凑齐一行处理一次并通过 send(bytes) 回复"""
+        self._buffer += data
+        while True:
+            pos = self._buffer.find(b"\n")
+            if pos < 0:
+                return
+            line = bytes(self._buffer[:pos]).decode("ascii", errors="replace")
+            del self._buffer[: pos + 1]
+            reply = self._load.handle_line(line)
+            if reply is not None:
+                self._reply((reply + "\n").encode("ascii"), send)
+
+    def _reply(self, payload: bytes, send) -> None:
+        p = self._profile
+        delay = p.latency_ms + (self._rng.uniform(0.0, p.jitter_ms) if p.jitter_ms > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        size = p.fragment_bytes if p.fragment_bytes > 0 else len(payload)
+        for k in range(0, len(payload), size):
+            chunk = payload[k : k + size]
+            if k and p.fragment_gap_ms > 0:
+                time.sleep(p.fragment_gap_ms / 1000.0)
+            if self._bytes_per_s:
+                # 按波特率模拟串口发送耗时
+                time.sleep(len(chunk) / self._bytes_per_s)
+            send(chunk)
+
+
+class SimulatorTcpServer:
+    """TCP 模拟负载，每个连接一个线程，连接共享同一个 ``SimulatedLoad``"""
+
+    def __init__(
+        self,
+        load: SimulatedLoad,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        profile: LinkProfile = LinkProfile(),
+    ):
+        self.load = load
+        self.profile = profile
+        self._sock = socket.create_server((host, port))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._clients: set[socket.socket] = set()
+        self._clients_lock = threading.Lock()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """监听地址 (host, port)；port=0 时为系统分配的端口"""
+        host, port = self._sock.getsockname()[:2]
+        return host, port
+
+    def start(self) -> SimulatorTcpServer:
+        self._thread = threading.Thread(target=self._serve, name="SimulatorTcpServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        with self._clients_lock:
+            for conn in list(self._clients):
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _serve(self) -> None:
+        self._sock.settimeout(0.2)
+        while not self._stop.is_set():
+            try:
+                conn, _addr = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._clients_lock:
+                self._clients.add(conn)
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        link = _Link(self.load, self.profile)
+        try:
+            while not self._stop.is_set():
+                data = conn.recv(4096)
+                if not data:
+                    break
+                link.feed(data, conn.sendall)
+        except OSError:
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients.discard(conn)
+            conn.close()
+
+    def __enter__(self) -> SimulatorTcpServer:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class SimulatorPtyServer:
+    """pty 虚拟串口模拟负载（仅 Linux/macOS）
+
+    ``port`` 为从端设备路径（如 /dev/pts/5），上位机按普通串口打开即可；
+    baudrate 不为 None 时按 10 bit/字节模拟应答的发送耗时。
+    """
+
+    def __init__(self, load: SimulatedLoad, profile: LinkProfile = LinkProfile(), baudrate: int | None = None):
+        import tty
+
+        self.load = load
+        self.profile = profile
+        self._master, self._slave = os.openpty()
+        # 原始模式：关闭回显与行处理，否则从端会收到自己发出的命令
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._bytes_per_s = baudrate / 10.0 if baudrate else None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> SimulatorPtyServer:
+        self._thread = threading.Thread(target=self._serve, name="SimulatorPtyServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _send(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            n = os.write(self._master, view)
+            view = view[n:]
+
+    def _serve(self) -> None:
+        link = _Link(self.load, self.profile, self._bytes_per_s)
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.2)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                break
+            if data:
+                link.feed(data, self._send)
+
+    def __enter__(self) -> SimulatorPtyServer:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
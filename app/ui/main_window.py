@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
     QDockWidget,
     QGridLayout,
@@ -20,6 +20,8 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from ..core.multi_device_manager import MultiDeviceManager
+from ..core.samples import COL_I, COL_P, COL_V
 from .pages.advanced_page import AdvancedPage
 from .pages.control_page import ControlPage
 from .pages.dashboard_page import DashboardPage
@@ -36,7 +38,26 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(1200, 780)
 
         self._device_cards: list[DeviceCard] = []
+        self._cards_by_id: dict[str, DeviceCard] = {}
         self._current_device: DeviceViewModel | None = None
+        self._next_device_no = 1
+        self._term_requests: dict[str, str] = {}  # request_id -> 终端输出前缀
+        # 各设备最新一条采样，按固定帧率刷新到卡片，避免每个数据块都重绘
+        self._latest_rows: dict[str, tuple[float, float, float]] = {}
+
+        self._devices = MultiDeviceManager()
+        self._devices.device_connected.connect(self._on_device_connected)
+        self._devices.device_disconnected.connect(self._on_device_disconnected)
+        self._devices.device_error.connect(self._on_device_error)
+        self._devices.measurement_block.connect(self._on_measurement_block)
+        self._devices.comm_log.connect(self._on_comm_log)
+        self._devices.command_result.connect(self._on_command_result)
+        self._devices.command_error.connect(self._on_command_error)
+
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setInterval(100)
+        self._preview_timer.timeout.connect(self._refresh_previews)
+        self._preview_timer.start()
 
         self._build_toolbar()
         self._build_central()
@@ -55,10 +76,31 @@ class MainWindow(QMainWindow):
         self.btn_add_device.setText("+ 添加")
         self.btn_add_device.clicked.connect(self._add_device_placeholder)
 
+        self.btn_connect = QToolButton()
+        self.btn_connect.setText("连接")
+        self.btn_connect.clicked.connect(self._connect_current)
+
+        self.btn_disconnect = QToolButton()
+        self.btn_disconnect.setText("断开")
+        self.btn_disconnect.clicked.connect(self._disconnect_current)
+
+        self.btn_connect_all = QToolButton()
+        self.btn_connect_all.setText("全部连接")
+        self.btn_connect_all.clicked.connect(self._connect_all)
+
+        self.btn_disconnect_all = QToolButton()
+        self.btn_disconnect_all.setText("全部断开")
+        self.btn_disconnect_all.clicked.connect(self._devices.disconnect_all)
+
         toolbar.addWidget(self.btn_add_device)
         toolbar.addSeparator()
+        toolbar.addWidget(self.btn_connect)
+        toolbar.addWidget(self.btn_disconnect)
+        toolbar.addWidget(self.btn_connect_all)
+        toolbar.addWidget(self.btn_disconnect_all)
+        toolbar.addSeparator()
 
-        self.toolbar_hint = QLabel("界面骨架（暂未接入SCPI通信）")
+        self.toolbar_hint = QLabel("已连接 0 / 0")
         self.toolbar_hint.setStyleSheet("color: #9AA7B2; padding-left: 8px;")
         toolbar.addWidget(self.toolbar_hint)
 
@@ -204,10 +246,17 @@ class MainWindow(QMainWindow):
         self._add_device_card(d)
 
     def _add_device_card(self, device: DeviceViewModel) -> None:
+        if not device.device_id:
+            device.device_id = f"dev{self._next_device_no}"
+            self._next_device_no += 1
+        self._devices.add_device(device.device_id)
+
         card = DeviceCard(device)
         card.clicked.connect(lambda c=card: self._select_device(c))
 
         self._device_cards.append(card)
+        self._cards_by_id[device.device_id] = card
+        self._update_connected_hint()
 
         row = (len(self._device_cards) - 1)
         self.device_grid.addWidget(card, row, 0)
@@ -217,10 +266,119 @@ class MainWindow(QMainWindow):
             c.set_selected(c is card)
 
         self._current_device = card.device
+        self._refresh_header()
+        self.status_left.setText(f"已选择：{card.device.alias}")
+
+    def _refresh_header(self) -> None:
+        device = self._current_device
+        if device is None:
+            return
         self.device_header.setText(
-            f"当前设备：{card.device.alias}   （{card.device.transport} {card.device.address}）   {card.device.status}"
+            f"当前设备：{device.alias}   （{device.transport} {device.address}）   {device.status}"
         )
-        self.status_left.setText(f"已选择：{card.device.alias}")
+
+    def _update_connected_hint(self) -> None:
+        self.toolbar_hint.setText(f"已连接 {len(self._devices.connected_ids())} / {len(self._device_cards)}")
+
+    def _connect_card(self, card: DeviceCard) -> None:
+        d = card.device
+        try:
+            if d.transport == "TCP":
+                host, port = d.address.rsplit(":", 1)
+                self._devices.connect_tcp_async(d.device_id, host, int(port))
+            else:
+                port, _, baud = d.address.partition("@")
+                self._devices.connect_serial_async(d.device_id, port, int(baud or 115200))
+        except ValueError:
+            card.set_status("地址无效", False)
+            return
+        card.set_status("连接中…")
+        if d is self._current_device:
+            self._refresh_header()
+
+    def _connect_current(self) -> None:
+        card = self._current_card()
+        if card is not None:
+            self._connect_card(card)
+
+    def _disconnect_current(self) -> None:
+        card = self._current_card()
+        if card is not None and self._devices.is_connected(card.device.device_id):
+            self._devices.disconnect_async(card.device.device_id)
+
+    def _connect_all(self) -> None:
+        # 每台设备有独立的命令线程，连接请求并行执行
+        for card in self._device_cards:
+            if not self._devices.is_connected(card.device.device_id):
+                self._connect_card(card)
+
+    def _current_card(self) -> DeviceCard | None:
+        if self._current_device is None:
+            return None
+        return self._cards_by_id.get(self._current_device.device_id)
+
+    def _on_device_connected(self, device_id: str, idn: str) -> None:
+        card = self._cards_by_id.get(device_id)
+        if card is None:
+            return
+        card.set_status("已连接", True)
+        card.setToolTip(idn)
+        self.log_view.append(f"[{card.device.alias}] 已连接：{idn}")
+        self._update_connected_hint()
+        self._refresh_header()
+
+    def _on_device_disconnected(self, device_id: str) -> None:
+        self._latest_rows.pop(device_id, None)
+        card = self._cards_by_id.get(device_id)
+        if card is None:
+            return
+        card.set_status("未连接", False)
+        self.log_view.append(f"[{card.device.alias}] 已断开")
+        self._update_connected_hint()
+        self._refresh_header()
+
+    def _on_device_error(self, device_id: str, error: str) -> None:
+        card = self._cards_by_id.get(device_id)
+        alias = card.device.alias if card else device_id
+        self.log_view.append(f"[{alias}] 错误：{error}")
+        if card is not None and not self._devices.is_connected(device_id):
+            card.set_status("连接失败", False)
+            self._refresh_header()
+
+    def _on_measurement_block(self, device_id: str, block: object) -> None:
+        if len(block) == 0:  # type: ignore[arg-type]
+            return
+        last = block[-1]  # type: ignore[index]
+        self._latest_rows[device_id] = (float(last[COL_V]), float(last[COL_I]), float(last[COL_P]))
+
+    def _refresh_previews(self) -> None:
+        rows = self._latest_rows
+        if not rows:
+            return
+        self._latest_rows = {}
+        for device_id, (v, i, p) in rows.items():
+            card = self._cards_by_id.get(device_id)
+            if card is not None:
+                card.set_values(v, i, p)
+
+    def _on_comm_log(self, device_id: str, direction: str, message: str) -> None:
+        # 多台设备同时轮询时日志量很大：收发记录只显示当前选中的设备，错误全部显示
+        current = self._current_device
+        if direction != "ERR" and (current is None or current.device_id != device_id):
+            return
+        card = self._cards_by_id.get(device_id)
+        alias = card.device.alias if card else device_id
+        self.log_view.append(f"[{alias}] {direction}: {message}")
+
+    def _on_command_result(self, device_id: str, request_id: str, result: object) -> None:
+        prefix = self._term_requests.pop(request_id, None)
+        if prefix is not None and result is not None:
+            self.term_output.append(f"{prefix} 应答：{result}")
+
+    def _on_command_error(self, device_id: str, request_id: str, error: str) -> None:
+        prefix = self._term_requests.pop(request_id, None)
+        if prefix is not None:
+            self.term_output.append(f"{prefix} 失败：{error}")
 
     def _on_terminal_send(self) -> None:
         cmd = self.term_input.text().strip()
@@ -233,3 +391,20 @@ class MainWindow(QMainWindow):
         self.term_output.append(f"{prefix} 发送：{cmd}")
         self.log_view.append(f"{prefix} 发送：{cmd}")
         self.term_input.clear()
+
+        if device is None or not self._devices.is_connected(device.device_id):
+            self.term_output.append(f"{prefix} 设备未连接")
+            return
+        if cmd.endswith("?"):
+            req = self._devices.query_async(device.device_id, cmd)
+        else:
+            req = self._devices.send_async(device.device_id, cmd)
+        self._term_requests[req] = prefix
+
+    def closeEvent(self, event):  # type: ignore[no-untyped-def]
+        self._preview_timer.stop()
+        try:
+            self._devices.shutdown()
+        except Exception:
+            pass
+        return super().closeEvent(event)
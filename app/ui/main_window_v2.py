@@ -1,14 +1,12 @@
 from __future__ import annotations
 
-import time
 from datetime import datetime
 
+import numpy as np
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
-    QApplication,
     QMainWindow,
     QMessageBox,
-    QProgressDialog,
     QTabWidget,
     QSplitter,
     QVBoxLayout,
@@ -16,6 +14,7 @@ from PyQt6.QtWidgets import (
     QScrollArea,
 )
 
+from ..core.battery_test import BatteryTestConfig, BatteryTestEngine, stop_latency_text
 from ..core.device_manager import DeviceManager
 from ..core.recording_manager import RecordingManager
 from .dialogs.about_dialog import AboutDialog
@@ -52,15 +51,6 @@ class MainWindowV2(QMainWindow):
 
         self._battery_running = False
         self._battery_stopping = False
-        self._battery_mode: str = "CC"  # CC/CR/CP
-        self._battery_cutoff_v: float | None = None
-        self._battery_cutoff_time_s: float | None = None
-        self._battery_cutoff_mah: float | None = None
-        self._battery_start_monotonic: float = 0.0
-        self._battery_last_t: float | None = None
-        self._battery_mah: float = 0.0
-        self._battery_wh: float = 0.0
-        self._battery_stop_v: float | None = None
 
         self._build_ui()
         self._wire_events()
@@ -154,7 +144,9 @@ class MainWindowV2(QMainWindow):
 
         self.data_log.btn_term_send.clicked.connect(self._on_terminal_send)
         self.data_log.term_input.returnPressed.connect(self._on_terminal_send)
-        self.data_log.data_imported.connect(self._on_data_imported)
+        self.data_log.import_started.connect(self._on_import_started)
+        self.data_log.import_columns.connect(self._on_import_columns)
+        self.data_log.import_finished.connect(self._on_import_finished)
         self.data_log.clear_requested.connect(self._on_clear_requested)
 
         self.advanced.short_start_requested.connect(self._on_short_start_requested)
@@ -170,10 +162,14 @@ class MainWindowV2(QMainWindow):
         self._device_manager.connected.connect(self._on_device_connected)
         self._device_manager.disconnected.connect(self._on_device_disconnected)
         self._device_manager.error_occurred.connect(self._on_device_error)
-        self._device_manager.measurement_ready.connect(self._on_measurement_ready)
+        self._device_manager.measurement_block.connect(self._on_measurement_block)
+        self._device_manager.measurement_stats.connect(self._on_measurement_stats)
         self._device_manager.comm_log.connect(self._on_comm_log)
         self._device_manager.command_result.connect(self._on_command_result)
         self._device_manager.command_error.connect(self._on_command_error)
+        self._device_manager.command_superseded.connect(self._on_command_superseded)
+        self._device_manager.battery_progress.connect(self._on_battery_progress)
+        self._device_manager.battery_finished.connect(self._on_battery_finished)
 
         self.data_log.export_requested.connect(self._on_export_requested)
 
@@ -275,6 +271,8 @@ class MainWindowV2(QMainWindow):
         self.header.set_connected(False)
         self.connection.set_connected(False)
         self.connection.set_connecting(False)
+        self.header.set_sample_stats(None)
+        self.header.set_record_stats(None)
         self.data_log.append_run_log("已断开连接")
         self._recording = False
         try:
@@ -293,49 +291,26 @@ class MainWindowV2(QMainWindow):
         self.data_log.append_run_log(f"错误：{error}")
         QMessageBox.critical(self, "设备错误", error)
 
-    def _on_measurement_ready(self, v: float, i: float, p: float, r: float) -> None:
-        """测量数据就绪"""
-        # 局部导入兜底：即使模块热加载/异常覆盖全局 datetime，也不影响采样回调
-        from datetime import datetime as _dt
+    def _on_measurement_block(self, block: object) -> None:
+        """测量数据块就绪，block 为 (n, 5) 数组：t, v, i, p, r（t 为采集线程打上的时间戳）"""
+        data = np.asarray(block, dtype=float)
+        if data.ndim != 2 or len(data) == 0:
+            return
 
-        t = time.time()  # 使用当前时间戳
-        ts = _dt.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        _t, v, i, p, r = (float(x) for x in data[-1])
         self.control.set_monitor_values(v, i, p, r)
         self.advanced.set_monitor_values(v, i, p, r)
-        self.plot.append_point(t, v, i, p, r)
+        self.plot.append_block(data)
         if self._recording:
-            self.data_log.append_data(v, i, p, r)
-            try:
-                self._recorder.append(ts, v, i, p, r)
-            except Exception:
-                pass
-
-        if self._battery_running:
-            self._battery_stop_v = v
-            last_t = self._battery_last_t
-            self._battery_last_t = t
-            if last_t is not None:
-                dt = max(0.0, t - last_t)
-                self._battery_mah += i * dt / 3600.0 * 1000.0
-                self._battery_wh += p * dt / 3600.0
-
-            elapsed_s = max(0.0, time.monotonic() - self._battery_start_monotonic)
+            self.data_log.append_block(data)
             try:
-                self.advanced.battery_panel.set_stats(v, elapsed_s, self._battery_mah, self._battery_wh)
+                self._recorder.append_block(data)
             except Exception:
                 pass
 
-            if (not self._battery_stopping) and self._battery_cutoff_v is not None and v <= self._battery_cutoff_v:
-                self._stop_battery_test_auto("达到截止电压")
-                return
-
-            if (not self._battery_stopping) and self._battery_cutoff_time_s is not None and elapsed_s >= self._battery_cutoff_time_s:
-                self._stop_battery_test_auto("达到截止时间")
-                return
-
-            if (not self._battery_stopping) and self._battery_cutoff_mah is not None and self._battery_mah >= self._battery_cutoff_mah:
-                self._stop_battery_test_auto("达到截止容量")
-                return
+    def _on_measurement_stats(self, stats: dict) -> None:
+        self.header.set_sample_stats(stats)
+        self.header.set_record_stats(self._recorder.stats())
 
     def _on_short_start_requested(self, duration_s: float, curr_prot: str, pow_prot: str) -> None:
         if not self._device_manager.is_connected():
@@ -390,27 +365,25 @@ class MainWindowV2(QMainWindow):
         cutoff_v: str,
         cutoff_time_s: str,
         cutoff_mah: str,
+        device_cutoff: bool = False,
     ) -> None:
         if not self._device_manager.is_connected():
             return
 
         try:
-            val = float(value)
+            config = BatteryTestConfig(
+                mode=str(discharge_mode).strip().upper(),
+                value=float(value),
+                cutoff_v=float(cutoff_v) if cutoff_v else None,
+                cutoff_time_s=float(cutoff_time_s) if cutoff_time_s else None,
+                cutoff_mah=float(cutoff_mah) if cutoff_mah else None,
+                device_cutoff=bool(device_cutoff),
+            )
         except Exception:
             QMessageBox.warning(self, "错误", "放电参数格式错误，请输入数字")
             return
 
-        self._battery_mode = str(discharge_mode).strip().upper()
-        self._battery_cutoff_v = float(cutoff_v) if cutoff_v else None
-        self._battery_cutoff_time_s = float(cutoff_time_s) if cutoff_time_s else None
-        self._battery_cutoff_mah = float(cutoff_mah) if cutoff_mah else None
-
-        self._battery_mah = 0.0
-        self._battery_wh = 0.0
-        self._battery_last_t = None
-        self._battery_stop_v = None
         self._battery_stopping = False
-
         try:
             self.advanced.battery_panel.reset_stats()
         except Exception:
@@ -418,28 +391,18 @@ class MainWindowV2(QMainWindow):
 
         self.advanced.set_locked(True)
 
-        def _job(dev):
-            if self._battery_mode == "CC":
-                dev.set_mode("CURR")
-                dev.set_current(val)
-            elif self._battery_mode == "CR":
-                dev.set_mode("RES")
-                dev.set_resistance(val)
-            else:
-                dev.set_mode("POW")
-                dev.set_power(val)
-            dev.set_input(True)
-
-        req = self._device_manager.run_device_call_async(_job)
+        # 积分与截止判断在测量线程中进行，GUI 只显示进度
+        engine = BatteryTestEngine(config)
+        req = self._device_manager.start_battery_test_async(engine)
 
-        def _ok(_res: object) -> None:
+        def _ok(_prev_voff: object) -> None:
             self._battery_running = True
-            self._battery_start_monotonic = time.monotonic()
             self.control.set_running(True)
             self.advanced.battery_panel.set_running(True)
             self._recording = True
             self._start_recording_session()
-            self.data_log.append_run_log("电池放电测试开始")
+            where = "设备端" if engine.device_cutoff else "上位机（测量线程）"
+            self.data_log.append_run_log(f"电池放电测试开始（截止电压由{where}判断）")
 
         def _err(err: str) -> None:
             self.advanced.set_locked(False)
@@ -447,42 +410,33 @@ class MainWindowV2(QMainWindow):
 
         self._pending_handlers[req] = (_ok, _err)
 
-    def _stop_battery_test_auto(self, reason: str) -> None:
-        if not self._battery_running:
-            return
-        if not self._device_manager.is_connected():
-            return
+    def _on_battery_progress(self, snap: dict) -> None:
+        try:
+            self.advanced.battery_panel.set_stats(snap["voltage"], snap["elapsed_s"], snap["mah"], snap["wh"])
+        except Exception:
+            pass
 
-        if self._battery_stopping:
+    def _finish_battery_test(self, snap: dict | None, message: str) -> None:
+        """电池测试结束后的界面收尾"""
+        self._battery_running = False
+        self._battery_stopping = False
+        self.control.set_running(False)
+        self.advanced.battery_panel.set_running(False)
+        self._recording = False
+        self._recorder.stop()
+        self.advanced.set_locked(False)
+        if snap:
+            self._on_battery_progress(snap)
+        self.data_log.append_run_log(message)
+        latency = stop_latency_text(snap) if snap else None
+        if latency:
+            self.data_log.append_run_log(latency)
+
+    def _on_battery_finished(self, snap: dict) -> None:
+        """测量线程检测到截止条件并已关断输入"""
+        if not self._battery_running:
             return
-        self._battery_stopping = True
-
-        def _job(dev):
-            dev.set_input(False)
-
-        req = self._device_manager.run_device_call_async(_job)
-
-        def _ok(_res: object) -> None:
-            self._battery_running = False
-            self._battery_stopping = False
-            self.control.set_running(False)
-            self.advanced.battery_panel.set_running(False)
-            self._recording = False
-            self._recorder.stop()
-            self.advanced.set_locked(False)
-
-            elapsed_s = max(0.0, time.monotonic() - self._battery_start_monotonic)
-            try:
-                self.advanced.battery_panel.set_stats(self._battery_stop_v, elapsed_s, self._battery_mah, self._battery_wh)
-            except Exception:
-                pass
-            self.data_log.append_run_log(f"电池放电测试结束：{reason}")
-
-        def _err(err: str) -> None:
-            self._battery_stopping = False
-            self.data_log.append_run_log(f"电池放电测试停止失败: {err}")
-
-        self._pending_handlers[req] = (_ok, _err)
+        self._finish_battery_test(snap, f"电池放电测试结束：{snap.get('reason') or ''}")
 
     def _on_battery_stop_requested(self) -> None:
         if not self._device_manager.is_connected():
@@ -494,25 +448,10 @@ class MainWindowV2(QMainWindow):
             return
         self._battery_stopping = True
 
-        def _job(dev):
-            dev.set_input(False)
+        req = self._device_manager.stop_battery_test_async()
 
-        req = self._device_manager.run_device_call_async(_job)
-
-        def _ok(_res: object) -> None:
-            self._battery_running = False
-            self._battery_stopping = False
-            self.control.set_running(False)
-            self.advanced.battery_panel.set_running(False)
-            self._recording = False
-            self._recorder.stop()
-            self.advanced.set_locked(False)
-            elapsed_s = max(0.0, time.monotonic() - self._battery_start_monotonic)
-            try:
-                self.advanced.battery_panel.set_stats(self._battery_stop_v, elapsed_s, self._battery_mah, self._battery_wh)
-            except Exception:
-                pass
-            self.data_log.append_run_log("电池放电测试结束")
+        def _ok(snap: object) -> None:
+            self._finish_battery_test(snap if isinstance(snap, dict) else None, "电池放电测试结束")
 
         def _err(err: str) -> None:
             self._battery_stopping = False
@@ -524,29 +463,14 @@ class MainWindowV2(QMainWindow):
         if not self._device_manager.is_connected():
             return
 
-        if self._battery_stopping:
-            return
+        # 紧急停止不因普通停止正在进行而忽略：排队中的停止命令会被取消，由此处接管
         self._battery_stopping = True
+        engine = self._device_manager.battery_engine
+        req = self._device_manager.emergency_stop_battery_async()
 
-        def _job(dev):
-            dev.set_input(False)
-
-        req = self._device_manager.run_device_call_async(_job)
-
-        def _ok(_res: object) -> None:
-            self._battery_running = False
-            self._battery_stopping = False
-            self.control.set_running(False)
-            self.advanced.battery_panel.set_running(False)
-            self._recording = False
-            self._recorder.stop()
-            self.advanced.set_locked(False)
-            elapsed_s = max(0.0, time.monotonic() - self._battery_start_monotonic)
-            try:
-                self.advanced.battery_panel.set_stats(self._battery_stop_v, elapsed_s, self._battery_mah, self._battery_wh)
-            except Exception:
-                pass
-            self.data_log.append_run_log("电池放电测试紧急停止")
+        def _ok(latency_ms: object) -> None:
+            snap = engine.snapshot() if engine is not None else None
+            self._finish_battery_test(snap, f"电池放电测试紧急停止，{self._estop_latency_text(latency_ms)}")
 
         def _err(err: str) -> None:
             self._battery_stopping = False
@@ -581,22 +505,21 @@ class MainWindowV2(QMainWindow):
         if not self._device_manager.is_connected():
             return
 
-        def _job(dev):
-            dev.set_input(False)
+        def _after(dev):
             try:
                 dev.set_input_short(False)
             except Exception:
                 pass
 
-        req = self._device_manager.run_device_call_async(_job)
+        req = self._device_manager.emergency_stop_async(_after)
 
-        def _ok(_res: object) -> None:
+        def _ok(latency_ms: object) -> None:
             self.control.set_running(False)
             self.advanced.short_panel.set_running(False)
             self._recording = False
             self._recorder.stop()
             self.advanced.set_locked(False)
-            self.data_log.append_run_log("短路测试紧急停止")
+            self.data_log.append_run_log(f"短路测试紧急停止，{self._estop_latency_text(latency_ms)}")
 
         def _err(err: str) -> None:
             self.data_log.append_run_log(f"短路紧急停止失败: {err}")
@@ -606,6 +529,7 @@ class MainWindowV2(QMainWindow):
     def _on_clear_requested(self) -> None:
         if self.data_log.data_row_count() == 0:
             self.plot.clear()
+            self.plot.set_capacity(PlotPanel.DEFAULT_CAPACITY)
             self.data_log.clear_data()
             self.data_log.append_run_log("数据：清空")
             return
@@ -624,6 +548,7 @@ class MainWindowV2(QMainWindow):
             return
         if clicked == btn_clear:
             self.plot.clear()
+            self.plot.set_capacity(PlotPanel.DEFAULT_CAPACITY)
             self.data_log.clear_data()
             self.data_log.append_run_log("数据：清空")
 
@@ -657,9 +582,9 @@ class MainWindowV2(QMainWindow):
                 "model": model,
                 "id": dev_id,
                 "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "sample_interval_ms": 200,
+                "sample_interval_ms": self._device_manager.sample_interval_ms,
             }
-            session = self._recorder.start_new_session(meta)
+            session = self._recorder.start_new_session(meta, fmt=self.data_log.record_format())
             self.data_log.append_run_log(f"采集会话：{session.session_dir}")
         except Exception as e:
             self.data_log.append_run_log(f"创建采集会话失败: {e}")
@@ -685,113 +610,108 @@ class MainWindowV2(QMainWindow):
         if not self._device_manager.is_connected():
             return
 
-        req = self._device_manager.run_device_call_async(lambda dev: dev.set_input(False))
+        req = self._device_manager.emergency_stop_async()
         self._pending_handlers[req] = (
-            lambda _res: (
+            lambda latency_ms: (
                 self.control.set_running(False),
                 setattr(self, "_recording", False),
                 self._recorder.stop(),
-                self.data_log.append_run_log("紧急停止！(INPUT OFF)"),
+                self.data_log.append_run_log(f"紧急停止！(INPUT OFF) {self._estop_latency_text(latency_ms)}"),
             ),
             lambda err: self.data_log.append_run_log(f"紧急停止失败: {err}"),
         )
 
+    def _estop_latency_text(self, latency_ms: object) -> str:
+        """紧急停止延迟说明：本次及历史最大（从按下按钮到 INPUT OFF 写出）"""
+        stats = self._device_manager.estop_latency_stats()
+        return f"延迟 {float(latency_ms):.1f} ms（最大 {stats['max_ms']:.1f} ms）"
+
+    # UI 模式 -> SCPI 模式
+    _SCPI_MODES = {"CC": "CURR", "CV": "VOLT", "CP": "POW", "CR": "RES"}
+
+    def _mode_settings(self, mode: str) -> tuple[dict[str, float], dict[str, str]]:
+        """控制面板中该模式已填写的参数：({SCPI 命令头: 值}, {命令头: 日志文字})
+
+        Raises:
+            ValueError: 参数不是数字
+        """
+        params = self.control.get_mode_params(mode)
+
+        # UI 字段 -> (SCPI 命令头, 日志文字, 单位)
+        fields = {
+            "CC": [("current", "CURR", "设置电流", "A")],
+            "CV": [("voltage", "VOLT", "设置电压", "V")],
+            "CP": [("power", "POW", "设置功率", "W")],
+            "CR": [("resistance", "RES", "设置电阻", "Ω")],
+        }.get(mode, [])
+        if fields:
+            fields = fields + [
+                ("current_prot", "CURR:PROT", "设置最大电流", "A"),
+                ("power_prot", "POW:PROT", "设置最大功率", "W"),
+            ]
+        if mode == "CV":
+            fields.append(("slew", "VOLT:SLEW", "设置电压速率", "V/ms"))
+
+        settings: dict[str, float] = {}
+        logs: dict[str, str] = {}
+        for key, header, label, unit in fields:
+            if params.get(key):
+                settings[header] = float(params[key])
+                logs[header] = f"{label}：{params[key]} {unit}"
+        return settings, logs
+
+    def _apply_mode_settings(
+        self, mode_text: str, settings: dict[str, float], logs: dict[str, str], switching: bool = False
+    ) -> None:
+        """模式与参数作为一个事务下发：与设备已知状态比对，只写变化的部分
+
+        Args:
+            switching: True 表示由模式切换触发，日志按模式切换记录
+        """
+        mode = self._SCPI_MODES[mode_text]
+        req = self._device_manager.apply_settings_async(settings, mode=mode)
+
+        def _ok(written: object) -> None:
+            written = written if isinstance(written, dict) else {}
+            if switching:
+                self.data_log.append_run_log(f"模式切换：{mode_text} ({mode})")
+            for header in written:
+                self.data_log.append_run_log(logs[header])
+            skipped = len(settings) - len(written)
+            if skipped:
+                self.data_log.append_run_log(f"参数未变化，跳过 {skipped} 项")
+
+        fail = "模式切换失败" if switching else "参数下发失败"
+        self._pending_handlers[req] = (_ok, lambda err: self.data_log.append_run_log(f"{fail}: {err}"))
+
     def _on_mode_changed(self, mode_text: str) -> None:
-        """模式切换"""
-        if not self._device_manager.is_connected():
+        """模式切换：模式与该模式已填写的参数在同一个事务中下发"""
+        if not self._device_manager.is_connected() or mode_text not in self._SCPI_MODES:
             return
 
-        # 从 UI 文本映射到 SCPI 命令
-        mode_map = {
-            "CC": "CURR",
-            "CV": "VOLT",
-            "CP": "POW",
-            "CR": "RES",
-        }
-        mode = mode_map.get(mode_text)
-        if not mode:
-            return
+        try:
+            settings, logs = self._mode_settings(mode_text)
+        except ValueError:
+            self.data_log.append_run_log("参数格式错误，本次只切换模式")
+            settings, logs = {}, {}
 
-        req = self._device_manager.run_device_call_async(lambda dev: dev.set_mode(mode))
-        self._pending_handlers[req] = (
-            lambda _res: self.data_log.append_run_log(f"模式切换：{mode_text} ({mode})"),
-            lambda err: self.data_log.append_run_log(f"模式切换失败: {err}"),
-        )
+        self._apply_mode_settings(mode_text, settings, logs, switching=True)
 
     def _on_apply_params(self, mode: str) -> None:
         """下发参数按钮"""
-        if not self._device_manager.is_connected():
+        if not self._device_manager.is_connected() or mode not in self._SCPI_MODES:
             return
 
-        params = self.control.get_mode_params(mode)
-
         try:
-            ops: list[tuple[callable, str]] = []
-            if mode == "CC":
-                if params.get("current"):
-                    val = float(params["current"])
-                    ops.append((lambda dev, v=val: dev.set_current(v), f"设置电流：{params['current']} A"))
-                if params.get("current_prot"):
-                    val = float(params["current_prot"])
-                    ops.append((lambda dev, v=val: dev.set_current_protection(v), f"设置最大电流：{params['current_prot']} A"))
-                if params.get("power_prot"):
-                    val = float(params["power_prot"])
-                    ops.append((lambda dev, v=val: dev.set_power_protection(v), f"设置最大功率：{params['power_prot']} W"))
-
-            elif mode == "CV":
-                if params.get("voltage"):
-                    val = float(params["voltage"])
-                    ops.append((lambda dev, v=val: dev.set_voltage(v), f"设置电压：{params['voltage']} V"))
-                if params.get("current_prot"):
-                    val = float(params["current_prot"])
-                    ops.append((lambda dev, v=val: dev.set_current_protection(v), f"设置最大电流：{params['current_prot']} A"))
-                if params.get("power_prot"):
-                    val = float(params["power_prot"])
-                    ops.append((lambda dev, v=val: dev.set_power_protection(v), f"设置最大功率：{params['power_prot']} W"))
-                if params.get("slew"):
-                    val = float(params["slew"])
-                    ops.append((lambda dev, v=val: dev.set_voltage_slew(v), f"设置电压速率：{params['slew']} V/ms"))
-
-            elif mode == "CP":
-                if params.get("power"):
-                    val = float(params["power"])
-                    ops.append((lambda dev, v=val: dev.set_power(v), f"设置功率：{params['power']} W"))
-                if params.get("current_prot"):
-                    val = float(params["current_prot"])
-                    ops.append((lambda dev, v=val: dev.set_current_protection(v), f"设置最大电流：{params['current_prot']} A"))
-                if params.get("power_prot"):
-                    val = float(params["power_prot"])
-                    ops.append((lambda dev, v=val: dev.set_power_protection(v), f"设置最大功率：{params['power_prot']} W"))
-
-            elif mode == "CR":
-                if params.get("resistance"):
-                    val = float(params["resistance"])
-                    ops.append((lambda dev, v=val: dev.set_resistance(v), f"设置电阻：{params['resistance']} Ω"))
-                if params.get("current_prot"):
-                    val = float(params["current_prot"])
-                    ops.append((lambda dev, v=val: dev.set_current_protection(v), f"设置最大电流：{params['current_prot']} A"))
-                if params.get("power_prot"):
-                    val = float(params["power_prot"])
-                    ops.append((lambda dev, v=val: dev.set_power_protection(v), f"设置最大功率：{params['power_prot']} W"))
-
+            settings, logs = self._mode_settings(mode)
         except ValueError:
             QMessageBox.warning(self, "错误", "参数格式错误，请输入数字")
             return
 
-        if not ops:
+        if not settings:
             return
 
-        def _job(dev):
-            for op, _log in ops:
-                op(dev)
-
-        req = self._device_manager.run_device_call_async(_job)
-
-        def _ok(_res):
-            for _op, _log in ops:
-                self.data_log.append_run_log(_log)
-
-        self._pending_handlers[req] = (_ok, lambda err: self.data_log.append_run_log(f"参数下发失败: {err}"))
+        self._apply_mode_settings(mode, settings, logs)
 
     def _on_terminal_send(self) -> None:
         """SCPI 终端发送"""
@@ -837,6 +757,10 @@ class MainWindowV2(QMainWindow):
         if err:
             err(error)
 
+    def _on_command_superseded(self, request_id: str, _new_request_id: str) -> None:
+        """请求被同键的新请求取代，不会执行：丢弃其回调"""
+        self._pending_handlers.pop(request_id, None)
+
     def _on_export_requested(self, file_path: str, selected_filter: str) -> None:
         if not self._device_manager.is_connected():
             QMessageBox.warning(self, "错误", "设备未连接，无法读取模式/保护值用于导出")
@@ -848,7 +772,9 @@ class MainWindowV2(QMainWindow):
             meta_dict = meta if isinstance(meta, dict) else {}
             session = self._recorder.session
             if session:
-                self.data_log.export_from_session(file_path, selected_filter, meta_dict, session.data_csv_path)
+                self.data_log.export_from_session(
+                    file_path, selected_filter, meta_dict, session.data_path, session.format
+                )
             else:
                 self.data_log.export_with_metadata(file_path, selected_filter, meta_dict)
 
@@ -873,59 +799,15 @@ class MainWindowV2(QMainWindow):
         dialog = AboutDialog(self)
         dialog.exec()
 
-    def _on_data_imported(self, data_list: list) -> None:
-        """处理导入的数据"""
-        # 清空当前波形
+    def _on_import_started(self, total: int) -> None:
+        """导入数据源已打开：清空波形，数值列读完后整体装入"""
         self.plot.clear()
-        self.data_log.append_run_log(f"导入波形数据：{len(data_list)} 条记录")
-
-        # 将导入的数据添加到波形和数据表
-        # data_list 中的 t 需要转换为时间戳
-        base_time = time.time()
-        total = len(data_list)
-
-        progress = QProgressDialog("正在导入波形…", "取消", 0, max(1, total), self)
-        progress.setWindowTitle("导入波形")
-        progress.setWindowModality(Qt.WindowModality.ApplicationModal)
-        progress.setMinimumDuration(0)
-        progress.setValue(0)
-        QApplication.processEvents()
-
-        abs_rows: list[tuple[float, float, float, float, float]] = []
-        for idx, (t, v, i, p, r) in enumerate(data_list):
-            if idx % 200 == 0:
-                progress.setLabelText("正在解析数据…")
-                progress.setValue(idx)
-                QApplication.processEvents()
-                if progress.wasCanceled():
-                    self.data_log.append_run_log("导入已取消")
-                    progress.close()
-                    return
-            timestamp = base_time + float(t)
-            abs_rows.append((timestamp, float(v), float(i), float(p), float(r)))
-
-        progress.setLabelText("正在填充表格…")
-        progress.setValue(0)
-        QApplication.processEvents()
-        ok = self.data_log.load_imported_data(abs_rows, progress=progress)
-        if not ok:
-            self.data_log.append_run_log("导入已取消")
-            progress.close()
-            return
+        self.plot.disable_follow()
+        self.data_log.append_run_log(f"导入波形数据：{total} 条记录")
+
+    def _on_import_columns(self, columns: np.ndarray) -> None:
+        # 曲线容量随导入数据扩大，缩放浏览由 min/max 金字塔负责抽取
+        self.plot.load_columns(columns)
 
-        progress.setLabelText("正在绘制曲线…")
-        progress.setValue(0)
-        QApplication.processEvents()
-        for idx, (timestamp, v, i, p, r) in enumerate(abs_rows):
-            if idx % 200 == 0:
-                progress.setValue(idx)
-                QApplication.processEvents()
-                if progress.wasCanceled():
-                    self.data_log.append_run_log("导入已取消")
-                    progress.close()
-                    return
-            self.plot.append_point(timestamp, v, i, p, r)
-
-        self.plot.show_all()
-        progress.setValue(total)
-        progress.close()
+    def _on_import_finished(self, rows: int) -> None:
+        self.data_log.append_run_log(f"曲线已载入 {rows} 条记录")
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from ...core.samples import COL_T, SampleRingBuffer
+from ...core.session_import import FilteredImportSource, ImportSource
+
+HEADERS = ["时间", "电压(V)", "电流(A)", "功率(W)", "内阻(Ω)"]
+
+
+def format_timestamp(t_s: float) -> str:
+    return datetime.fromtimestamp(t_s).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+class SampleTableModel(QAbstractTableModel):
+    """采样数据表模型
+
+    数据保存在列式 numpy 环形缓冲区中（每行 5 个 float64），单元格文本只在
+    视图实际绘制时于 data() 中格式化，不为每个样本创建任何控件对象。
+    追加按批进行，超出容量时从头部淘汰，淘汰为 O(1)。
+
+    也可挂接一个导入数据源（``set_source``）：前 len(source) 行按页从数据源
+    惰性读取，之后实时追加的数据仍进入环形缓冲区，接在导入数据之后显示。
+    """
+
+    DEFAULT_CAPACITY = 1_000_000
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, parent=None):
+        super().__init__(parent)
+        self._buf = SampleRingBuffer(capacity)
+        self._hidden_front = 0  # 淘汰与插入之间的过渡状态：已通知视图删除但尚未从缓冲区移除的行数
+        self._source: ImportSource | None = None
+        self._source_rows = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._buf.capacity
+
+    def set_capacity(self, capacity: int) -> None:
+        self.beginResetModel()
+        self._buf.set_capacity(capacity)
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
+        if parent.isValid():
+            return 0
+        return self._source_rows + len(self._buf) - self._hidden_front
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
+        if parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):  # type: ignore[override]
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            if 0 <= section < len(HEADERS):
+                return HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):  # type: ignore[override]
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = index.row()
+        col = index.column()
+        if row < self._source_rows:
+            value = float(self._source.row(row)[col])
+        else:
+            row += self._hidden_front - self._source_rows
+            if row >= len(self._buf):
+                return None
+            value = float(self._buf.column(col)[row])
+        if not np.isfinite(value):
+            # 导入数据源中尚未筛除的无效行
+            return None
+        if col == COL_T:
+            return format_timestamp(value)
+        return f"{value:.3f}"
+
+    @property
+    def source(self) -> ImportSource | None:
+        return self._source
+
+    def _drop_source(self) -> None:
+        if self._source is not None:
+            self._source.close()
+        self._source = None
+        self._source_rows = 0
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._drop_source()
+        self._buf.clear()
+        self._hidden_front = 0
+        self.endResetModel()
+
+    def set_source(self, source: ImportSource) -> None:
+        """整体替换为导入数据源（按页惰性读取，不整体载入内存）"""
+        self.beginResetModel()
+        self._drop_source()
+        self._source = source
+        self._source_rows = len(source)
+        self._buf.clear()
+        self._hidden_front = 0
+        self.endResetModel()
+
+    def set_source_view(self, view: FilteredImportSource) -> bool:
+        """换成当前导入数据源的有效行视图（视图接管原数据源），保留其后追加的实时数据
+
+        Returns:
+            当前数据源已不是 view.source（表格已被清空或替换）时返回 False
+        """
+        if self._source is None or view.source is not self._source:
+            return False
+        self.beginResetModel()
+        self._source = view
+        self._source_rows = len(view)
+        self.endResetModel()
+        return True
+
+    def set_block(self, block: np.ndarray) -> None:
+        """整体替换为 (n, 5) 的数据块，容量不足时自动扩大"""
+        self.beginResetModel()
+        self._drop_source()
+        self._buf.clear()
+        if len(block) > self._buf.capacity:
+            self._buf.set_capacity(len(block))
+        self._buf.extend(block)
+        self._hidden_front = 0
+        self.endResetModel()
+
+    def append_block(self, block: np.ndarray) -> None:
+        """批量追加 (n, 5) 的数据块：t, v, i, p, r"""
+        n = len(block)
+        if n == 0:
+            return
+
+        old_len = len(self._buf)
+        new_len = min(self._buf.capacity, old_len + n)
+        remove = old_len + n - new_len
+        remove = min(remove, old_len)
+        base = self._source_rows
+        if remove:
+            self.beginRemoveRows(QModelIndex(), base, base + remove - 1)
+            self._hidden_front = remove
+            self.endRemoveRows()
+
+        first = base + old_len - remove
+        self.beginInsertRows(QModelIndex(), first, base + new_len - 1)
+        self._buf.extend(block)
+        self._hidden_front = 0
+        self.endInsertRows()
+
+    def row_values(self, row: int) -> np.ndarray:
+        """返回第 row 行的数值 (t, v, i, p, r)"""
+        if row < self._source_rows:
+            return self._source.row(row).copy()
+        return self._buf.view()[:, row - self._source_rows].copy()
+
+    def columns(self) -> np.ndarray:
+        """返回环形缓冲区部分 (5, n) 的只读数值视图（不含导入数据源的行）"""
+        return self._buf.view()
@@ -21,7 +21,7 @@ class AdvancedTestPanel(QFrame):
     short_stop_requested = pyqtSignal()
     short_estop_requested = pyqtSignal()
 
-    battery_start_requested = pyqtSignal(str, str, str, str, str)  # mode, value, cutoff_v, cutoff_time_s, cutoff_mah
+    battery_start_requested = pyqtSignal(str, str, str, str, str, bool)  # mode, value, cutoff_v, cutoff_time_s, cutoff_mah, device_cutoff
     battery_stop_requested = pyqtSignal()
     battery_estop_requested = pyqtSignal()
 
@@ -4,6 +4,7 @@ import time
 
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import (
+    QCheckBox,
     QComboBox,
     QFrame,
     QGridLayout,
@@ -18,7 +19,7 @@ from PyQt6.QtWidgets import (
 
 
 class BatteryTestPanel(QFrame):
-    start_requested = pyqtSignal(str, str, str, str, str)  # discharge_mode, value, cutoff_v, cutoff_time_s, cutoff_mah
+    start_requested = pyqtSignal(str, str, str, str, str, bool)  # discharge_mode, value, cutoff_v, cutoff_time_s, cutoff_mah, device_cutoff
     stop_requested = pyqtSignal()
     estop_requested = pyqtSignal()
 
@@ -64,12 +65,20 @@ class BatteryTestPanel(QFrame):
         self.in_cutoff_mah = QLineEdit()
         self.in_cutoff_mah.setPlaceholderText("截止容量(mAh)")
 
+        self.chk_device_cutoff = QCheckBox("设备端截止")
+        self.chk_device_cutoff.setChecked(True)
+        self.chk_device_cutoff.setToolTip(
+            "勾选后截止电压写入设备的卸载电压 (Voff)，由设备自行卸载，不受上位机轮询间隔影响；\n"
+            "不勾选则由上位机根据测量值判断并发送 INPUT OFF。截止时间/容量始终由上位机判断。"
+        )
+
         grid.addWidget(QLabel("放电模式"), 0, 0)
         grid.addWidget(self.sel_mode, 0, 1)
         grid.addWidget(QLabel("放电参数"), 1, 0)
         grid.addWidget(value_row, 1, 1)
         grid.addWidget(QLabel("截止电压"), 2, 0)
         grid.addWidget(self.in_cutoff_v, 2, 1)
+        grid.addWidget(self.chk_device_cutoff, 2, 2)
         grid.addWidget(QLabel("截止时间"), 3, 0)
         grid.addWidget(self.in_cutoff_time, 3, 1)
         grid.addWidget(QLabel("截止容量"), 4, 0)
@@ -205,7 +214,9 @@ class BatteryTestPanel(QFrame):
             QMessageBox.warning(self, "错误", "请至少设置一个截止条件")
             return
 
-        self.start_requested.emit(mode, value, cutoff_v, cutoff_time_s, cutoff_mah)
+        self.start_requested.emit(
+            mode, value, cutoff_v, cutoff_time_s, cutoff_mah, self.chk_device_cutoff.isChecked()
+        )
 
     def set_running(self, running: bool) -> None:
         if running:
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-import csv
+import importlib.util
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any
 
+import numpy as np
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtWidgets import (
-    QApplication,
+    QComboBox,
     QFileDialog,
     QFrame,
     QHBoxLayout,
@@ -16,17 +17,31 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QProgressDialog,
     QPushButton,
+    QTableView,
     QTabWidget,
-    QTableWidget,
-    QTableWidgetItem,
     QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 
+from ...core.data_export import (
+    ArrayExportSource,
+    BinarySessionExportSource,
+    ExportSource,
+    ExportWorker,
+    PagedExportSource,
+    SessionCsvExportSource,
+)
+from ...core.session_import import SessionImportWorker
+from ..models.sample_table_model import SampleTableModel
+
 
 class DataLogPanel(QFrame):
-    data_imported = pyqtSignal(list)  # 导入数据信号，参数为数据列表 [(t, v, i, p, r), ...]
+    LIVE_CAPACITY = SampleTableModel.DEFAULT_CAPACITY
+
+    import_started = pyqtSignal(int)  # 导入数据源已打开，参数为总行数
+    import_columns = pyqtSignal(object)  # 导入读出的数值列 (5, n)：t, v, i, p, r，整体交给曲线
+    import_finished = pyqtSignal(int)  # 导入结束（含取消），参数为已读出的行数
     export_requested = pyqtSignal(str, str)  # 请求导出信号 (file_path, selected_filter)
     clear_requested = pyqtSignal()
 
@@ -34,6 +49,9 @@ class DataLogPanel(QFrame):
         super().__init__(parent)
         self.setProperty("card", "true")
 
+        self._export_worker: ExportWorker | None = None
+        self._import_worker: SessionImportWorker | None = None
+
         root = QVBoxLayout(self)
         root.setContentsMargins(14, 12, 14, 12)
         root.setSpacing(10)
@@ -59,9 +77,16 @@ class DataLogPanel(QFrame):
         export_row.addWidget(self.btn_export)
         export_row.addWidget(self.btn_clear_data)
         export_row.addStretch(1)
-
-        self.data_table = QTableWidget(0, 5)
-        self.data_table.setHorizontalHeaderLabels(["时间", "电压(V)", "电流(A)", "功率(W)", "内阻(Ω)"])
+        export_row.addWidget(QLabel("录制格式"))
+        self.record_format_combo = QComboBox()
+        self.record_format_combo.addItem("CSV 文本", "csv")
+        self.record_format_combo.addItem("二进制 (.bin)", "bin")
+        self.record_format_combo.setToolTip("二进制格式为定长 float64 记录，体积约为 CSV 的 1/3，可快速重新加载")
+        export_row.addWidget(self.record_format_combo)
+
+        self.data_model = SampleTableModel(self.LIVE_CAPACITY, self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.data_model)
         self.data_table.verticalHeader().setVisible(False)
         self.data_table.setAlternatingRowColors(True)
         self.data_table.setSelectionBehavior(self.data_table.SelectionBehavior.SelectRows)
@@ -135,33 +160,16 @@ class DataLogPanel(QFrame):
         self.btn_clear_data.clicked.connect(self.clear_requested)
 
     def clear_data(self) -> None:
-        self.data_table.setRowCount(0)
-
-    def load_imported_data(
-        self,
-        rows: list[tuple[float, float, float, float, float]],
-        progress: QProgressDialog | None = None,
-    ) -> bool:
-        self.data_table.setUpdatesEnabled(False)
-        try:
-            self.data_table.setRowCount(0)
-            self.data_table.setRowCount(len(rows))
-            for row_idx, (t_s, v, i, p, r) in enumerate(rows):
-                if progress is not None and (row_idx % 200 == 0 or row_idx == len(rows) - 1):
-                    progress.setValue(row_idx)
-                    QApplication.processEvents()
-                    if progress.wasCanceled():
-                        return False
-                ts = datetime.fromtimestamp(t_s).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                for col, val in enumerate([ts, f"{v:.3f}", f"{i:.3f}", f"{p:.3f}", f"{r:.3f}"]):
-                    self.data_table.setItem(row_idx, col, QTableWidgetItem(val))
-        finally:
-            self.data_table.setUpdatesEnabled(True)
-        self.data_table.scrollToBottom()
-        return True
+        self.data_model.clear()
+        if self.data_model.capacity != self.LIVE_CAPACITY:
+            self.data_model.set_capacity(self.LIVE_CAPACITY)
+
+    def record_format(self) -> str:
+        """当前选择的录制会话格式：'csv' 或 'bin'"""
+        return str(self.record_format_combo.currentData() or "csv")
 
     def data_row_count(self) -> int:
-        return self.data_table.rowCount()
+        return self.data_model.rowCount()
 
     def open_export_dialog(self) -> None:
         self._on_export_clicked()
@@ -177,172 +185,110 @@ class DataLogPanel(QFrame):
     def append_term(self, text: str) -> None:
         self.term_output.append(text)
 
-    def append_data(self, v: float, i: float, p: float, r: float) -> None:
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        row = self.data_table.rowCount()
-        self.data_table.insertRow(row)
-        for col, val in enumerate([ts, f"{v:.3f}", f"{i:.3f}", f"{p:.3f}", f"{r:.3f}"]):
-            self.data_table.setItem(row, col, QTableWidgetItem(val))
-
-        if self.data_table.rowCount() > 50000:
-            self.data_table.removeRow(0)
+    def append_data(self, v: float, i: float, p: float, r: float, t: float | None = None) -> None:
+        ts = t if t is not None else datetime.now().timestamp()
+        self.append_block(np.array([[ts, v, i, p, r]], dtype=np.float64))
 
+    def append_block(self, block: np.ndarray) -> None:
+        """批量追加采样块 (n, 5)：t, v, i, p, r，整批只滚动/刷新一次"""
+        if len(block) == 0:
+            return
+        self.data_model.append_block(block)
         self.data_table.scrollToBottom()
 
     def _on_import_clicked(self) -> None:
         """导入波形数据"""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "导入波形数据", "", "CSV 文件 (*.csv);;Excel 文件 (*.xlsx *.xls);;所有文件 (*.*)"
+            self, "导入波形数据", "", "CSV 文件 (*.csv);;Excel 文件 (*.xlsx *.xls);;二进制会话 (*.bin);;所有文件 (*.*)",
         )
 
         if not file_path:
             return
 
-        try:
-            data_list = []
-            file_ext = Path(file_path).suffix.lower()
-
-            def _find_col(header_cells: list[str], candidates: list[str]) -> int | None:
-                for c in candidates:
-                    for idx, h in enumerate(header_cells):
-                        if h == c:
-                            return idx
-                for c in candidates:
-                    for idx, h in enumerate(header_cells):
-                        if c in h:
-                            return idx
-                return None
-
-            def _parse_ts(ts_text: str) -> datetime | None:
-                s = str(ts_text).strip()
-                if not s:
-                    return None
-                for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
-                    try:
-                        return datetime.strptime(s, fmt)
-                    except ValueError:
-                        pass
-                return None
-
-            if file_ext == ".csv":
-                # 读取 CSV 文件
-                import csv
-
-                with open(file_path, "r", encoding="utf-8") as f:
-                    reader = csv.reader(f)
-                    header = next(reader, [])
-                    header_cells = [str(x).strip() for x in header]
-
-                    idx_ts = _find_col(header_cells, ["时间"])
-                    idx_v = _find_col(header_cells, ["电压(V)", "电压"])
-                    idx_i = _find_col(header_cells, ["电流(A)", "电流"])
-                    idx_p = _find_col(header_cells, ["功率(W)", "功率"])
-                    idx_r = _find_col(header_cells, ["内阻(Ω)", "内阻", "内阻(Ohm)"])
-
-                    if None in (idx_v, idx_i, idx_p, idx_r):
-                        QMessageBox.warning(self, "格式错误", "文件缺少必要列（电压/电流/功率/内阻），无法导入")
-                        return
-
-                    base_dt: datetime | None = None
-
-                    for row in reader:
-                        if not row:
-                            continue
-                        try:
-                            v = float(row[idx_v])
-                            i = float(row[idx_i])
-                            p = float(row[idx_p])
-                            r = float(row[idx_r])
-
-                            if idx_ts is not None and idx_ts < len(row):
-                                dt = _parse_ts(row[idx_ts])
-                            else:
-                                dt = None
-
-                            if dt is not None:
-                                if base_dt is None:
-                                    base_dt = dt
-                                t = (dt - base_dt).total_seconds()
-                            else:
-                                t = len(data_list) * 0.2
-
-                            data_list.append((t, v, i, p, r))
-                        except (ValueError, IndexError):
-                            continue
-
-            elif file_ext in [".xlsx", ".xls"]:
-                # 读取 Excel 文件
-                try:
-                    import openpyxl
-
-                    wb = openpyxl.load_workbook(file_path)
-                    ws = wb.active
-
-                    header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
-                    if not header_row:
-                        QMessageBox.warning(self, "导入失败", "文件为空")
-                        return
-
-                    header_cells = [str(x).strip() for x in header_row]
-                    idx_ts = _find_col(header_cells, ["时间"])
-                    idx_v = _find_col(header_cells, ["电压(V)", "电压"])
-                    idx_i = _find_col(header_cells, ["电流(A)", "电流"])
-                    idx_p = _find_col(header_cells, ["功率(W)", "功率"])
-                    idx_r = _find_col(header_cells, ["内阻(Ω)", "内阻", "内阻(Ohm)"])
-
-                    if None in (idx_v, idx_i, idx_p, idx_r):
-                        QMessageBox.warning(self, "格式错误", "文件缺少必要列（电压/电流/功率/内阻），无法导入")
-                        return
-
-                    base_dt: datetime | None = None
-
-                    for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True)):
-                        if not row:
-                            continue
-                        try:
-                            v = float(row[idx_v])
-                            i = float(row[idx_i])
-                            p = float(row[idx_p])
-                            r = float(row[idx_r])
-
-                            if idx_ts is not None and idx_ts < len(row):
-                                dt = _parse_ts(row[idx_ts])
-                            else:
-                                dt = None
-
-                            if dt is not None:
-                                if base_dt is None:
-                                    base_dt = dt
-                                t = (dt - base_dt).total_seconds()
-                            else:
-                                t = idx * 0.2
-
-                            data_list.append((t, v, i, p, r))
-                        except (ValueError, TypeError, IndexError):
-                            continue
-                except ImportError:
-                    QMessageBox.warning(
-                        self, "缺少依赖", "读取 Excel 文件需要安装 openpyxl 库\n请运行: pip install openpyxl"
-                    )
-                    return
-            else:
-                QMessageBox.warning(self, "不支持的格式", "仅支持 CSV 和 Excel 文件")
-                return
+        self.import_file(file_path)
 
-            if not data_list:
-                QMessageBox.warning(self, "导入失败", "文件中没有有效数据")
+    def import_file(self, file_path: str) -> None:
+        """后台导入文件：表格在数据源打开后立即可浏览，数值列在后台读完后一次性装入曲线"""
+        if self._import_worker is not None:
+            QMessageBox.warning(self, "导入", "已有导入任务正在进行")
+            return
+
+        progress = QProgressDialog("正在打开文件…", "取消", 0, 1000, self)
+        progress.setWindowTitle("导入波形")
+        progress.setWindowModality(Qt.WindowModality.NonModal)
+        progress.setMinimumDuration(300)
+        progress.setValue(0)
+
+        worker = SessionImportWorker(file_path, time.time())
+        worker.setParent(self)
+        self._import_worker = worker
+        loaded = [0]
+        opened = [False]
+
+        def _opened(source: object) -> None:
+            opened[0] = True
+            self.data_model.set_source(source)
+            self.data_table.scrollToBottom()
+            progress.setLabelText("正在读取数据…")
+            self.import_started.emit(self.data_model.rowCount())
+
+        def _filtered(view: object) -> None:
+            # 读完后换成只含有效行的视图；表格已被清空或替换时丢弃
+            if not self.data_model.set_source_view(view):
+                view.close()  # type: ignore[union-attr]
+
+        def _columns(columns: object) -> None:
+            loaded[0] = columns.shape[1]  # type: ignore[union-attr]
+            self.import_columns.emit(columns)
+
+        def _on_progress(done: int, total: int) -> None:
+            if total <= 0:
+                progress.setRange(0, 0)  # 总量未知（Excel 文件缺少尺寸信息）：显示忙碌状态
                 return
+            progress.setRange(0, 1000)
+            progress.setValue(int(done * 1000 / total))
 
-            # 发射信号，通知主窗口更新波形
-            self.data_imported.emit(data_list)
-            QMessageBox.information(self, "导入成功", f"成功导入 {len(data_list)} 条数据")
+        def _finish() -> None:
+            progress.close()
+            self._import_worker = None
 
-        except Exception as e:
-            QMessageBox.critical(self, "导入失败", f"导入数据时发生错误：{str(e)}")
+        def _ok(total: int) -> None:
+            _finish()
+            if total == 0:
+                # 数据源未交给表格和曲线，当前会话保持不变
+                QMessageBox.warning(self, "导入失败", "文件中没有有效数据")
+                return
+            self.import_finished.emit(loaded[0])
+            QMessageBox.information(self, "导入成功", f"成功导入 {total} 条数据")
+
+        def _failed(err: str) -> None:
+            _finish()
+            self.import_finished.emit(loaded[0])
+            QMessageBox.critical(self, "导入失败", f"导入数据时发生错误：{err}")
+
+        def _canceled() -> None:
+            _finish()
+            if not opened[0]:
+                self.append_run_log("导入已取消")
+                return
+            self.import_finished.emit(loaded[0])
+            self.append_run_log("导入已取消（表格数据完整，曲线仅绘制已读取部分）")
+
+        worker.opened.connect(_opened)
+        worker.filtered.connect(_filtered)
+        worker.columns_loaded.connect(_columns)
+        worker.progress.connect(_on_progress)
+        worker.succeeded.connect(_ok)
+        worker.failed.connect(_failed)
+        worker.canceled.connect(_canceled)
+        # 由面板持有，线程结束后再释放（结果信号在 run() 返回前发出）
+        worker.finished.connect(worker.deleteLater)
+        progress.canceled.connect(worker.cancel)
+        worker.start()
 
     def _on_export_clicked(self) -> None:
         """导出数据"""
-        if self.data_table.rowCount() == 0:
+        if self.data_model.rowCount() == 0:
             QMessageBox.warning(self, "无数据", "没有可导出的数据")
             return
 
@@ -360,151 +306,80 @@ class DataLogPanel(QFrame):
         self.export_requested.emit(file_path, selected_filter)
 
     def export_with_metadata(self, file_path: str, selected_filter: str, meta: dict) -> None:
-        """使用设备查询到的元数据导出"""
-        mode = str(meta.get("mode", ""))
-        max_i = meta.get("max_current", "")
-        max_p = meta.get("max_power", "")
-
-        try:
-            file_ext = Path(file_path).suffix.lower()
-            headers = [
-                "时间",
-                "工作模式",
-                "最大电流(A)",
-                "最大功率(W)",
-                "电压(V)",
-                "电流(A)",
-                "功率(W)",
-                "内阻(Ω)",
-            ]
-
-            def iter_rows():
-                for row in range(self.data_table.rowCount()):
-                    ts = self.data_table.item(row, 0).text() if self.data_table.item(row, 0) else ""
-                    v = self.data_table.item(row, 1).text() if self.data_table.item(row, 1) else ""
-                    i = self.data_table.item(row, 2).text() if self.data_table.item(row, 2) else ""
-                    p = self.data_table.item(row, 3).text() if self.data_table.item(row, 3) else ""
-                    r = self.data_table.item(row, 4).text() if self.data_table.item(row, 4) else ""
-                    yield [ts, mode, max_i, max_p, v, i, p, r]
-
-            if file_ext == ".csv" or "CSV" in selected_filter:
-                if not file_path.endswith(".csv"):
-                    file_path += ".csv"
-
-                import csv
-
-                with open(file_path, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers)
-                    for row_data in iter_rows():
-                        writer.writerow(row_data)
-
-            elif file_ext == ".xlsx" or "Excel" in selected_filter:
-                if not file_path.endswith(".xlsx"):
-                    file_path += ".xlsx"
-
-                try:
-                    import openpyxl
-                except ImportError:
-                    QMessageBox.warning(
-                        self, "缺少依赖", "导出 Excel 文件需要安装 openpyxl 库\n请运行: pip install openpyxl"
-                    )
-                    return
-
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "测量数据"
-                ws.append(headers)
-                for row_data in iter_rows():
-                    ws.append(row_data)
-                wb.save(file_path)
-            else:
-                QMessageBox.warning(self, "不支持的格式", "请选择 CSV 或 Excel 格式")
-                return
+        """使用设备查询到的元数据导出表格中的数值数据（完整精度）"""
+        if self.data_model.source is not None:
+            source: ExportSource = PagedExportSource(self.data_model.source, self.data_model.columns())
+        else:
+            source = ArrayExportSource(self.data_model.columns())
+        self._start_export(file_path, selected_filter, meta, source)
+
+    def export_from_session(
+        self, file_path: str, selected_filter: str, meta: dict, data_path: Path, fmt: str = "csv"
+    ) -> None:
+        """从录制会话文件导出"""
+        if fmt == "bin":
+            source: ExportSource = BinarySessionExportSource(data_path)
+        else:
+            source = SessionCsvExportSource(data_path)
+        self._start_export(file_path, selected_filter, meta, source)
+
+    def _start_export(self, file_path: str, selected_filter: str, meta: dict, source: ExportSource) -> None:
+        if self._export_worker is not None:
+            QMessageBox.warning(self, "导出", "已有导出任务正在进行")
+            return
 
-            QMessageBox.information(self, "导出成功", f"数据已导出到：\n{file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "导出失败", f"导出数据时发生错误：{str(e)}")
-
-    def export_from_session(self, file_path: str, selected_filter: str, meta: dict, data_csv_path: Path) -> None:
-        mode = str(meta.get("mode", ""))
-        max_i = meta.get("max_current", "")
-        max_p = meta.get("max_power", "")
-
-        headers = [
-            "时间",
-            "工作模式",
-            "最大电流(A)",
-            "最大功率(W)",
-            "电压(V)",
-            "电流(A)",
-            "功率(W)",
-            "内阻(Ω)",
-        ]
-
-        try:
-            file_ext = Path(file_path).suffix.lower()
-
-            if file_ext == ".csv" or "CSV" in selected_filter:
-                if not file_path.endswith(".csv"):
-                    file_path += ".csv"
-
-                with open(file_path, "w", newline="", encoding="utf-8") as out_f:
-                    writer = csv.writer(out_f)
-                    writer.writerow(headers)
-                    with open(data_csv_path, "r", encoding="utf-8") as in_f:
-                        reader = csv.reader(in_f)
-                        _ = next(reader, None)
-                        for row in reader:
-                            if len(row) < 5:
-                                continue
-                            ts, v, i, p, r = row[0], row[1], row[2], row[3], row[4]
-                            writer.writerow([ts, mode, max_i, max_p, v, i, p, r])
-
-            elif file_ext == ".xlsx" or "Excel" in selected_filter:
-                if not file_path.endswith(".xlsx"):
-                    file_path += ".xlsx"
-
-                try:
-                    import openpyxl
-                except ImportError:
-                    QMessageBox.warning(
-                        self, "缺少依赖", "导出 Excel 文件需要安装 openpyxl 库\n请运行: pip install openpyxl"
-                    )
-                    return
-
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "测量数据_1"
-                ws.append(headers)
-                row_idx = 1
-                sheet_idx = 1
-
-                def new_sheet() -> Any:
-                    nonlocal ws, sheet_idx, row_idx
-                    sheet_idx += 1
-                    ws = wb.create_sheet(title=f"测量数据_{sheet_idx}")
-                    ws.append(headers)
-                    row_idx = 1
-                    return ws
-
-                with open(data_csv_path, "r", encoding="utf-8") as in_f:
-                    reader = csv.reader(in_f)
-                    _ = next(reader, None)
-                    for row in reader:
-                        if len(row) < 5:
-                            continue
-                        if row_idx >= 1_048_575:
-                            new_sheet()
-                        ts, v, i, p, r = row[0], row[1], row[2], row[3], row[4]
-                        ws.append([ts, mode, max_i, max_p, v, i, p, r])
-                        row_idx += 1
-
-                wb.save(file_path)
-            else:
-                QMessageBox.warning(self, "不支持的格式", "请选择 CSV 或 Excel 格式")
+        file_ext = Path(file_path).suffix.lower()
+        if file_ext == ".csv" or "CSV" in selected_filter:
+            fmt = "csv"
+            if not file_path.endswith(".csv"):
+                file_path += ".csv"
+        elif file_ext == ".xlsx" or "Excel" in selected_filter:
+            fmt = "xlsx"
+            if not file_path.endswith(".xlsx"):
+                file_path += ".xlsx"
+            if importlib.util.find_spec("openpyxl") is None:
+                QMessageBox.warning(
+                    self, "缺少依赖", "导出 Excel 文件需要安装 openpyxl 库\n请运行: pip install openpyxl"
+                )
                 return
+        else:
+            QMessageBox.warning(self, "不支持的格式", "请选择 CSV 或 Excel 格式")
+            return
 
-            QMessageBox.information(self, "导出成功", f"数据已导出到：\n{file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "导出失败", f"导出数据时发生错误：{str(e)}")
+        progress = QProgressDialog("正在导出数据…", "取消", 0, 1000, self)
+        progress.setWindowTitle("导出数据")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.setValue(0)
+
+        worker = ExportWorker(file_path, fmt, meta, source)
+        worker.setParent(self)
+        self._export_worker = worker
+
+        def _on_progress(done: int, total: int) -> None:
+            progress.setValue(int(done * 1000 / max(1, total)))
+
+        def _finish() -> None:
+            progress.close()
+            self._export_worker = None
+
+        def _ok(path: str) -> None:
+            _finish()
+            QMessageBox.information(self, "导出成功", f"数据已导出到：\n{path}")
+
+        def _failed(err: str) -> None:
+            _finish()
+            QMessageBox.critical(self, "导出失败", f"导出数据时发生错误：{err}")
+
+        def _canceled() -> None:
+            _finish()
+            self.append_run_log("导出已取消")
+
+        worker.progress.connect(_on_progress)
+        worker.succeeded.connect(_ok)
+        worker.failed.connect(_failed)
+        worker.canceled.connect(_canceled)
+        # 由面板持有，线程结束后再释放（结果信号在 run() 返回前发出）
+        worker.finished.connect(worker.deleteLater)
+        progress.canceled.connect(worker.cancel)
+        worker.start()
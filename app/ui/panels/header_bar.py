@@ -57,6 +57,14 @@ class HeaderBar(QWidget):
         self.addr.setStyleSheet(f"color: {TEXT_SECONDARY};")
         self.addr.setMinimumWidth(150)  # 确保地址有足够空间
 
+        self.sample_rate = QLabel("采样：--")
+        self.sample_rate.setStyleSheet(f"color: {TEXT_SECONDARY};")
+        self.sample_rate.setMinimumWidth(130)
+
+        self.record_stats = QLabel("")
+        self.record_stats.setStyleSheet(f"color: {TEXT_SECONDARY};")
+        self.record_stats.setVisible(False)
+
         # 帮助按钮
         self.btn_help = QPushButton("帮助")
         self.btn_help.setProperty("variant", "secondary")
@@ -73,6 +81,10 @@ class HeaderBar(QWidget):
         layout.addSpacing(12)
         layout.addWidget(self.addr)
         layout.addSpacing(12)
+        layout.addWidget(self.sample_rate)
+        layout.addSpacing(12)
+        layout.addWidget(self.record_stats)
+        layout.addSpacing(12)
         layout.addWidget(self.btn_help)
 
         self.set_connected(False)
@@ -91,3 +103,40 @@ class HeaderBar(QWidget):
 
     def set_address(self, address: str) -> None:
         self.addr.setText(f"地址：{address}" if address else "地址：--")
+
+    def set_sample_stats(self, stats: dict | None) -> None:
+        if not stats:
+            self.sample_rate.setText("采样：--")
+            self.sample_rate.setToolTip("")
+            return
+        mode_text = {"compound": "合并", "sequential": "逐条"}.get(str(stats.get("mode", "")), "")
+        suffix = f" ({mode_text})" if mode_text else ""
+        self.sample_rate.setText(f"采样：{float(stats.get('rate', 0.0)):.1f} 次/s{suffix}")
+        self.sample_rate.setToolTip(
+            f"目标速率：{float(stats.get('target_rate', 0.0)):.1f} 次/s\n"
+            f"调度抖动：平均 {float(stats.get('jitter_ms_mean', 0.0)):.1f} ms，最大 {float(stats.get('jitter_ms_max', 0.0)):.1f} ms\n"
+            f"超时轮次：{int(stats.get('overruns', 0))}，跳过节拍：{int(stats.get('skipped', 0))}"
+        )
+
+    def set_record_stats(self, stats: dict | None) -> None:
+        if not stats:
+            self.record_stats.setVisible(False)
+            self.record_stats.setToolTip("")
+            return
+        kb_s = float(stats.get("bytes_per_s", 0.0)) / 1024.0
+        dropped = int(stats.get("dropped", 0))
+        text = f"录制：{kb_s:.1f} KB/s"
+        if dropped:
+            text += f"  丢弃 {dropped}"
+        if stats.get("error"):
+            text += "  写入失败"
+        self.record_stats.setText(text)
+        self.record_stats.setStyleSheet(f"color: {DANGER if dropped or stats.get('error') else TEXT_SECONDARY};")
+        self.record_stats.setToolTip(
+            f"排队：{int(stats.get('queued', 0))} 行\n"
+            f"已写入：{int(stats.get('written', 0))} 行，丢弃：{dropped} 行\n"
+            f"提交：{int(stats.get('commits', 0))} 次，fsync：{int(stats.get('fsyncs', 0))} 次，"
+            f"最近提交耗时 {float(stats.get('last_commit_ms', 0.0)):.1f} ms"
+            + (f"\n错误：{stats['error']}" if stats.get("error") else "")
+        )
+        self.record_stats.setVisible(True)
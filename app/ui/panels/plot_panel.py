@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-from collections import deque
 from datetime import datetime
 
 import numpy as np
 import pyqtgraph as pg
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
     QCheckBox,
     QFrame,
@@ -16,22 +15,31 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from ...core.decimation import MinMaxPyramid
+from ...core.samples import COL_I, COL_P, COL_R, COL_T, COL_V, SampleRingBuffer
 from ..theme import ACCENT, TEXT_SECONDARY
 
 
 class PlotPanel(QFrame):
-    def __init__(self, parent=None):
+    DEFAULT_CAPACITY = 50000
+    DEFAULT_MAX_FPS = 30
+
+    def __init__(self, parent=None, capacity: int = DEFAULT_CAPACITY, max_fps: int = DEFAULT_MAX_FPS):
         super().__init__(parent)
         self.setProperty("card", "true")
 
+        # 新数据只标记为“脏”，由定时器按帧率统一重绘；控件不可见时不重绘
+        self._dirty = False
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.timeout.connect(self._on_redraw_tick)
+        self.set_max_fps(max_fps)
+
         self._paused = False
         self._follow_latest = True
         self._follow_window_s = 600.0
-        self._t = deque(maxlen=50000)
-        self._v = deque(maxlen=50000)
-        self._i = deque(maxlen=50000)
-        self._p = deque(maxlen=50000)
-        self._r = deque(maxlen=50000)  # 添加电阻数据
+        self._buf = SampleRingBuffer(capacity)  # 列：t, v, i, p, r
+        self._lod = MinMaxPyramid(capacity)  # 缩放查看长历史时按像素宽度抽取 min/max
+        self._applying_view = False
 
         root = QVBoxLayout(self)
         root.setContentsMargins(14, 12, 14, 12)
@@ -108,6 +116,7 @@ class PlotPanel(QFrame):
 
         self.plot.scene().sigMouseClicked.connect(self._on_plot_clicked)
         self.plot.getPlotItem().vb.sigRangeChangedManually.connect(self._on_range_changed_manually)
+        self.plot.getPlotItem().vb.sigXRangeChanged.connect(self._on_x_range_changed)
 
         self._install_legend_sync()
 
@@ -118,12 +127,25 @@ class PlotPanel(QFrame):
     def toggle_pause(self) -> None:
         self.set_paused(not self._paused)
 
+    @property
+    def capacity(self) -> int:
+        return self._buf.capacity
+
+    def set_capacity(self, capacity: int) -> None:
+        """设置曲线保留的最大点数（保留最近的数据），长时间采集可调大以完整驻留内存"""
+        self._buf.set_capacity(capacity)
+        self._lod = MinMaxPyramid(self._buf.capacity)
+        self._update_curves()
+
+    def set_max_fps(self, fps: int) -> None:
+        """设置曲线最大刷新帧率"""
+        fps = max(1, int(fps))
+        self._redraw_timer.setInterval(max(1, int(1000 / fps)))
+
     def clear(self) -> None:
-        self._t.clear()
-        self._v.clear()
-        self._i.clear()
-        self._p.clear()
-        self._r.clear()  # 清空电阻数据
+        self._buf.clear()
+        self._lod.reset()
+        self._dirty = False
         self._marker.setData([])
         self.marker_label.setText("标记点：--")
         self._update_curves()
@@ -133,14 +155,81 @@ class PlotPanel(QFrame):
         if self._paused:
             return
 
-        self._t.append(t_s)
-        self._v.append(v)
-        self._i.append(i)
-        self._p.append(p)
-        self._r.append(r)
-        self._update_curves()
-        if self._follow_latest:
-            self._apply_follow_view()
+        self._buf.append(t_s, v, i, p, r)
+        self._mark_dirty()
+
+    def append_block(self, block: np.ndarray) -> None:
+        """批量追加采样块 (n, 5)：t, v, i, p, r，整批只刷新一次曲线"""
+        if self._paused or len(block) == 0:
+            return
+
+        self._buf.extend(block)
+        self._mark_dirty()
+
+    def load_block(self, t: np.ndarray, v: np.ndarray, i: np.ndarray, p: np.ndarray, r: np.ndarray) -> None:
+        """整体装入一段历史数据（如导入的波形），替换现有曲线
+
+        各列一次性放入缓冲区，min/max 金字塔一次建好，随后显示全部范围并只重绘一次。
+        """
+        self.load_columns(np.vstack([t, v, i, p, r]))
+
+    def load_columns(self, columns: np.ndarray) -> None:
+        """同 ``load_block``，参数为 (5, n) 数组：t, v, i, p, r（取得数组所有权，不拷贝）"""
+        self._buf.load(columns)
+        self._lod = MinMaxPyramid(self._buf.capacity)
+        self._lod.update(self._buf)
+        self._marker.setData([])
+        self.marker_label.setText("标记点：--")
+        self._applying_view = True
+        try:
+            self.show_all()
+            self._update_curves()
+        finally:
+            self._applying_view = False
+        self._dirty = False
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._is_drawable() and not self._redraw_timer.isActive():
+            self._redraw_timer.start()
+
+    def _is_drawable(self) -> bool:
+        if not self.isVisible() or self.visibleRegion().isEmpty():
+            return False
+        win = self.window()
+        return not (win is not None and win.isMinimized())
+
+    def _on_redraw_tick(self) -> None:
+        if not self._dirty or not self._is_drawable():
+            # 无新数据或不可见：停表，等待下一次追加数据或重新显示
+            self._redraw_timer.stop()
+            return
+        self._redraw()
+
+    def _redraw(self) -> None:
+        self._dirty = False
+        self._applying_view = True
+        try:
+            if self._follow_latest:
+                self._apply_follow_view()
+            self._update_curves()
+        finally:
+            self._applying_view = False
+
+    def _on_x_range_changed(self, *args) -> None:  # type: ignore[no-untyped-def]
+        # 缩放/平移后按新的可见范围重新选择抽取级别
+        if not self._applying_view:
+            self._mark_dirty()
+
+    def showEvent(self, event):  # type: ignore[no-untyped-def]
+        super().showEvent(event)
+        if self._dirty:
+            self._redraw()
+
+    def resizeEvent(self, event):  # type: ignore[no-untyped-def]
+        super().resizeEvent(event)
+        if len(self._buf):
+            self._mark_dirty()
 
     def enable_follow(self) -> None:
         self._follow_latest = True
@@ -152,21 +241,23 @@ class PlotPanel(QFrame):
         self.btn_follow.setText("跟随最新")
 
     def show_all(self) -> None:
-        if not self._t:
+        if not len(self._buf):
             return
         self.disable_follow()
-        t_min = float(self._t[0])
-        t_max = float(self._t[-1])
+        t = self._buf.column(COL_T)
+        t_min = float(t[0])
+        t_max = float(t[-1])
         vb = self.plot.getPlotItem().vb
         vb.setXRange(t_min, t_max, padding=0.02)
         vb.enableAutoRange(axis='y', enable=True)
 
     def _apply_follow_view(self, force: bool = False) -> None:
-        if not self._t:
+        if not len(self._buf):
             return
 
-        t_latest = float(self._t[-1])
-        t_min = float(self._t[0])
+        t = self._buf.column(COL_T)
+        t_latest = float(t[-1])
+        t_min = float(t[0])
         left = max(t_latest - self._follow_window_s, t_min)
         right = t_latest
 
@@ -180,18 +271,24 @@ class PlotPanel(QFrame):
             self.disable_follow()
 
     def _update_curves(self) -> None:
-        if not self._t:
+        if not len(self._buf):
             self.curve_v.setData([])
             self.curve_i.setData([])
             self.curve_p.setData([])
             self.curve_r.setData([])
             return
 
-        t = np.fromiter(self._t, dtype=float)
-        self.curve_v.setData(t, np.fromiter(self._v, dtype=float))
-        self.curve_i.setData(t, np.fromiter(self._i, dtype=float))
-        self.curve_p.setData(t, np.fromiter(self._p, dtype=float))
-        self.curve_r.setData(t, np.fromiter(self._r, dtype=float))
+        # 可见点数较少时直接使用环形缓冲区的连续视图（零拷贝）；
+        # 点数远超像素宽度时改用 min/max 金字塔，只绘制约 2 × 宽度个点且保留尖峰
+        self._lod.update(self._buf)
+        vb = self.plot.getPlotItem().vb
+        x0, x1 = vb.viewRange()[0]
+        width = int(vb.width()) or self.plot.width()
+        t, (v, i, p, r) = self._lod.select(self._buf, x0, x1, width)
+        self.curve_v.setData(t, v)
+        self.curve_i.setData(t, i)
+        self.curve_p.setData(t, p)
+        self.curve_r.setData(t, r)
 
     def _refresh_visibility(self) -> None:
         self.curve_v.setVisible(self.cb_v.isChecked())
@@ -271,7 +368,7 @@ class PlotPanel(QFrame):
         except Exception:
             pass
 
-        if not self._t:
+        if not len(self._buf):
             return
 
         pos = event.scenePos()
@@ -281,14 +378,14 @@ class PlotPanel(QFrame):
         mouse_point = self.plot.getPlotItem().vb.mapSceneToView(pos)
         x = float(mouse_point.x())
 
-        t = np.fromiter(self._t, dtype=float)
+        t = self._buf.column(COL_T)
         idx = int(np.argmin(np.abs(t - x)))
 
         tt = float(t[idx])
-        vv = float(np.fromiter(self._v, dtype=float)[idx])
-        ii = float(np.fromiter(self._i, dtype=float)[idx])
-        pp = float(np.fromiter(self._p, dtype=float)[idx])
-        rr = float(np.fromiter(self._r, dtype=float)[idx])
+        vv = float(self._buf.column(COL_V)[idx])
+        ii = float(self._buf.column(COL_I)[idx])
+        pp = float(self._buf.column(COL_P)[idx])
+        rr = float(self._buf.column(COL_R)[idx])
 
         # 将时间戳转换为可读时间
         time_str = datetime.fromtimestamp(tt).strftime("%H:%M:%S")
@@ -210,7 +210,7 @@ QCheckBox::indicator:checked {{
     background: {ACCENT};
 }}
 
-QTableWidget {{
+QTableView {{
     background-color: {SURFACE};
     border: 1px solid {BORDER};
     border-radius: 10px;
@@ -225,11 +225,11 @@ QHeaderView::section {{
     padding: 8px 10px;
 }}
 
-QTableWidget::item {{
+QTableView::item {{
     padding: 6px 8px;
 }}
 
-QTableWidget::item:selected {{
+QTableView::item:selected {{
     background: #123229;
     color: {TEXT_PRIMARY};
 }}
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QLabel, QHBoxLayout, QVBoxLayout, QWidget
 
+from ..theme import ACCENT, DANGER, TEXT_SECONDARY
 from .card_frame import CardFrame
 
 
@@ -14,6 +15,7 @@ class DeviceViewModel:
     transport: str
     address: str
     status: str
+    device_id: str = ""
 
 
 class DeviceCard(CardFrame):
@@ -69,6 +71,25 @@ class DeviceCard(CardFrame):
     def device(self) -> DeviceViewModel:
         return self._device
 
+    def set_status(self, status: str, connected: bool | None = None) -> None:
+        """更新状态文字；connected 为 None 时保持中性颜色"""
+        self._device.status = status
+        self.status_label.setText(status)
+        color = TEXT_SECONDARY if connected is None else (ACCENT if connected else DANGER)
+        self.status_label.setStyleSheet(f"font-size: 12px; color: {color};")
+        if connected is False:
+            self.clear_values()
+
+    def set_values(self, v: float, i: float, p: float) -> None:
+        self.preview_v.setText(f"电压 {v:.3f}V")
+        self.preview_i.setText(f"电流 {i:.3f}A")
+        self.preview_p.setText(f"功率 {p:.2f}W")
+
+    def clear_values(self) -> None:
+        self.preview_v.setText("电压 --")
+        self.preview_i.setText("电流 --")
+        self.preview_p.setText("功率 --")
+
     def mousePressEvent(self, event):  # type: ignore[override]
         self.clicked.emit()
         return super().mousePressEvent(event)
@@ -0,0 +1,119 @@
+"""CSV 波形导入基准：逐行解析（旧实现） vs 分页向量化解析
+
+用法：python -m benchmarks.bench_csv_import [--rows 1000000] [--file 已有文件.csv]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.core.samples import format_timestamps
+from app.core.session_import import CsvImportSource
+
+
+def make_csv(path: str, rows: int) -> None:
+    """生成与录制会话格式一致的测试文件"""
+    t = 1.7e9 + np.arange(rows) * 0.01
+    rng = np.random.default_rng(0)
+    values = rng.random((rows, 4)) * 10
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("时间,电压(V),电流(A),功率(W),内阻(Ω)\r\n")
+        chunk = 100_000
+        for a in range(0, rows, chunk):
+            b = min(rows, a + chunk)
+            ts = format_timestamps(t[a:b])
+            f.write(
+                "".join(
+                    f"{s},{v:.6f},{i:.6f},{p:.6f},{r:.6f}\r\n" for s, (v, i, p, r) in zip(ts, values[a:b].tolist())
+                )
+            )
+
+
+def legacy_parse(path: str) -> int:
+    """旧的逐行导入：每个字段 float()，每行 strptime 尝试多种格式"""
+
+    def _parse_ts(ts_text: str) -> datetime | None:
+        s = str(ts_text).strip()
+        if not s:
+            return None
+        for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+            try:
+                return datetime.strptime(s, fmt)
+            except ValueError:
+                pass
+        return None
+
+    data_list = []
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, [])
+        base_dt: datetime | None = None
+        for row in reader:
+            if not row:
+                continue
+            try:
+                v = float(row[1])
+                i = float(row[2])
+                p = float(row[3])
+                r = float(row[4])
+                dt = _parse_ts(row[0])
+                if dt is not None:
+                    if base_dt is None:
+                        base_dt = dt
+                    t = (dt - base_dt).total_seconds()
+                else:
+                    t = len(data_list) * 0.2
+                data_list.append((t, v, i, p, r))
+            except (ValueError, IndexError):
+                continue
+    return len(data_list)
+
+
+def vectorized_parse(path: str) -> int:
+    source = CsvImportSource(path, time.time())
+    n = len(source)
+    step = 65536
+    for a in range(0, n, step):
+        source.read_rows(a, min(n, a + step), use_cache=False)
+    source.close()
+    return n
+
+
+def run(rows: int = 1_000_000, path: str | None = None) -> dict:
+    tmp = None
+    if path is None:
+        fd, tmp = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        make_csv(tmp, rows)
+        path = tmp
+    try:
+        result: dict = {"file_bytes": os.path.getsize(path)}
+        for name, fn in (("legacy", legacy_parse), ("vectorized", vectorized_parse)):
+            t0 = time.perf_counter()
+            n = fn(path)
+            dt = time.perf_counter() - t0
+            result[name] = {"rows": n, "seconds": round(dt, 3), "rows_per_s": round(n / dt) if dt > 0 else None}
+        result["speedup"] = round(result["legacy"]["seconds"] / max(1e-9, result["vectorized"]["seconds"]), 1)
+        return result
+    finally:
+        if tmp:
+            os.remove(tmp)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--file", default=None, help="使用已有 CSV 文件而不是生成测试数据")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.file), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""端到端管线基准（无界面，offscreen Qt + 本地模拟负载）
+
+测量 SCPI 查询往返、DeviceManager 采样 -> PlotPanel / DataLogPanel / RecordingManager
+的持续吞吐、设定值突发更新的合并效果，以及导入/导出速度和峰值内存，结果输出为
+JSON，便于比较不同版本。
+
+用法：python -m benchmarks.bench_pipeline [--duration 5] [--interval-ms 1] [--out result.json]
+"""
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR, QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from app.core.data_export import ArrayExportSource, ExportWorker
+from app.core.device_manager import DeviceManager
+from app.core.recording_manager import RecordingManager
+from app.core.scpi import SCPIClient
+from app.core.transport import TcpTransport
+from app.simulator import LinkProfile, SimulatedLoad, SimulatorTcpServer, VoltageSource
+from app.ui.panels.data_log_panel import DataLogPanel
+from app.ui.panels.plot_panel import PlotPanel
+
+from .bench_csv_import import make_csv, vectorized_parse
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    if not samples_ms:
+        return {"count": 0}
+    a = np.asarray(samples_ms, dtype=np.float64)
+    p50, p90, p99 = np.percentile(a, [50, 90, 99])
+    return {
+        "count": int(a.size),
+        "mean": round(float(a.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(a.max()), 3),
+    }
+
+
+def _peak_rss_bytes() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def _wait(app: QApplication, seconds: float) -> None:
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def bench_rtt(address: tuple[str, int], queries: int) -> dict:
+    """单条查询与 4 值复合测量的往返时间（毫秒）"""
+    transport = TcpTransport(*address)
+    transport.open()
+    client = SCPIClient(transport)
+    try:
+        single, compound = [], []
+        for _ in range(queries):
+            t0 = time.perf_counter()
+            client.query("MEAS:VOLT?")
+            single.append((time.perf_counter() - t0) * 1000.0)
+        for _ in range(queries):
+            t0 = time.perf_counter()
+            client.query("MEAS:VOLT?;:MEAS:CURR?;:MEAS:POW?;:MEAS:RES?")
+            compound.append((time.perf_counter() - t0) * 1000.0)
+        return {"single_ms": _percentiles(single), "measure_all_ms": _percentiles(compound)}
+    finally:
+        transport.close()
+
+
+def bench_pipeline(app: QApplication, address: tuple[str, int], duration_s: float, interval_ms: int, fmt: str) -> dict:
+    """按 MainWindowV2 的接法把测量块送入曲线、数据表与录制，持续 duration_s 秒"""
+    plot = PlotPanel()
+    data_log = DataLogPanel()
+    plot.resize(1280, 480)
+    data_log.resize(1280, 320)
+    plot.show()
+    data_log.show()
+
+    frame_ms: list[float] = []
+    original_redraw = plot._redraw
+
+    def _timed_redraw() -> None:
+        t0 = time.perf_counter()
+        original_redraw()
+        frame_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    plot._redraw = _timed_redraw  # type: ignore[method-assign]
+
+    # 事件循环延迟：5 ms 定时器实际到达间隔超出部分
+    lag_ms: list[float] = []
+    tick = {"last": time.perf_counter()}
+    lag_timer = QTimer()
+    lag_timer.setInterval(5)
+
+    def _on_tick() -> None:
+        now = time.perf_counter()
+        lag_ms.append(max(0.0, (now - tick["last"]) * 1000.0 - 5.0))
+        tick["last"] = now
+
+    lag_timer.timeout.connect(_on_tick)
+
+    record_dir = Path(tempfile.mkdtemp(prefix="vload_bench_"))
+    recorder = RecordingManager()
+    manager = DeviceManager()
+    manager.set_sample_interval(interval_ms)
+    rows = {"n": 0}
+    handler_ms: list[float] = []
+    errors: list[str] = []
+
+    def _on_block(block: object) -> None:
+        t0 = time.perf_counter()
+        data = np.asarray(block, dtype=float)
+        plot.append_block(data)
+        data_log.append_block(data)
+        recorder.append_block(data)
+        rows["n"] += len(data)
+        handler_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    connected = QEventLoop()
+    manager.connected.connect(lambda _idn: connected.quit())
+    manager.error_occurred.connect(lambda err: (errors.append(err), connected.quit()))
+    manager.measurement_block.connect(_on_block)
+    try:
+        manager.connect_tcp_async(*address)
+        QTimer.singleShot(10000, connected.quit)
+        connected.exec()
+        if not manager.is_connected():
+            return {"error": errors[-1] if errors else "连接超时"}
+
+        # 预热：让复合测量探测与首帧绘制完成后再计时
+        _wait(app, 0.5)
+        session = recorder.start_new_session({"model": "bench"}, base_dir=record_dir, fmt=fmt)
+        rows["n"] = 0
+        frame_ms.clear()
+        handler_ms.clear()
+        tick["last"] = time.perf_counter()
+        lag_timer.start()
+        t0 = time.perf_counter()
+        _wait(app, duration_s)
+        elapsed = time.perf_counter() - t0
+        lag_timer.stop()
+        received = rows["n"]
+
+        manager.set_measurement_enabled(False)
+        recorder.stop()
+        record_bytes = session.data_path.stat().st_size
+        return {
+            "sample_interval_ms": interval_ms,
+            "duration_s": round(elapsed, 3),
+            "rows": received,
+            "rows_per_s": round(received / elapsed, 1),
+            "measure_mode": manager.device.measure_mode if manager.device else None,
+            "block_handler_ms": _percentiles(handler_ms),
+            "frame_ms": _percentiles(frame_ms),
+            "fps": round(len(frame_ms) / elapsed, 1),
+            "event_loop_lag_ms": _percentiles(lag_ms),
+            "recording": {
+                "format": fmt,
+                "bytes": record_bytes,
+                "bytes_per_s": round(record_bytes / elapsed, 1),
+            },
+        }
+    finally:
+        manager.disconnect_async()
+        manager.shutdown()
+        recorder.stop()
+        plot.close()
+        data_log.close()
+        shutil.rmtree(record_dir, ignore_errors=True)
+
+
+def bench_coalescing(app: QApplication, address: tuple[str, int], updates: int) -> dict:
+    """设定值突发更新：逐条排队 vs 合并键（后写者胜），比较实际执行数与收敛时间"""
+    manager = DeviceManager()
+    connected = QEventLoop()
+    manager.connected.connect(lambda _idn: connected.quit())
+    manager.error_occurred.connect(lambda _err: connected.quit())
+    try:
+        manager.connect_tcp_async(*address)
+        QTimer.singleShot(10000, connected.quit)
+        connected.exec()
+        if not manager.is_connected():
+            return {"error": "连接失败"}
+        manager.set_measurement_enabled(False)
+
+        result: dict = {"updates": updates}
+        for name, coalesce in (("fifo", False), ("coalesced", True)):
+            done = QEventLoop()
+            executed = {"n": 0}
+            last = {"id": ""}
+
+            def _on_result(request_id: str, _res: object) -> None:
+                executed["n"] += 1
+                if request_id == last["id"]:
+                    done.quit()
+
+            manager.command_result.connect(_on_result)
+            manager.command_error.connect(_on_result)
+            superseded0 = manager.coalescing_stats()["superseded"]
+            t0 = time.perf_counter()
+            for k in range(updates):
+                settings = {"CURR": round(1.0 + (k % 100) * 0.01, 2)}
+                if coalesce:
+                    last["id"] = manager.apply_settings_async(settings)
+                else:
+                    last["id"] = manager.run_device_call_async(lambda dev, s=settings: dev.apply_settings(s))
+                if k % 10 == 0:
+                    app.processEvents()  # 模拟拖动时 GUI 线程穿插处理事件
+            t_submit = time.perf_counter()
+            QTimer.singleShot(60000, done.quit)
+            done.exec()
+            t_done = time.perf_counter()
+            manager.command_result.disconnect(_on_result)
+            manager.command_error.disconnect(_on_result)
+            result[name] = {
+                "executed": executed["n"],
+                "superseded": manager.coalescing_stats()["superseded"] - superseded0,
+                "settle_ms": round((t_done - t_submit) * 1000.0, 3),
+                "total_ms": round((t_done - t0) * 1000.0, 3),
+            }
+        return result
+    finally:
+        manager.disconnect_async()
+        manager.shutdown()
+
+
+def bench_import_export(rows: int) -> dict:
+    """CSV 导入（分页向量化解析）与 CSV 导出（ExportWorker）的行速率"""
+    tmp = Path(tempfile.mkdtemp(prefix="vload_bench_"))
+    try:
+        src = tmp / "import.csv"
+        make_csv(str(src), rows)
+        t0 = time.perf_counter()
+        n = vectorized_parse(str(src))
+        t_import = time.perf_counter() - t0
+
+        columns = np.empty((5, rows), dtype=np.float64)
+        columns[0] = 1.7e9 + np.arange(rows) * 0.01
+        columns[1:] = np.random.default_rng(0).random((4, rows)) * 10
+        worker = ExportWorker(str(tmp / "export.csv"), "csv", {"mode": "CC"}, ArrayExportSource(columns))
+        failures: list[str] = []
+        worker.failed.connect(failures.append)
+        t0 = time.perf_counter()
+        worker.run()  # 直接在当前线程执行，只计写出耗时
+        t_export = time.perf_counter() - t0
+        return {
+            "import": {"rows": n, "seconds": round(t_import, 3), "rows_per_s": round(n / t_import)},
+            "export": {
+                "rows": rows,
+                "seconds": round(t_export, 3),
+                "rows_per_s": round(rows / t_export),
+                "error": failures[0] if failures else None,
+            },
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run(
+    duration_s: float = 5.0,
+    interval_ms: int = 1,
+    rtt_queries: int = 500,
+    io_rows: int = 200_000,
+    burst_updates: int = 2000,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    fmt: str = "csv",
+) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    load = SimulatedLoad(VoltageSource(12.0, 0.05), noise=0.001, seed=0)
+    server = SimulatorTcpServer(load, profile=LinkProfile(latency_ms=latency_ms, jitter_ms=jitter_ms, seed=0))
+    with server:
+        result: dict = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "qt": QT_VERSION_STR,
+                "pyqt": PYQT_VERSION_STR,
+                "link": {"latency_ms": latency_ms, "jitter_ms": jitter_ms},
+            },
+            "rtt": bench_rtt(server.address, rtt_queries),
+            "pipeline": bench_pipeline(app, server.address, duration_s, interval_ms, fmt),
+            "setpoint_burst": bench_coalescing(app, server.address, burst_updates),
+        }
+    result.update(bench_import_export(io_rows))
+    result["peak_rss_bytes"] = _peak_rss_bytes()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="管线持续采样时间（秒）")
+    parser.add_argument("--interval-ms", type=int, default=1, help="采样周期（毫秒）")
+    parser.add_argument("--rtt-queries", type=int, default=500)
+    parser.add_argument("--io-rows", type=int, default=200_000, help="导入/导出测试的行数")
+    parser.add_argument("--burst-updates", type=int, default=2000, help="设定值突发更新次数")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="模拟负载应答延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="模拟负载应答抖动")
+    parser.add_argument("--format", choices=("csv", "bin"), default="csv", help="录制格式")
+    parser.add_argument("--out", default=None, help="同时把结果写入该 JSON 文件")
+    args = parser.parse_args()
+    result = run(
+        args.duration,
+        args.interval_ms,
+        args.rtt_queries,
+        args.io_rows,
+        args.burst_updates,
+        args.latency_ms,
+        args.jitter_ms,
+        args.format,
+    )
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()